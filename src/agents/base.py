@@ -6,10 +6,11 @@ supports fallback to hardcoded prompts for backward compatibility.
 """
 
 import os
+import threading
 from abc import ABC, abstractmethod
 from typing import Any, List, Optional, TYPE_CHECKING
 
-from langchain_openai import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
 from langchain.agents import create_agent
 
 from ..logger import setup_logger
@@ -18,7 +19,7 @@ from ..config import WORKING_DIRECTORY
 if TYPE_CHECKING:
     from ..core.language_models import LanguageModelManager
 
-logger = setup_logger()
+logger = setup_logger(__name__)
 
 
 class BaseAgent(ABC):
@@ -41,6 +42,7 @@ class BaseAgent(ABC):
 
     # Class-level config loader (shared across all agents)
     _config_loader: Optional["AgentConfigLoader"] = None
+    _config_loader_lock = threading.Lock()
 
     @classmethod
     def get_config_loader(cls) -> "AgentConfigLoader":
@@ -50,8 +52,10 @@ class BaseAgent(ABC):
             AgentConfigLoader instance.
         """
         if cls._config_loader is None:
-            from ..core.agent_config_loader import AgentConfigLoader
-            cls._config_loader = AgentConfigLoader()
+            with cls._config_loader_lock:
+                if cls._config_loader is None:
+                    from ..core.agent_config_loader import AgentConfigLoader
+                    cls._config_loader = AgentConfigLoader()
         return cls._config_loader
 
     def __init__(
@@ -100,15 +104,7 @@ class BaseAgent(ABC):
             logger.info(f"Loaded {len(tools)} tools from external config for {self.agent_name}")
 
         # Check for skills and add LookupSkill tool if needed
-        try:
-            loader = self.get_config_loader()
-            metadata = loader.load_metadata(self.agent_name)
-            if metadata.skills:
-                from ..tools.skills import LookupSkill
-                tools.append(LookupSkill())
-                logger.info(f"Added LookupSkill tool for {self.agent_name}")
-        except Exception as e:
-            logger.warning(f"Failed to check skills for {self.agent_name}: {e}")
+        tools.extend(self._load_skill_tools())
 
         # Load MCP tools from agent configuration
         mcp_tools = self._load_mcp_tools()
@@ -145,6 +141,23 @@ class BaseAgent(ABC):
             logger.warning(f"Failed to load tools from config for {self.agent_name}: {e}")
             return []
 
+    def _load_skill_tools(self) -> List:
+        """Load the LookupSkill tool if the agent has skills configured.
+
+        Returns:
+            List containing the LookupSkill tool, or empty list if no skills.
+        """
+        try:
+            loader = self.get_config_loader()
+            metadata = loader.load_metadata(self.agent_name)
+            if metadata.skills:
+                from ..tools.skills import LookupSkill
+                logger.info(f"Added LookupSkill tool for {self.agent_name}")
+                return [LookupSkill()]
+        except Exception as e:
+            logger.warning(f"Failed to check skills for {self.agent_name}: {e}")
+        return []
+
     def _load_mcp_tools(self) -> List:
         """Load MCP tools based on agent configuration.
 
@@ -223,16 +236,13 @@ class BaseAgent(ABC):
         logger.info(f"{self.agent_name} created successfully")
         return agent
 
-    def _create_model(self) -> ChatOpenAI:
-        """Create a model instance for this agent.
+    def _create_model(self) -> BaseChatModel:
+        """Get the model instance for this agent from the shared pool.
 
         Returns:
             Configured language model instance.
         """
-        provider = self.language_model_manager.get_provider(self.agent_name)
-        model_class = provider.get_model_class()
-        config = self.language_model_manager.get_model_config(self.agent_name)
-        return model_class(**config)
+        return self.language_model_manager.get_model(self.agent_name)
 
     def invoke(self, state: Any) -> Any:
         """Invoke the agent with a given state.
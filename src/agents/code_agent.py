@@ -1,7 +1,6 @@
 from typing import List, TYPE_CHECKING
 
-from ..tools.basetool import execute_code, execute_command, list_directory
-from ..tools.FileEdit import read_document
+from ..tools.factory import ToolFactory
 from .base import BaseAgent
 from ..config import WORKING_DIRECTORY
 
@@ -45,4 +44,4 @@ class CodeAgent(BaseAgent):
 
     def _get_tools(self) -> List:
         """Get the list of tools for code generation and execution."""
-        return [read_document, execute_code, execute_command, list_directory]
+        return ToolFactory.get_tools(["read_document", "execute_code", "execute_code_batch", "execute_command", "list_directory", "restart_kernel", "dataset_path"])
@@ -7,11 +7,152 @@ from .refiner_agent import RefinerAgent
 from .hypothesis_agent import HypothesisAgent
 from .process_agent import ProcessAgent
 from .note_agent import NoteAgent
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .base import BaseAgent
 from ..config import WORKING_DIRECTORY
+from ..logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Agent builds mostly wait on model clients and MCP server handshakes,
+# so a small pool is enough to overlap them
+DEFAULT_MAX_BUILD_WORKERS = 4
+
+
+def build_concurrently(
+    builders: Dict[str, Callable[[], Any]],
+    max_workers: Optional[int] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+    """Run independent build callables on a bounded thread pool.
+
+    Errors are collected per name instead of aborting the other builds,
+    and a per-build timing table is logged once all builds finish.
+
+    Args:
+        builders: Mapping of name to zero-argument build callable.
+        max_workers: Pool size. None = min(len(builders), DEFAULT_MAX_BUILD_WORKERS).
+
+    Returns:
+        Tuple of (results by name, errors by name).
+    """
+    results: Dict[str, Any] = {}
+    errors: Dict[str, Exception] = {}
+    timings: Dict[str, float] = {}
+    if not builders:
+        return results, errors
+
+    workers = max_workers or min(len(builders), DEFAULT_MAX_BUILD_WORKERS)
+
+    def timed(name: str, builder: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return builder()
+        finally:
+            timings[name] = time.perf_counter() - start
+
+    total_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-build") as executor:
+        futures = {
+            name: executor.submit(timed, name, builder)
+            for name, builder in builders.items()
+        }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Failed to build {name}: {e}")
+                errors[name] = e
+    total = time.perf_counter() - total_start
+
+    width = max(len(name) for name in [*builders, "total (wall)"])
+    rows = [f"{'agent':<{width}}  {'seconds':>8}  status"]
+    for name in builders:
+        status = "error" if name in errors else "ok"
+        rows.append(f"{name:<{width}}  {timings.get(name, 0.0):>8.2f}  {status}")
+    rows.append(f"{'total (wall)':<{width}}  {total:>8.2f}  workers={workers}")
+    logger.info("Agent build timings:\n" + "\n".join(rows))
+
+    return results, errors
+
+
+class LazyAgent:
+    """Proxy that builds the underlying agent on first invocation.
+
+    Building an agent creates its chat model, loads prompts, rules and skills,
+    and discovers MCP tools. The proxy defers that work until the workflow
+    actually reaches the agent's node, then keeps the built instance.
+
+    Attributes:
+        agent_name: The name of the agent to build.
+    """
+
+    def __init__(self, agent_factory: "AgentFactory", agent_name: str) -> None:
+        """Initialize the lazy agent proxy.
+
+        Args:
+            agent_factory: Factory used to build the agent.
+            agent_name: The name of the agent to build.
+        """
+        self.agent_name = agent_name
+        self._agent_factory = agent_factory
+        self._agent: Optional[BaseAgent] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_built(self) -> bool:
+        """Whether the underlying agent has been built."""
+        return self._agent is not None
+
+    def get_agent(self) -> BaseAgent:
+        """Build the underlying agent if needed and return it.
+
+        Returns:
+            The materialized agent instance.
+        """
+        if self._agent is None:
+            with self._lock:
+                if self._agent is None:
+                    logger.info(f"Materializing agent: {self.agent_name}")
+                    self._agent = self._agent_factory.create_agent(self.agent_name)
+        return self._agent
+
+    def invoke(self, state: Any) -> Any:
+        """Invoke the underlying agent, building it first if needed.
+
+        Args:
+            state: The current state of the workflow.
+
+        Returns:
+            The agent's response.
+        """
+        return self.get_agent().invoke(state)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for attributes not defined on the proxy itself
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get_agent(), name)
+
 
 class AgentFactory:
     """A factory class for creating agents."""
 
+    agent_mapping = {
+        "visualization_agent": VisualizationAgent,
+        "code_agent": CodeAgent,
+        "search_agent": SearchAgent,
+        "report_agent": ReportAgent,
+        "quality_review_agent": QualityReviewAgent,
+        "refiner_agent": RefinerAgent,
+        "hypothesis_agent": HypothesisAgent,
+        "process_agent": ProcessAgent,
+        "note_agent": NoteAgent,
+    }
+
     def __init__(self, language_model_manager, team_members, working_directory=WORKING_DIRECTORY):
         """
         Initialize the AgentFactory.
@@ -38,19 +179,7 @@ class AgentFactory:
         Raises:
             ValueError: If the agent creation is not implemented.
         """
-        agent_mapping = {
-            "visualization_agent": VisualizationAgent,
-            "code_agent": CodeAgent,
-            "search_agent": SearchAgent,
-            "report_agent": ReportAgent,
-            "quality_review_agent": QualityReviewAgent,
-            "refiner_agent": RefinerAgent,
-            "hypothesis_agent": HypothesisAgent,
-            "process_agent": ProcessAgent,
-            "note_agent": NoteAgent,
-        }
-
-        agent_class = agent_mapping.get(agent_name)
+        agent_class = self.agent_mapping.get(agent_name)
         if not agent_class:
             raise ValueError(f"Agent creation for '{agent_name}' is not implemented.")
 
@@ -58,4 +187,42 @@ class AgentFactory:
             language_model_manager=self.language_model_manager,
             team_members=self.team_members,
             working_directory=self.working_directory
-        )
\ No newline at end of file
+        )
+
+    def create_lazy_agent(self, agent_name: str) -> LazyAgent:
+        """
+        Creates a proxy that builds the agent on first invocation.
+
+        Args:
+            agent_name: The name of the agent to create.
+
+        Returns:
+            A LazyAgent wrapping the requested agent.
+
+        Raises:
+            ValueError: If the agent creation is not implemented.
+        """
+        if agent_name not in self.agent_mapping:
+            raise ValueError(f"Agent creation for '{agent_name}' is not implemented.")
+        return LazyAgent(self, agent_name)
+
+    def create_agents(
+        self,
+        agent_names: List[str],
+        max_workers: Optional[int] = None,
+    ) -> Tuple[Dict[str, BaseAgent], Dict[str, Exception]]:
+        """
+        Creates several agents concurrently on a bounded thread pool.
+
+        Args:
+            agent_names: The names of the agents to create.
+            max_workers: Maximum number of agents built at the same time.
+
+        Returns:
+            Tuple of (agents by name, build errors by name).
+        """
+        builders = {
+            name: (lambda name=name: self.create_agent(name))
+            for name in agent_names
+        }
+        return build_concurrently(builders, max_workers=max_workers)
\ No newline at end of file
@@ -3,8 +3,7 @@ from typing import Sequence , List, TYPE_CHECKING
 
 from langchain_core.messages import BaseMessage
 
-from ..tools.FileEdit import read_document
-from ..tools.basetool import list_directory
+from ..tools.factory import ToolFactory
 from .base import BaseAgent
 from ..config import WORKING_DIRECTORY
 
@@ -54,4 +53,4 @@ class NoteAgent(BaseAgent):
 
     def _get_tools(self) -> List:
         """Get the tools for NoteAgent."""
-        return [read_document, list_directory]
+        return ToolFactory.get_tools(["read_document", "list_directory"])
@@ -1,8 +1,7 @@
 from typing import Literal, List, TYPE_CHECKING
 from pydantic import BaseModel, Field
 
-from ..tools.basetool import list_directory
-from ..tools.FileEdit import create_document, read_document, edit_document
+from ..tools.factory import ToolFactory
 from .base import BaseAgent
 from ..config import WORKING_DIRECTORY
 
@@ -55,5 +54,4 @@ class QualityReviewAgent(BaseAgent):
 
     def _get_tools(self) -> List:
         """Get the list of tools for the QualityReviewAgent."""
-        return [create_document, read_document, edit_document, list_directory]
-
+        return ToolFactory.get_tools(["create_document", "read_document", "edit_document", "list_directory"])
@@ -1,13 +1,8 @@
 from typing import List, TYPE_CHECKING
 
-from langchain_community.tools import WikipediaQueryRun
-from langchain_community.utilities import WikipediaAPIWrapper
-from langchain_community.agent_toolkits.load_tools import load_tools
+from ..tools.factory import ToolFactory
 
 from .base import BaseAgent
-from  ..tools.basetool import list_directory
-from ..tools.internet import google_search, scrape_webpages
-from ..tools.FileEdit import create_document, read_document, edit_document
 from ..config import WORKING_DIRECTORY
 
 if TYPE_CHECKING:
@@ -56,16 +51,13 @@ class RefinerAgent(BaseAgent):
 
     def _get_tools(self) -> List:
         """Get the list of tools for report refinement."""
-        api_wrapper = WikipediaAPIWrapper(wiki_client=None)
-        wikipedia = WikipediaQueryRun(api_wrapper=api_wrapper)
-        base_tools = [
-            create_document,
-            read_document,
-            edit_document,
-            wikipedia,
-            google_search,
-            scrape_webpages,
-            list_directory
-        ] + load_tools(["arxiv"])
-
-        return base_tools
+        return ToolFactory.get_tools([
+            "create_document",
+            "read_document",
+            "edit_document",
+            "wikipedia",
+            "google_search",
+            "scrape_webpages",
+            "list_directory",
+            "arxiv",
+        ])
@@ -1,7 +1,6 @@
 from typing import List, TYPE_CHECKING
 
-from ..tools.basetool import list_directory
-from ..tools.FileEdit import create_document, read_document, edit_document
+from ..tools.factory import ToolFactory
 from .base import BaseAgent
 from ..config import WORKING_DIRECTORY
 
@@ -46,4 +45,4 @@ class ReportAgent(BaseAgent):
 
     def _get_tools(self) -> List:
         """Get the list of tools for report writing."""
-        return [create_document, read_document, edit_document,list_directory]
+        return ToolFactory.get_tools(["create_document", "read_document", "edit_document", "list_directory"])
@@ -1,13 +1,8 @@
 from typing import List, TYPE_CHECKING
 
-from langchain_community.tools import WikipediaQueryRun
-from langchain_community.utilities import WikipediaAPIWrapper
-from langchain_community.agent_toolkits.load_tools import load_tools
+from ..tools.factory import ToolFactory
 
 from .base import BaseAgent
-from ..tools.basetool import list_directory
-from ..tools.FileEdit import create_document, read_document, collect_data
-from ..tools.internet import google_search, scrape_webpages
 from ..config import WORKING_DIRECTORY
 
 if TYPE_CHECKING:
@@ -49,16 +44,15 @@ class SearchAgent(BaseAgent):
 
     def _get_tools(self) -> List:
         """Get the list of tools for information retrieval and summarization."""
-        api_wrapper = WikipediaAPIWrapper(wiki_client=None)
-        wikipedia = WikipediaQueryRun(api_wrapper=api_wrapper)
-        base_tools = [
-            create_document,
-            read_document,
-            collect_data,
-            wikipedia,
-            google_search,
-            scrape_webpages,
-            list_directory
-        ] + load_tools(["arxiv"])
-
-        return base_tools
+        return ToolFactory.get_tools([
+            "create_document",
+            "read_document",
+            "collect_data",
+            "profile_data",
+            "query_data",
+            "wikipedia",
+            "google_search",
+            "scrape_webpages",
+            "list_directory",
+            "arxiv",
+        ])
@@ -0,0 +1 @@
+"""Benchmarks and profiling entry points (e.g. python -m src.bench.startup)."""
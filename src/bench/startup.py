@@ -0,0 +1,348 @@
+"""Startup profiler for MultiAgentSystem.
+
+Reports how long each phase of ``MultiAgentSystem.__init__`` takes:
+
+- Module imports, per third-party package and per project module
+- AGENT_MODELS / TOOL_CONFIG loading
+- Each BaseAgent.__init__ step (model, prompt, tools, skills, MCP, agent graph)
+- WorkflowManager agent creation and setup_workflow graph compile
+
+By default providers are replaced with an offline fake chat model so the
+profile runs without API keys or network access. MCP servers are still
+spawned unless --skip-mcp is given.
+
+Example:
+    python -m src.bench.startup
+    python -m src.bench.startup --skip-mcp --parallel
+    python -m src.bench.startup --online --json startup_profile.json
+
+Note:
+    Running as ``python -m src.bench.startup`` imports the ``src`` package
+    (and therefore ``src.config``) before profiling starts. Packages that are
+    already imported at that point are reported as preloaded; the config
+    phase re-times AGENT_MODELS and TOOL_CONFIG loading explicitly.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import functools
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Third-party packages, timed in this order. Each timing includes any
+# dependencies not already pulled in by an earlier entry.
+IMPORT_PACKAGES = [
+    "yaml",
+    "dotenv",
+    "pydantic",
+    "langchain_core",
+    "langchain",
+    "langgraph",
+    "langchain_community",
+    "langchain_openai",
+    "langchain_anthropic",
+    "langchain_google_genai",
+    "langchain_ollama",
+    "langchain_groq",
+    "pandas",
+    "mcp",
+]
+
+# Project modules, timed after the third-party packages
+PROJECT_MODULES = [
+    "src.config",
+    "src.tools.tool_config",
+    "src.tools.factory",
+    "src.agents.factory",
+    "src.core",
+    "src.system",
+]
+
+# BaseAgent.__init__ steps, mapped to the names used in the report
+AGENT_STEPS = {
+    "_create_model": "model",
+    "_load_system_prompt": "prompt",
+    "_load_tools_from_config": "tools",
+    "_get_tools": "tools_fallback",
+    "_load_skill_tools": "skills",
+    "_load_mcp_tools": "mcp",
+    "_create_base_agent": "create_agent",
+}
+
+# Phases whose rows add up to the overall startup time
+TOP_LEVEL_PHASES = ["import", "config", "system"]
+
+_MISSING = object()
+
+
+@dataclass
+class PhaseTiming:
+    """A single timed step.
+
+    Attributes:
+        phase: Phase the step belongs to (e.g. 'import', 'agent:code_agent').
+        name: Step name within the phase.
+        seconds: Wall-clock duration.
+        detail: Optional note (e.g. 'preloaded', 'error: ...').
+    """
+    phase: str
+    name: str
+    seconds: float
+    detail: str = ""
+
+
+class StartupProfile:
+    """Thread-safe collector of phase timings."""
+
+    def __init__(self) -> None:
+        self.timings: List[PhaseTiming] = []
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, name: str, seconds: float, detail: str = "") -> None:
+        """Record a timing."""
+        with self._lock:
+            self.timings.append(PhaseTiming(phase, name, seconds, detail))
+
+    @contextlib.contextmanager
+    def measure(self, phase: str, name: str) -> Iterator[None]:
+        """Time the enclosed block, recording errors in the detail field."""
+        start = time.perf_counter()
+        detail = ""
+        try:
+            yield
+        except Exception as e:
+            detail = f"error: {e}"
+            raise
+        finally:
+            self.record(phase, name, time.perf_counter() - start, detail)
+
+    def totals(self) -> Dict[str, float]:
+        """Sum of timings for each top-level phase."""
+        return {
+            phase: sum(t.seconds for t in self.timings if t.phase == phase)
+            for phase in TOP_LEVEL_PHASES
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Export the profile as a JSON-serializable dictionary."""
+        return {
+            "timings": [asdict(t) for t in self.timings],
+            "totals": self.totals(),
+        }
+
+    def format_table(self) -> str:
+        """Render the profile as a plain-text table."""
+        width = max([len(f"{t.phase}/{t.name}") for t in self.timings] + [20])
+        lines = [f"{'phase/step':<{width}}  {'seconds':>9}  detail"]
+        lines.append("-" * (width + 20))
+        for t in self.timings:
+            lines.append(f"{t.phase + '/' + t.name:<{width}}  {t.seconds:>9.3f}  {t.detail}")
+        lines.append("-" * (width + 20))
+        for phase, seconds in self.totals().items():
+            lines.append(f"{'total/' + phase:<{width}}  {seconds:>9.3f}")
+        return "\n".join(lines)
+
+
+def _patch(stack: contextlib.ExitStack, owner: Any, name: str, value: Any) -> None:
+    """Set an attribute for the lifetime of the exit stack."""
+    original = owner.__dict__.get(name, _MISSING)
+    setattr(owner, name, value)
+
+    def restore() -> None:
+        if original is _MISSING:
+            delattr(owner, name)
+        else:
+            setattr(owner, name, original)
+
+    stack.callback(restore)
+
+
+def _timed_method(
+    profile: StartupProfile,
+    method: Callable,
+    phase: Callable[[Any], str],
+    step: str,
+) -> Callable:
+    """Wrap a method so each call is recorded under phase(self)/step."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with profile.measure(phase(self), step):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def profile_imports(profile: StartupProfile) -> None:
+    """Time imports of third-party packages and project modules."""
+    for module_name in IMPORT_PACKAGES + PROJECT_MODULES:
+        if module_name in sys.modules:
+            profile.record("import", module_name, 0.0, "preloaded")
+            continue
+        start = time.perf_counter()
+        try:
+            importlib.import_module(module_name)
+            detail = ""
+        except ImportError as e:
+            detail = f"not installed: {e.name}"
+        profile.record("import", module_name, time.perf_counter() - start, detail)
+
+
+def profile_config(profile: StartupProfile) -> None:
+    """Time a fresh load of AGENT_MODELS and TOOL_CONFIG."""
+    from ..config import AgentModelsConfig
+    from ..tools.tool_config import ToolConfig
+
+    with profile.measure("config", "AGENT_MODELS"):
+        AgentModelsConfig()
+    with profile.measure("config", "TOOL_CONFIG"):
+        ToolConfig.load()
+
+
+class _OfflineProvider:
+    """Provider returning a fake chat model, so no SDK client is created."""
+
+    def get_model_class(self) -> Callable[..., Any]:
+        return _create_offline_model
+
+
+def _create_offline_model(**config: Any) -> Any:
+    """Create a fake chat model that accepts any model config."""
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    class OfflineChatModel(FakeListChatModel):
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+    return OfflineChatModel(responses=["offline"])
+
+
+def _instrument(
+    stack: contextlib.ExitStack,
+    profile: StartupProfile,
+    offline: bool,
+    skip_mcp: bool,
+) -> None:
+    """Install timing wrappers and offline stubs for the system build."""
+    from ..agents.base import BaseAgent
+    from ..agents.factory import AgentFactory
+    from ..core.workflow import WorkflowManager
+    from ..llm.factory import ProviderFactory
+    from ..tools.factory import ToolFactory
+
+    def agent_phase(agent: Any) -> str:
+        return f"agent:{agent.agent_name}"
+
+    agent_classes = [BaseAgent, *AgentFactory.agent_mapping.values()]
+    for method_name, step in AGENT_STEPS.items():
+        for cls in agent_classes:
+            if method_name in cls.__dict__:
+                method = cls.__dict__[method_name]
+                _patch(stack, cls, method_name, _timed_method(profile, method, agent_phase, step))
+
+    base_init = BaseAgent.__init__
+
+    @functools.wraps(base_init)
+    def timed_init(self, agent_name, *args, **kwargs):
+        with profile.measure("agents", agent_name):
+            base_init(self, agent_name, *args, **kwargs)
+
+    _patch(stack, BaseAgent, "__init__", timed_init)
+
+    def workflow_phase(_: Any) -> str:
+        return "workflow"
+
+    for method_name in ("create_agents", "setup_workflow", "prewarm"):
+        method = WorkflowManager.__dict__[method_name]
+        _patch(stack, WorkflowManager, method_name,
+               _timed_method(profile, method, workflow_phase, method_name))
+
+    if offline:
+        _patch(stack, ProviderFactory, "create_provider",
+               lambda self, provider_name, **kwargs: _OfflineProvider())
+
+    if skip_mcp:
+        _patch(stack, ToolFactory, "get_mcp_tools",
+               classmethod(lambda cls, server_names: []))
+
+
+def profile_system(
+    profile: StartupProfile,
+    offline: bool = True,
+    skip_mcp: bool = False,
+    parallel: bool = False,
+) -> None:
+    """Build a MultiAgentSystem with every agent prewarmed and time it."""
+    from ..system import MultiAgentSystem
+
+    with contextlib.ExitStack() as stack:
+        _instrument(stack, profile, offline=offline, skip_mcp=skip_mcp)
+        with profile.measure("system", "MultiAgentSystem.__init__"):
+            MultiAgentSystem(prewarm=True, parallel_build=parallel)
+
+
+def run(
+    offline: bool = True,
+    skip_mcp: bool = False,
+    parallel: bool = False,
+) -> StartupProfile:
+    """Profile a full MultiAgentSystem startup.
+
+    Args:
+        offline: Replace providers with a fake chat model.
+        skip_mcp: Do not spawn MCP servers.
+        parallel: Build agents concurrently.
+
+    Returns:
+        The collected StartupProfile.
+    """
+    if offline:
+        # MultiAgentSystem.setup_environment copies these into os.environ
+        os.environ.setdefault("OPENAI_API_KEY", "offline")
+        os.environ.setdefault("LANGCHAIN_API_KEY", "offline")
+
+    profile = StartupProfile()
+    profile_imports(profile)
+    profile_config(profile)
+    profile_system(profile, offline=offline, skip_mcp=skip_mcp, parallel=parallel)
+    return profile
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.bench.startup",
+        description="Profile MultiAgentSystem startup phase by phase.",
+    )
+    parser.add_argument("--online", action="store_true",
+                        help="Create real provider clients instead of offline stubs")
+    parser.add_argument("--skip-mcp", action="store_true",
+                        help="Do not spawn MCP servers")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Build agents concurrently (parallel_build=True)")
+    parser.add_argument("--json", metavar="PATH",
+                        help="Write the JSON report to PATH instead of stdout")
+    args = parser.parse_args(argv)
+
+    profile = run(offline=not args.online, skip_mcp=args.skip_mcp, parallel=args.parallel)
+
+    print(profile.format_table())
+    report = json.dumps(profile.to_dict(), indent=2)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(report)
+        print(f"\nJSON report written to {args.json}")
+    else:
+        print()
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
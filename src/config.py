@@ -12,8 +12,18 @@ FIRECRAWL_API_KEY = os.getenv('FIRECRAWL_API_KEY')
 WORKING_DIRECTORY = os.getenv('WORKING_DIRECTORY', './data')
 # Get Conda-related paths from environment variables
 CONDA_ENV = os.getenv('CONDA_ENV', 'base')
+# Exec the env's interpreter directly instead of `conda run` on every call
+CONDA_DIRECT_EXEC = os.getenv('CONDA_DIRECT_EXEC', 'true').lower() in ('1', 'true', 'yes')
 # Get ChromeDriver
 CHROMEDRIVER_PATH = os.getenv('CHROMEDRIVER_PATH', './chromedriver/chromedriver')
+# Logging settings
+LOG_FILE = os.getenv('LOG_FILE', 'agent.log')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG').upper()
+LOG_CONSOLE_LEVEL = os.getenv('LOG_CONSOLE_LEVEL', 'INFO').upper()
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+# Per-module levels, e.g. "src.tools.security=WARNING,src.core.mcp_manager=INFO"
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
 
 
 class AgentModelsConfig:
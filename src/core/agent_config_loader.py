@@ -19,13 +19,22 @@ Example:
     # Level 3: Load skills and MCP config
     skills = loader.load_skills("process_agent")
     mcp_config = loader.load_mcp_config("process_agent")
+
+Compiled bundle:
+    Resolved metadata, system prompts and raw MCP config for every agent are
+    compiled into a JSON bundle keyed by the mtime, size and hash of each
+    source file. Later processes load the bundle instead of re-parsing the
+    markdown and YAML sources, and rebuild it when any source changes.
 """
 
 from __future__ import annotations
 
+import hashlib
+import json
 import os
 import re
-from dataclasses import dataclass, field
+import threading
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -34,7 +43,11 @@ import yaml
 from ..logger import setup_logger
 
 
-logger = setup_logger()
+logger = setup_logger(__name__)
+
+# Bump when the bundle layout changes so stale bundles are rebuilt
+BUNDLE_FORMAT_VERSION = 1
+DEFAULT_BUNDLE_PATH = "config/.cache/agent_config_bundle.json"
 
 
 @dataclass
@@ -117,18 +130,25 @@ class AgentConfigLoader:
     def __init__(
         self,
         config_root: str = "config/agents",
-        mcp_config_path: str = "config/mcp.yaml"
+        mcp_config_path: str = "config/mcp.yaml",
+        bundle_path: Optional[str] = DEFAULT_BUNDLE_PATH,
     ) -> None:
         """Initialize the agent configuration loader.
 
         Args:
             config_root: Root directory containing agent configurations.
             mcp_config_path: Path to the MCP server configuration file.
+            bundle_path: Path of the compiled config bundle. None disables
+                the bundle and always reads the source files.
         """
         self.config_root = Path(config_root)
         self.mcp_config_path = Path(mcp_config_path)
+        self.bundle_path = Path(bundle_path) if bundle_path else None
         self._metadata_cache: Dict[str, AgentMetadata] = {}
         self._mcp_config: Optional[Dict[str, Any]] = None
+        self._bundle: Optional[Dict[str, Any]] = None
+        self._bundle_lock = threading.RLock()
+        self._compiling = False
 
     def discover_agents(self) -> List[str]:
         """Discover all available agents (Level 1).
@@ -139,20 +159,30 @@ class AgentConfigLoader:
         Returns:
             List of agent names (directory names).
         """
-        agents = []
         if not self.config_root.exists():
             logger.warning(f"Agent config root does not exist: {self.config_root}")
-            return agents
-
-        for item in self.config_root.iterdir():
-            if item.is_dir() and not item.name.startswith("_"):
-                agent_md = item / "AGENT.md"
-                if agent_md.exists():
-                    agents.append(item.name)
+            return []
 
+        agents = self._list_agent_dirs()
         logger.info(f"Discovered {len(agents)} agents: {agents}")
         return agents
 
+    def _list_agent_dirs(self) -> List[str]:
+        """List agent directories containing an AGENT.md file.
+
+        Returns:
+            Sorted list of agent names.
+        """
+        if not self.config_root.exists():
+            return []
+        return sorted(
+            item.name
+            for item in self.config_root.iterdir()
+            if item.is_dir()
+            and not item.name.startswith("_")
+            and (item / "AGENT.md").exists()
+        )
+
     def load_metadata(self, agent_name: str) -> AgentMetadata:
         """Load agent metadata from YAML frontmatter (Level 1).
 
@@ -169,6 +199,12 @@ class AgentConfigLoader:
         if agent_name in self._metadata_cache:
             return self._metadata_cache[agent_name]
 
+        bundled = self._get_bundled_agent(agent_name)
+        if bundled is not None:
+            metadata = AgentMetadata(**bundled["metadata"])
+            self._metadata_cache[agent_name] = metadata
+            return metadata
+
         agent_md_path = self.config_root / agent_name / "AGENT.md"
         if not agent_md_path.exists():
             raise FileNotFoundError(f"Agent config not found: {agent_md_path}")
@@ -209,6 +245,23 @@ class AgentConfigLoader:
         Returns:
             System prompt string (markdown content).
 
+        Raises:
+            FileNotFoundError: If AGENT.md does not exist.
+        """
+        bundled = self._get_bundled_agent(agent_name)
+        if bundled is not None:
+            return bundled["system_prompt"]
+        return self._read_system_prompt(agent_name)
+
+    def _read_system_prompt(self, agent_name: str) -> str:
+        """Build the system prompt from the source files.
+
+        Args:
+            agent_name: Name of the agent.
+
+        Returns:
+            System prompt string.
+
         Raises:
             FileNotFoundError: If AGENT.md does not exist.
         """
@@ -340,7 +393,11 @@ class AgentConfigLoader:
             Dictionary with 'servers' key containing enabled server configs.
         """
         if self._mcp_config is None:
-            self._mcp_config = self._load_mcp_config_file()
+            bundle = self._get_bundle()
+            if bundle is not None:
+                self._mcp_config = self._expand_env_vars(bundle["mcp"])
+            else:
+                self._mcp_config = self._load_mcp_config_file()
 
         metadata = self.load_metadata(agent_name)
         all_servers = self._mcp_config.get("servers", {})
@@ -490,6 +547,15 @@ class AgentConfigLoader:
     def _load_mcp_config_file(self) -> Dict[str, Any]:
         """Load MCP configuration from YAML file.
 
+        Returns:
+            MCP configuration dictionary.
+        """
+        # Expand environment variables in config
+        return self._expand_env_vars(self._read_raw_mcp_config())
+
+    def _read_raw_mcp_config(self) -> Dict[str, Any]:
+        """Read the MCP configuration without expanding environment variables.
+
         Returns:
             MCP configuration dictionary.
         """
@@ -499,10 +565,7 @@ class AgentConfigLoader:
 
         try:
             content = self.mcp_config_path.read_text(encoding="utf-8")
-            config = yaml.safe_load(content)
-            
-            # Expand environment variables in config
-            return self._expand_env_vars(config)
+            return yaml.safe_load(content) or {"servers": {}, "defaults": []}
         except yaml.YAMLError as e:
             logger.error(f"Failed to parse MCP config: {e}")
             return {"servers": {}, "defaults": []}
@@ -572,6 +635,237 @@ class AgentConfigLoader:
         return self._load_per_agent_config(agent_name)
 
 
+    def compile_bundle(self, write: bool = True) -> Dict[str, Any]:
+        """Compile every agent's resolved configuration into a bundle.
+
+        The bundle holds each agent's metadata and final system prompt, the
+        raw (unexpanded) MCP config, and a fingerprint of every source file
+        that contributed to it.
+
+        Args:
+            write: Whether to write the bundle to bundle_path.
+
+        Returns:
+            The compiled bundle dictionary.
+        """
+        with self._bundle_lock:
+            # Parse from the sources, bypassing any previously loaded bundle
+            self._compiling = True
+            self._metadata_cache.clear()
+            try:
+                agents: Dict[str, Any] = {}
+                sources: List[Path] = [self.mcp_config_path]
+                agent_dirs = self._list_agent_dirs()
+                for agent_name in agent_dirs:
+                    try:
+                        metadata = self.load_metadata(agent_name)
+                        system_prompt = self._read_system_prompt(agent_name)
+                    except Exception as e:
+                        logger.warning(f"Skipping {agent_name} in config bundle: {e}")
+                        continue
+                    agents[agent_name] = {
+                        "metadata": asdict(metadata),
+                        "system_prompt": system_prompt,
+                    }
+                    sources.extend(self._source_paths(agent_name, metadata))
+                raw_mcp_config = self._read_raw_mcp_config()
+            finally:
+                self._compiling = False
+
+        bundle = {
+            "version": BUNDLE_FORMAT_VERSION,
+            "config_root": str(self.config_root),
+            "mcp_config_path": str(self.mcp_config_path),
+            "agent_names": agent_dirs,
+            "sources": {
+                str(path): self._fingerprint(path)
+                for path in dict.fromkeys(sources)
+            },
+            "mcp": raw_mcp_config,
+            "agents": agents,
+        }
+
+        if write and self.bundle_path is not None:
+            self._write_bundle(bundle)
+        return bundle
+
+    def reload(self) -> None:
+        """Drop all cached configuration so the next access re-validates."""
+        with self._bundle_lock:
+            self._bundle = None
+            self._metadata_cache.clear()
+            self._mcp_config = None
+
+    def _get_bundled_agent(self, agent_name: str) -> Optional[Dict[str, Any]]:
+        """Get an agent's entry from the compiled bundle.
+
+        Args:
+            agent_name: Name of the agent.
+
+        Returns:
+            Agent bundle entry, or None if the bundle is disabled or does not
+            contain the agent.
+        """
+        bundle = self._get_bundle()
+        if bundle is None:
+            return None
+        return bundle["agents"].get(agent_name)
+
+    def _get_bundle(self) -> Optional[Dict[str, Any]]:
+        """Load the compiled bundle, rebuilding it if any source changed.
+
+        The bundle is validated once per loader; call reload() to re-check.
+
+        Returns:
+            Bundle dictionary, or None if the bundle is disabled.
+        """
+        if self.bundle_path is None or self._compiling:
+            return None
+        if self._bundle is not None:
+            return self._bundle
+
+        with self._bundle_lock:
+            if self._bundle is None:
+                bundle = self._read_bundle()
+                if bundle is None or not self._is_bundle_fresh(bundle):
+                    logger.info("Compiling agent config bundle")
+                    bundle = self.compile_bundle(write=True)
+                else:
+                    logger.debug(f"Using agent config bundle: {self.bundle_path}")
+                self._bundle = bundle
+            return self._bundle
+
+    def _read_bundle(self) -> Optional[Dict[str, Any]]:
+        """Read the bundle file if it exists and is readable.
+
+        Returns:
+            Bundle dictionary or None.
+        """
+        if not self.bundle_path.exists():
+            return None
+        try:
+            return json.loads(self.bundle_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable config bundle {self.bundle_path}: {e}")
+            return None
+
+    def _write_bundle(self, bundle: Dict[str, Any]) -> None:
+        """Atomically write the bundle file.
+
+        Args:
+            bundle: Bundle dictionary to write.
+        """
+        tmp_path = self.bundle_path.with_name(
+            f"{self.bundle_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            self.bundle_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(bundle, indent=1), encoding="utf-8")
+            os.replace(tmp_path, self.bundle_path)
+            logger.info(f"Wrote agent config bundle: {self.bundle_path}")
+        except OSError as e:
+            logger.warning(f"Failed to write config bundle {self.bundle_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def _is_bundle_fresh(self, bundle: Dict[str, Any]) -> bool:
+        """Check whether a bundle still matches its source files.
+
+        Files whose mtime or size changed are re-hashed, so touching a file
+        without editing it does not force a rebuild. If such files still
+        match their hash, their new mtime is written back to the bundle so
+        they are not re-hashed on every start.
+
+        Args:
+            bundle: Bundle dictionary to validate.
+
+        Returns:
+            True if the bundle can be used as is.
+        """
+        if (
+            bundle.get("version") != BUNDLE_FORMAT_VERSION
+            or bundle.get("config_root") != str(self.config_root)
+            or bundle.get("mcp_config_path") != str(self.mcp_config_path)
+            or bundle.get("agent_names") != self._list_agent_dirs()
+        ):
+            return False
+
+        touched = False
+        for path_str, recorded in bundle.get("sources", {}).items():
+            path = Path(path_str)
+            if recorded is None:
+                if path.exists():
+                    return False
+                continue
+            try:
+                stat = path.stat()
+                if stat.st_mtime_ns == recorded["mtime_ns"] and stat.st_size == recorded["size"]:
+                    continue
+                if self._hash_file(path) != recorded["sha256"]:
+                    return False
+            except OSError:
+                return False
+            recorded["mtime_ns"] = stat.st_mtime_ns
+            recorded["size"] = stat.st_size
+            touched = True
+
+        if touched and self.bundle_path is not None:
+            logger.debug("Config sources were touched but not changed; updating their bundle fingerprints")
+            self._write_bundle(bundle)
+        return True
+
+    def _source_paths(self, agent_name: str, metadata: AgentMetadata) -> List[Path]:
+        """List the files an agent's compiled configuration depends on.
+
+        Args:
+            agent_name: Name of the agent.
+            metadata: The agent's metadata.
+
+        Returns:
+            List of source paths (some may not exist).
+        """
+        agent_dir = self.config_root / agent_name
+        paths = [agent_dir / "AGENT.md", agent_dir / "config.yaml"]
+
+        rule_paths = [metadata.rules] if isinstance(metadata.rules, str) else metadata.rules
+        for rp in rule_paths or []:
+            if not rp:
+                continue
+            if rp.startswith("_"):
+                paths.append((self.config_root / rp).resolve())
+            else:
+                paths.append((agent_dir / rp).resolve())
+
+        skills_dir = self.config_root.parent / "skills"
+        for skill_name in metadata.skills:
+            paths.append(skills_dir / skill_name / "SKILL.md")
+
+        return paths
+
+    @staticmethod
+    def _hash_file(path: Path) -> str:
+        """Compute the SHA-256 hex digest of a file."""
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+
+    @classmethod
+    def _fingerprint(cls, path: Path) -> Optional[Dict[str, Any]]:
+        """Fingerprint a source file.
+
+        Args:
+            path: File to fingerprint.
+
+        Returns:
+            Dictionary with mtime_ns, size and sha256, or None if missing.
+        """
+        try:
+            stat = path.stat()
+            return {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": cls._hash_file(path),
+            }
+        except OSError:
+            return None
+
 
 # Singleton instance for global access
 _default_loader: Optional[AgentConfigLoader] = None
@@ -1,18 +1,32 @@
+import asyncio
+import inspect
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Tuple
+
 from ..logger import setup_logger
 from ..llm.factory import ProviderFactory
 from ..config import AGENT_MODELS
 
+# Attributes under which LangChain chat models keep their SDK/HTTP clients
+_CLIENT_ATTRIBUTES = ("root_client", "client", "_client", "root_async_client", "async_client", "_async_client")
+
+
 class LanguageModelManager:
     def __init__(self):
         """Initialize the language model manager"""
-        self.logger = setup_logger()
+        self.logger = setup_logger(__name__)
         self.provider_factory = ProviderFactory()
+        # Shared model clients keyed by (provider, normalized model_config)
+        self._models: Dict[Tuple[str, str], Any] = {}
+        # Clients being constructed, so concurrent requests for a key wait for one construction
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
 
     def get_provider(self, agent_name: str):
         """Get the provider for the given agent."""
-        provider_name = AGENT_MODELS.get_provider(agent_name)
-        if not provider_name:
-            raise ValueError(f"No provider configured for agent '{agent_name}'")
+        provider_name = self._get_provider_name(agent_name)
         return self.provider_factory.create_provider(provider_name)
 
     def get_model_config(self, agent_name: str) -> dict:
@@ -21,3 +35,88 @@ class LanguageModelManager:
         if not config:
             raise ValueError(f"No model config configured for agent '{agent_name}'")
         return config
+
+    def get_model(self, agent_name: str):
+        """Get a chat model for the given agent from the shared pool.
+
+        Agents whose provider and model_config are identical share one model
+        instance, and with it one HTTP client and connection pool. Clients
+        are constructed outside the pool lock, so agents built concurrently
+        only wait for others that need the same client.
+
+        Args:
+            agent_name: Name of the agent.
+
+        Returns:
+            Configured language model instance.
+        """
+        provider_name = self._get_provider_name(agent_name)
+        config = self.get_model_config(agent_name)
+        key = (provider_name, self._normalize_config(config))
+
+        with self._lock:
+            model = self._models.get(key)
+            pending = self._pending.get(key) if model is None else None
+            creating = model is None and pending is None
+            if creating:
+                pending = self._pending[key] = Future()
+        if model is not None:
+            self.logger.debug(f"Reusing {provider_name} model client for {agent_name}")
+            return model
+        if not creating:
+            self.logger.debug(f"Waiting for the {provider_name} model client of {agent_name}")
+            return pending.result()
+
+        try:
+            provider = self.provider_factory.create_provider(provider_name)
+            model = provider.get_model_class()(**config)
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            self._models[key] = model
+            del self._pending[key]
+        pending.set_result(model)
+        self.logger.info(f"Created {provider_name} model client: {config.get('model', '')}")
+        return model
+
+    def close(self) -> None:
+        """Close all pooled model clients and empty the pool."""
+        with self._lock:
+            models = list(self._models.values())
+            self._models.clear()
+        for model in models:
+            self._close_model(model)
+        self.logger.info(f"Closed {len(models)} model clients")
+
+    def _get_provider_name(self, agent_name: str) -> str:
+        """Get the provider name configured for the given agent."""
+        provider_name = AGENT_MODELS.get_provider(agent_name)
+        if not provider_name:
+            raise ValueError(f"No provider configured for agent '{agent_name}'")
+        return provider_name
+
+    @staticmethod
+    def _normalize_config(config: dict) -> str:
+        """Build a stable pool key from a model config."""
+        return json.dumps(config, sort_keys=True, default=str)
+
+    def _close_model(self, model: Any) -> None:
+        """Close the SDK clients held by a model, if it exposes any."""
+        for attr in _CLIENT_ATTRIBUTES:
+            client = getattr(model, attr, None)
+            close = getattr(client, "close", None)
+            if not callable(close):
+                continue
+            try:
+                result = close()
+                if inspect.isawaitable(result):
+                    try:
+                        asyncio.run(result)
+                    except RuntimeError:
+                        # Called from a running event loop; schedule it there
+                        asyncio.ensure_future(result)
+            except Exception as e:
+                self.logger.debug(f"Error closing model client {attr}: {e}")
@@ -22,18 +22,22 @@ Example:
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
 import os
 import re
+import threading
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, TypeVar
 
 import yaml
 
 from ..logger import setup_logger
 
 
-logger = setup_logger()
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
 
 
 # Constants
@@ -115,6 +119,10 @@ class MCPManager:
     - Calling tools on connected servers
     - Providing tools to agents based on their configuration
 
+    All server sessions live on a single event loop owned by the manager and
+    running in a background thread, so tools can be discovered and called
+    from any thread or event loop (see run_sync() and run_async()).
+
     Attributes:
         config_path: Path to the MCP configuration file.
     """
@@ -131,6 +139,94 @@ class MCPManager:
         self._connections: Dict[str, MCPServerConnection] = {}
         self._connection_locks: Dict[str, asyncio.Lock] = {}
         self._global_lock = asyncio.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the manager's background event loop if it is not running.
+
+        Returns:
+            The event loop that owns all MCP sessions.
+        """
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="mcp-event-loop",
+                    daemon=True,
+                )
+                thread.start()
+                self._loop = loop
+                self._loop_thread = thread
+            return self._loop
+
+    def submit(self, coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """Schedule a coroutine on the manager's event loop.
+
+        Args:
+            coro: Coroutine to run.
+
+        Returns:
+            Future resolving to the coroutine's result.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run_sync(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Run a coroutine on the manager's event loop and wait for it.
+
+        Safe to call from any thread except the manager's own loop thread.
+
+        Args:
+            coro: Coroutine to run.
+            timeout: Seconds to wait for the result. None = no limit.
+
+        Returns:
+            The coroutine's result.
+        """
+        if threading.current_thread() is self._loop_thread:
+            raise RuntimeError("run_sync() cannot be called from the MCP event loop")
+        return self.submit(coro).result(timeout=timeout)
+
+    async def run_async(self, coro: Awaitable[T]) -> T:
+        """Await a coroutine on the manager's event loop from any event loop.
+
+        Args:
+            coro: Coroutine to run.
+
+        Returns:
+            The coroutine's result.
+        """
+        loop = self._ensure_loop()
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def shutdown(self, timeout: float = MCP_SERVER_STOP_TIMEOUT) -> None:
+        """Close all connections and stop the background event loop.
+
+        Args:
+            timeout: Seconds to wait for connections to close.
+        """
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = None
+            self._loop_thread = None
+        if loop is None or loop.is_closed():
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(
+                self.close_all(), loop
+            ).result(timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Error closing MCP connections: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=timeout)
+        if not loop.is_running():
+            loop.close()
 
     @property
     def config(self) -> Dict[str, Any]:
@@ -489,15 +585,7 @@ class MCPManager:
             return all_tools
 
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # We're in an async context, create a new task
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, _gather_tools())
-                    return future.result(timeout=60)
-            else:
-                return loop.run_until_complete(_gather_tools())
+            return self.run_sync(_gather_tools(), timeout=60)
         except Exception as e:
             logger.warning(f"Failed to get tools for {agent_name}: {e}")
             return []
@@ -544,6 +632,7 @@ class MCPManager:
 
 # Singleton instance
 _default_manager: Optional[MCPManager] = None
+_default_manager_lock = threading.Lock()
 
 
 def get_mcp_manager() -> MCPManager:
@@ -554,7 +643,9 @@ def get_mcp_manager() -> MCPManager:
     """
     global _default_manager
     if _default_manager is None:
-        _default_manager = MCPManager()
+        with _default_manager_lock:
+            if _default_manager is None:
+                _default_manager = MCPManager()
     return _default_manager
 
 
@@ -567,9 +658,7 @@ def reset_mcp_manager() -> None:
     if _default_manager is not None:
         # Try to cleanup connections
         try:
-            loop = asyncio.get_event_loop()
-            if not loop.is_running():
-                loop.run_until_complete(_default_manager.close_all())
+            _default_manager.shutdown()
         except Exception:
             pass
     _default_manager = None
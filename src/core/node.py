@@ -66,15 +66,24 @@ def agent_node(state: State, agent: Any, name: str) -> dict:
             "sender": name
         }
 
-def human_choice_node(state: State) -> dict:
+def human_choice_node(state: State, interactive: bool = True) -> dict:
     """Handle human input to choose the next step.
 
     Args:
         state: The current state of the workflow.
+        interactive: If False, continue the research process without prompting.
 
     Returns:
         A dictionary containing state updates based on user choice.
     """
+    if not interactive:
+        logger.info("Non-interactive run: continuing the research process")
+        return {
+            "messages": [HumanMessage(content="Continue the research process")],
+            "process": "Continue the research process",
+            "sender": "human"
+        }
+
     print("Please choose the next step:")
     print("1. Regenerate hypothesis")
     print("2. Continue the research process")
@@ -189,17 +198,22 @@ def _create_error_state(state: State, error_message: AIMessage, name: str, error
         }
     return error_state
 
-def human_review_node(state: State) -> dict:
+def human_review_node(state: State, interactive: bool = True) -> dict:
     """Display current state to the user and update the state based on user input.
 
     Includes error handling for robustness.
 
     Args:
         state: The current state of the workflow.
+        interactive: If False, end the research without prompting.
 
     Returns:
         A dictionary containing state updates representing the user's decision.
     """
+    if not interactive:
+        logger.info("Non-interactive run: ending the research after review")
+        return {"sender": "human", "needs_revision": False}
+
     try:
         print("Current research progress:")
         print(state)
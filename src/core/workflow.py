@@ -6,66 +6,113 @@ from .state import State
 from .node import agent_node, human_choice_node, note_agent_node, human_review_node, refiner_node
 from .router import QualityReview_router, hypothesis_router, process_router
 
-from ..agents.factory import AgentFactory
+from ..agents.factory import AgentFactory, LazyAgent, build_concurrently
+from ..logger import setup_logger
+
+logger = setup_logger(__name__)
 
 
 class WorkflowManager:
-    def __init__(self, lm_manager, working_directory):
+    # Agents in the order they are typically reached by the workflow
+    AGENT_NAMES = [
+        "hypothesis_agent",
+        "process_agent",
+        "visualization_agent",
+        "code_agent",
+        "search_agent",
+        "report_agent",
+        "quality_review_agent",
+        "note_agent",
+        "refiner_agent",
+    ]
+
+    def __init__(
+        self,
+        lm_manager,
+        working_directory,
+        lazy_agents=True,
+        prewarm=False,
+        parallel_build=False,
+        max_build_workers=None,
+    ):
         """
         Initialize the workflow manager with language model manager and working directory.
         
         Args:
             lm_manager: The LanguageModelManager instance
             working_directory (str): Path to the working directory
+            lazy_agents (bool): Build each agent on its first invocation instead of up front
+            prewarm (bool): Build all lazy agents right after the graph compiles,
+                useful for long-lived processes
+            parallel_build (bool): Build agents concurrently on a thread pool
+                when they are built up front (eager mode or prewarm)
+            max_build_workers (int | None): Thread pool size for parallel builds
         """
         self.lm_manager = lm_manager
         self.working_directory = working_directory
+        self.lazy_agents = lazy_agents
+        self.parallel_build = parallel_build
+        self.max_build_workers = max_build_workers
         self.workflow = None
         self.memory = None
         self.graph = None
         self.members = ["Hypothesis", "Process", "Visualization", "Search", "Coder", "Report", "QualityReview", "note", "Refiner"]
-        self.agents = self.create_agents()
-        self.setup_workflow()
-
-    def create_agents(self):
-        """Create all system agents"""
-        # Create agents dictionary
-        agents = {}
-
-        # Create agent factory
-        agent_factory = AgentFactory(
+        self.agent_factory = AgentFactory(
             language_model_manager=self.lm_manager,
             team_members=self.members,
             working_directory=self.working_directory
         )
+        self.agents = self.create_agents()
+        self.setup_workflow()
+        if prewarm:
+            self.prewarm()
 
-        # Create each agent using the factory
-        agents["hypothesis_agent"] = agent_factory.create_agent("hypothesis_agent")
-
-        agents["process_agent"] = agent_factory.create_agent("process_agent")
-
-        agents["visualization_agent"] = agent_factory.create_agent("visualization_agent")
-
-        agents["code_agent"] = agent_factory.create_agent("code_agent")
-
-        agents["search_agent"] = agent_factory.create_agent("search_agent")
-
-        agents["report_agent"] = agent_factory.create_agent("report_agent")
+    def create_agents(self):
+        """Create all system agents.
 
-        agents["quality_review_agent"] = agent_factory.create_agent("quality_review_agent")
+        With lazy_agents enabled each entry is a LazyAgent proxy that builds
+        the real agent the first time its node runs.
+        """
+        if not self.lazy_agents and self.parallel_build:
+            agents, errors = self.agent_factory.create_agents(
+                self.AGENT_NAMES, max_workers=self.max_build_workers
+            )
+            if errors:
+                failed = ", ".join(f"{name}: {e}" for name, e in errors.items())
+                raise RuntimeError(f"Failed to create agents: {failed}")
+            return {name: agents[name] for name in self.AGENT_NAMES}
 
-        agents["note_agent"] = agent_factory.create_agent("note_agent")
+        agents = {}
+        for agent_name in self.AGENT_NAMES:
+            if self.lazy_agents:
+                agents[agent_name] = self.agent_factory.create_lazy_agent(agent_name)
+            else:
+                agents[agent_name] = self.agent_factory.create_agent(agent_name)
+        return agents
 
-        agents["refiner_agent"] = agent_factory.create_agent("refiner_agent")
+    def prewarm(self):
+        """Build every agent that has not been materialized yet.
 
-        return agents
+        Agents that fail to build are logged and left lazy, so they are
+        retried on their first invocation.
+        """
+        pending = {
+            name: agent for name, agent in self.agents.items()
+            if isinstance(agent, LazyAgent) and not agent.is_built
+        }
+        if self.parallel_build:
+            build_concurrently(
+                {name: agent.get_agent for name, agent in pending.items()},
+                max_workers=self.max_build_workers,
+            )
+            return
+
+        for name, agent in pending.items():
+            try:
+                agent.get_agent()
+            except Exception as e:
+                logger.error(f"Failed to prewarm {name}: {e}")
 
-    def _create_model(self, agent_name: str):
-        """Create a model instance for the given agent."""
-        provider = self.lm_manager.get_provider(agent_name)
-        model_class = provider.get_model_class()
-        config = self.lm_manager.get_model_config(agent_name)
-        return model_class(**config)
     def setup_workflow(self):
         """Set up the workflow graph"""
         self.workflow = StateGraph(State)
@@ -83,6 +130,12 @@ class WorkflowManager:
             def action(state, config=None, store=None):
                 return refiner_node(cast(State, state), agent, name)
             return action
+        def _wrap_human(node):
+            # Runs started with {"configurable": {"interactive": False}} never prompt
+            def action(state, config=None, store=None):
+                interactive = (config or {}).get("configurable", {}).get("interactive", True)
+                return node(cast(State, state), interactive=interactive)
+            return action
 
         # Add nodes
         self.workflow.add_node("Hypothesis", _wrap_agent_node(self.agents["hypothesis_agent"], "hypothesis_agent"))
@@ -93,8 +146,8 @@ class WorkflowManager:
         self.workflow.add_node("Report", _wrap_agent_node(self.agents["report_agent"], "report_agent"))
         self.workflow.add_node("QualityReview", _wrap_agent_node(self.agents["quality_review_agent"], "quality_review_agent"))
         self.workflow.add_node("NoteTaker", _wrap_note_agent(self.agents["note_agent"], "note_agent"))
-        self.workflow.add_node("HumanChoice", human_choice_node)
-        self.workflow.add_node("HumanReview", human_review_node)
+        self.workflow.add_node("HumanChoice", _wrap_human(human_choice_node))
+        self.workflow.add_node("HumanReview", _wrap_human(human_review_node))
         self.workflow.add_node("Refiner", _wrap_refiner(self.agents["refiner_agent"], "refiner_agent"))
 
         # Add edges
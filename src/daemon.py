@@ -0,0 +1,413 @@
+"""Warm daemon that serves analysis jobs from one long-lived MultiAgentSystem.
+
+The system is built once at startup with every agent prewarmed, so model
+clients, MCP sessions and agent graphs stay hot between jobs. Jobs arrive
+over a local Unix socket or HTTP. Each job runs with its own thread_id and
+non-interactively (human nodes do not prompt), and node events are streamed
+back as newline-delimited JSON.
+
+Request (one JSON object):
+    {"input": "datapath:OnlineSalesData.csv\\n...", "thread_id": "optional-id"}
+
+Response events (one JSON object per line):
+    {"event": "start", "thread_id": "..."}
+    {"event": "node", "thread_id": "...", "node": "Hypothesis", "update": {...}}
+    {"event": "end", "thread_id": "...", "seconds": 12.3}
+    {"event": "error", "thread_id": "...", "error": "..."}
+
+Example:
+    python -m src.daemon --socket /tmp/datagen.sock
+    python -m src.daemon --http 127.0.0.1:8765
+
+    curl -N -X POST http://127.0.0.1:8765/jobs -d '{"input": "..."}'
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+import uuid
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Upper bound on a request body, to reject garbage early
+MAX_REQUEST_BYTES = 1024 * 1024
+
+Emit = Callable[[Dict[str, Any]], None]
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client stops reading the event stream."""
+
+
+def to_jsonable(obj: Any) -> Any:
+    """Convert workflow state updates into JSON-serializable values.
+
+    Args:
+        obj: A state update value (messages, pydantic models, containers).
+
+    Returns:
+        JSON-serializable representation.
+    """
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, dict):
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(v) for v in obj]
+    if hasattr(obj, "type") and hasattr(obj, "content"):
+        # langchain_core BaseMessage
+        return {
+            "type": obj.type,
+            "name": getattr(obj, "name", None),
+            "content": to_jsonable(obj.content),
+        }
+    if hasattr(obj, "model_dump"):
+        return to_jsonable(obj.model_dump())
+    return str(obj)
+
+
+class AnalysisDaemon:
+    """Owns the warm MultiAgentSystem and runs jobs against it.
+
+    Attributes:
+        system: The shared MultiAgentSystem.
+    """
+
+    def __init__(
+        self,
+        parallel_build: bool = True,
+        max_concurrent_jobs: Optional[int] = None,
+    ) -> None:
+        """Build the system and prewarm every agent.
+
+        Args:
+            parallel_build: Build agents concurrently at startup.
+            max_concurrent_jobs: Maximum jobs running at once. None = no limit.
+        """
+        from .system import MultiAgentSystem
+
+        start = time.perf_counter()
+        self.system = MultiAgentSystem(prewarm=True, parallel_build=parallel_build)
+        self._warm_sandbox_pool()
+        self._job_slots = (
+            threading.BoundedSemaphore(max_concurrent_jobs) if max_concurrent_jobs else None
+        )
+        self._active: Dict[str, float] = {}
+        self._active_lock = threading.Lock()
+        logger.info(f"Daemon ready in {time.perf_counter() - start:.2f}s")
+
+    @property
+    def active_jobs(self) -> List[str]:
+        """Thread ids of the jobs currently running."""
+        with self._active_lock:
+            return list(self._active)
+
+    def run_job(self, request: Dict[str, Any], emit: Emit) -> None:
+        """Run one analysis job and stream its events.
+
+        Args:
+            request: Job request with 'input' and optional 'thread_id'.
+            emit: Callback receiving each event dictionary.
+        """
+        thread_id = str(request.get("thread_id") or uuid.uuid4().hex)
+        user_input = request.get("input")
+        if not isinstance(user_input, str) or not user_input.strip():
+            emit({"event": "error", "thread_id": thread_id, "error": "Missing 'input'"})
+            return
+
+        with self._active_lock:
+            if thread_id in self._active:
+                emit({"event": "error", "thread_id": thread_id,
+                      "error": f"Job {thread_id} is already running"})
+                return
+            self._active[thread_id] = time.time()
+
+        try:
+            if self._job_slots is not None:
+                self._job_slots.acquire()
+            try:
+                self._stream_job(thread_id, user_input, emit)
+            finally:
+                if self._job_slots is not None:
+                    self._job_slots.release()
+        finally:
+            with self._active_lock:
+                self._active.pop(thread_id, None)
+
+    def _stream_job(self, thread_id: str, user_input: str, emit: Emit) -> None:
+        """Stream node updates of one job to the client."""
+        start = time.perf_counter()
+        logger.info(f"Starting job {thread_id}")
+        emit({"event": "start", "thread_id": thread_id})
+
+        events: Optional[Iterator[Any]] = None
+        try:
+            events = self.system.stream(
+                user_input,
+                thread_id=thread_id,
+                interactive=False,
+                stream_mode="updates",
+            )
+            for chunk in events:
+                for node, update in chunk.items():
+                    emit({
+                        "event": "node",
+                        "thread_id": thread_id,
+                        "node": node,
+                        "update": to_jsonable(update),
+                    })
+        except ClientDisconnected:
+            logger.warning(f"Client disconnected, stopping job {thread_id}")
+            return
+        except Exception as e:
+            logger.exception(f"Job {thread_id} failed")
+            emit({"event": "error", "thread_id": thread_id, "error": str(e)})
+            return
+        finally:
+            if events is not None and hasattr(events, "close"):
+                events.close()
+            self._release_kernel(thread_id)
+
+        seconds = time.perf_counter() - start
+        logger.info(f"Finished job {thread_id} in {seconds:.2f}s")
+        emit({"event": "end", "thread_id": thread_id, "seconds": round(seconds, 3)})
+
+    @staticmethod
+    def _warm_sandbox_pool() -> None:
+        """Start the execute_code sandbox templates before the first job."""
+        from .tools.sandbox import get_sandbox_pool
+
+        pool = get_sandbox_pool()
+        if pool is not None:
+            pool.warm()
+
+    @staticmethod
+    def _release_kernel(thread_id: str) -> None:
+        """Shut down the job's persistent and checkpoint kernels, if it started any."""
+        from .tools.incremental import get_checkpoint_kernel_manager
+        from .tools.kernel import get_kernel_manager
+
+        get_kernel_manager().shutdown(thread_id)
+        get_checkpoint_kernel_manager().shutdown(thread_id)
+
+    def close(self) -> None:
+        """Release model clients, MCP sessions and kernels."""
+        self.system.close()
+
+
+def _parse_request(raw: bytes) -> Dict[str, Any]:
+    """Decode a JSON job request."""
+    request = json.loads(raw.decode("utf-8"))
+    if not isinstance(request, dict):
+        raise ValueError("Request must be a JSON object")
+    return request
+
+
+class _UnixJobHandler(socketserver.StreamRequestHandler):
+    """One JSON request line in, JSON event lines out."""
+
+    def handle(self) -> None:
+        daemon: AnalysisDaemon = self.server.analysis_daemon
+
+        def emit(event: Dict[str, Any]) -> None:
+            try:
+                self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            except OSError as e:
+                raise ClientDisconnected() from e
+
+        try:
+            request = _parse_request(self.rfile.readline(MAX_REQUEST_BYTES))
+        except ValueError as e:
+            emit({"event": "error", "error": f"Invalid request: {e}"})
+            return
+        daemon.run_job(request, emit)
+
+
+class _UnixJobServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _HttpJobHandler(BaseHTTPRequestHandler):
+    """POST /jobs streams NDJSON events; GET /health reports status."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        daemon: AnalysisDaemon = self.server.analysis_daemon
+        body = json.dumps({"status": "ok", "active_jobs": daemon.active_jobs}).encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        if self.path != "/jobs":
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_REQUEST_BYTES:
+            self.send_error(HTTPStatus.BAD_REQUEST, "Missing or oversized request body")
+            return
+        try:
+            request = _parse_request(self.rfile.read(length))
+        except ValueError as e:
+            self.send_error(HTTPStatus.BAD_REQUEST, f"Invalid request: {e}")
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def emit(event: Dict[str, Any]) -> None:
+            data = (json.dumps(event) + "\n").encode("utf-8")
+            try:
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+            except OSError as e:
+                raise ClientDisconnected() from e
+
+        daemon: AnalysisDaemon = self.server.analysis_daemon
+        daemon.run_job(request, emit)
+        try:
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except OSError:
+            pass
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"HTTP {self.address_string()} {format % args}")
+
+
+def create_server(
+    daemon: AnalysisDaemon,
+    socket_path: Optional[str] = None,
+    http_address: Optional[str] = None,
+) -> socketserver.BaseServer:
+    """Create the job server for the chosen transport.
+
+    Args:
+        daemon: The daemon that runs jobs.
+        socket_path: Path of the Unix socket to listen on.
+        http_address: HOST:PORT to listen on for HTTP.
+
+    Returns:
+        A server ready for serve_forever().
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = _UnixJobServer(socket_path, _UnixJobHandler)
+        os.chmod(socket_path, 0o600)
+        logger.info(f"Listening on unix socket {socket_path}")
+    elif http_address:
+        host, _, port = http_address.rpartition(":")
+        server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), _HttpJobHandler)
+        server.daemon_threads = True
+        logger.info(f"Listening on http://{host or '127.0.0.1'}:{port}")
+    else:
+        raise ValueError("Either socket_path or http_address is required")
+
+    server.analysis_daemon = daemon
+    return server
+
+
+def iter_socket_job(
+    socket_path: str,
+    user_input: str,
+    thread_id: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Submit a job to a daemon over its Unix socket and yield its events.
+
+    Args:
+        socket_path: Path of the daemon's Unix socket.
+        user_input: The analysis request.
+        thread_id: Optional run identifier.
+
+    Returns:
+        Iterator over event dictionaries.
+    """
+    request = {"input": user_input, "thread_id": thread_id}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with sock.makefile("r", encoding="utf-8") as stream:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def serve(
+    socket_path: Optional[str] = None,
+    http_address: Optional[str] = None,
+    parallel_build: bool = True,
+    max_concurrent_jobs: Optional[int] = None,
+) -> None:
+    """Build the warm system and serve jobs until SIGINT/SIGTERM."""
+    daemon = AnalysisDaemon(
+        parallel_build=parallel_build,
+        max_concurrent_jobs=max_concurrent_jobs,
+    )
+    server = create_server(daemon, socket_path=socket_path, http_address=http_address)
+
+    def stop(signum, frame):
+        logger.info(f"Received signal {signum}, shutting down")
+        # shutdown() blocks until serve_forever() returns, so call it elsewhere
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+        daemon.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.daemon",
+        description="Serve analysis jobs from a warm, long-lived MultiAgentSystem.",
+    )
+    transport = parser.add_mutually_exclusive_group(required=True)
+    transport.add_argument("--socket", metavar="PATH", help="Listen on a Unix socket")
+    transport.add_argument("--http", metavar="HOST:PORT", help="Listen on HTTP")
+    parser.add_argument("--max-jobs", type=int, default=None,
+                        help="Maximum number of jobs running at once")
+    parser.add_argument("--sequential-build", action="store_true",
+                        help="Build agents one at a time at startup")
+    args = parser.parse_args(argv)
+
+    serve(
+        socket_path=args.socket,
+        http_address=args.http,
+        parallel_build=not args.sequential_build,
+        max_concurrent_jobs=args.max_jobs,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,59 @@
-from .openai import OpenAIProvider
-from .anthropic import AnthropicProvider
-from .google import GoogleProvider
-from .ollama import OllamaProvider
-from .azure import AzureChatOpenAIProvider
-from .groq import ChatGroqProvider
+import importlib
+import threading
+from importlib.metadata import entry_points
+from typing import Any, Dict, Type, Union
+
+from .base import BaseProvider
+
+# Entry point group third-party packages use to register providers, e.g.
+#   [project.entry-points."datagen.llm_providers"]
+#   my_provider = "my_package.provider:MyProvider"
+ENTRY_POINT_GROUP = "datagen.llm_providers"
+
+# A registry target: "module:ClassName" (imported on first use), a provider
+# class, or an importlib.metadata.EntryPoint
+ProviderTarget = Union[str, Type[BaseProvider], Any]
 
 
 class ProviderFactory:
-    """A factory class for creating LLM providers."""
+    """A factory class for creating LLM providers.
+
+    Providers are registered by import path and only imported when first
+    requested, so the SDK of a provider that no agent uses is never loaded.
+    """
+
+    _registry: Dict[str, ProviderTarget] = {
+        "openai": ".openai:OpenAIProvider",
+        "anthropic": ".anthropic:AnthropicProvider",
+        "google": ".google:GoogleProvider",
+        "ollama": ".ollama:OllamaProvider",
+        "azure": ".azure:AzureChatOpenAIProvider",
+        "groq": ".groq:ChatGroqProvider",
+    }
+    _entry_points_loaded = False
+    _registry_lock = threading.Lock()
+
+    def __init__(self):
+        """Initialize the factory with an empty provider cache."""
+        self._providers = {}
+
+    @classmethod
+    def register_provider(cls, provider_name: str, provider: ProviderTarget) -> None:
+        """
+        Registers a provider under the given name.
+
+        Args:
+            provider_name: The name used as `provider` in agent_models.yaml.
+            provider: A BaseProvider subclass or a "module:ClassName" import path.
+        """
+        with cls._registry_lock:
+            cls._registry[provider_name] = provider
+
+    @classmethod
+    def available_providers(cls) -> list:
+        """List registered provider names, including entry point providers."""
+        cls._load_entry_points()
+        return list(cls._registry.keys())
 
     def create_provider(self, provider_name: str, **kwargs):
         """
@@ -18,22 +64,48 @@ class ProviderFactory:
             **kwargs: Additional keyword arguments for provider configuration.
 
         Returns:
-            An instance of the requested provider.
+            An instance of the requested provider. Providers are stateless,
+            so one instance per name is cached and reused.
 
         Raises:
             NotImplementedError: If the provider creation is not implemented.
         """
-        if provider_name == "openai":
-            return OpenAIProvider()
-        elif provider_name == "anthropic":
-            return AnthropicProvider()
-        elif provider_name == "google":
-            return GoogleProvider()
-        elif provider_name == "ollama":
-            return OllamaProvider()
-        elif provider_name == "azure":
-            return AzureChatOpenAIProvider()
-        elif provider_name == "groq":
-            return ChatGroqProvider()
-        else:
-            raise NotImplementedError(f"Provider creation for '{provider_name}' is not implemented.")
\ No newline at end of file
+        if provider_name not in self._providers:
+            self._providers[provider_name] = self._build_provider(provider_name)
+        return self._providers[provider_name]
+
+    def _build_provider(self, provider_name: str):
+        """Import and instantiate the provider for the given name."""
+        target = self._registry.get(provider_name)
+        if target is None:
+            self._load_entry_points()
+            target = self._registry.get(provider_name)
+        if target is None:
+            raise NotImplementedError(f"Provider creation for '{provider_name}' is not implemented.")
+
+        return self._resolve(target)()
+
+    @staticmethod
+    def _resolve(target: ProviderTarget) -> Type[BaseProvider]:
+        """Turn a registry target into a provider class."""
+        if isinstance(target, str):
+            module_path, _, class_name = target.partition(":")
+            module = importlib.import_module(module_path, __package__)
+            return getattr(module, class_name)
+        if isinstance(target, type):
+            return target
+        # importlib.metadata.EntryPoint
+        return target.load()
+
+    @classmethod
+    def _load_entry_points(cls) -> None:
+        """Register providers advertised by installed packages (once)."""
+        if cls._entry_points_loaded:
+            return
+        with cls._registry_lock:
+            if cls._entry_points_loaded:
+                return
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                # Built-in providers take precedence over entry points
+                cls._registry.setdefault(entry_point.name, entry_point)
+            cls._entry_points_loaded = True
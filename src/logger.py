@@ -1,29 +1,152 @@
+"""Centralized, non-blocking logging.
+
+Logging is configured once for the whole package. Loggers only push records
+onto an in-memory queue (QueueHandler); a background QueueListener thread
+does the actual console and file I/O, so log calls on hot paths never wait
+on disk. The log file rotates by size, and individual modules can be given
+their own levels.
+
+Settings come from src.config (LOG_FILE, LOG_LEVEL, LOG_CONSOLE_LEVEL,
+LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_LEVELS).
+
+Example:
+    from ..logger import setup_logger
+
+    logger = setup_logger(__name__)
+    logger.info("Ready")
+"""
+
+import atexit
 import logging
+import logging.handlers
+import queue
+import threading
+from typing import Dict, Optional
+
+# Package logger that every module logger propagates to
+ROOT_LOGGER_NAME = __name__.rpartition(".")[0] or __name__
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+def parse_module_levels(spec: str) -> Dict[str, str]:
+    """Parse per-module levels from 'module=LEVEL,module=LEVEL'.
+
+    Args:
+        spec: Comma-separated module=LEVEL pairs.
+
+    Returns:
+        Mapping of logger name to level name.
+    """
+    levels = {}
+    for item in spec.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(
+    log_file: Optional[str] = None,
+    level: Optional[str] = None,
+    console_level: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    backup_count: Optional[int] = None,
+    module_levels: Optional[Dict[str, str]] = None,
+    force: bool = False,
+) -> logging.Logger:
+    """Configure package logging once.
+
+    Arguments left as None fall back to the settings in src.config.
+    Later calls are no-ops unless force=True.
+
+    Args:
+        log_file: Path of the rotating log file.
+        level: Level of the package logger.
+        console_level: Minimum level written to the console.
+        max_bytes: Rotate the log file after this many bytes.
+        backup_count: Number of rotated files to keep.
+        module_levels: Per-module levels, e.g. {"src.tools.security": "WARNING"}.
+        force: Reconfigure even if logging is already set up.
+
+    Returns:
+        The package root logger.
+    """
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+
+    with _configure_lock:
+        if _listener is not None and not force:
+            return root
+
+        from . import config
+
+        if _listener is not None:
+            _listener.stop()
+
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file or config.LOG_FILE,
+            maxBytes=max_bytes if max_bytes is not None else config.LOG_MAX_BYTES,
+            backupCount=backup_count if backup_count is not None else config.LOG_BACKUP_COUNT,
+            encoding='utf-8',
+        )
+        file_handler.setLevel(logging.DEBUG)
+
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(console_level or config.LOG_CONSOLE_LEVEL)
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        file_handler.setFormatter(formatter)
+        console_handler.setFormatter(formatter)
+
+        # Loggers only enqueue; the listener thread does the I/O
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(
+            log_queue,
+            file_handler,
+            console_handler,
+            respect_handler_level=True,
+        )
+        _listener.start()
+
+        root.handlers.clear()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        root.setLevel(level or config.LOG_LEVEL)
+        root.propagate = False
+
+        levels = module_levels if module_levels is not None else parse_module_levels(config.LOG_LEVELS)
+        for name, module_level in levels.items():
+            logging.getLogger(name).setLevel(module_level)
+
+    return root
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background listener."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def setup_logger(name: Optional[str] = None) -> logging.Logger:
+    """Get a logger, configuring package logging on first use.
+
+    Args:
+        name: Logger name, normally the calling module's __name__.
+            Defaults to the package root logger.
 
-# Configure logging
-def setup_logger(log_file:str='agent.log'):
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.DEBUG)
-    
-    # Remove any existing handlers to prevent duplicates
-    if logger.hasHandlers():
-        logger.handlers.clear()
-
-    # File handler
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.DEBUG)
-
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-
-    # Formatter
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-
-    # Add handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-
-    return logger
+    Returns:
+        Logger whose records go through the shared queue.
+    """
+    configure_logging()
+    return logging.getLogger(name or ROOT_LOGGER_NAME)
@@ -1,18 +1,27 @@
 import os
-from typing import Dict, Any
+from typing import Any, Dict, Iterator
 from . import config, logger
 from langchain_core.messages import HumanMessage
 
 from .core import WorkflowManager, LanguageModelManager
 
 class MultiAgentSystem:
-    def __init__(self):
-        self.logger = logger.setup_logger()
+    def __init__(self, prewarm: bool = False, parallel_build: bool = False):
+        """Initialize the multi-agent system.
+
+        Args:
+            prewarm: Build all agents up front instead of on first use.
+                Useful for long-lived processes.
+            parallel_build: Build agents concurrently when building up front.
+        """
+        self.logger = logger.setup_logger(__name__)
         self.setup_environment()
         self.lm_manager = LanguageModelManager()
         self.workflow_manager = WorkflowManager(
             lm_manager=self.lm_manager,
-            working_directory=config.WORKING_DIRECTORY
+            working_directory=config.WORKING_DIRECTORY,
+            prewarm=prewarm,
+            parallel_build=parallel_build
         )
 
     def setup_environment(self):
@@ -26,31 +35,71 @@ class MultiAgentSystem:
             os.makedirs(config.WORKING_DIRECTORY)
             self.logger.info(f"Created working directory: {config.WORKING_DIRECTORY}")
 
-    def run(self, user_input: str) -> None:
-        """Run the multi-agent system with user input"""
+    def close(self) -> None:
+        """Release pooled model clients, MCP server connections and sandboxes."""
+        from .core.mcp_manager import reset_mcp_manager
+        from .tools.incremental import reset_checkpoint_kernel_manager
+        from .tools.kernel import reset_kernel_manager
+        from .tools.sandbox import reset_sandbox_pool
+
+        self.lm_manager.close()
+        reset_mcp_manager()
+        reset_kernel_manager()
+        reset_checkpoint_kernel_manager()
+        reset_sandbox_pool()
+
+    def initial_state(self, user_input: str) -> Dict[str, Any]:
+        """Build the initial workflow state for a user request."""
+        return {
+            "messages": [HumanMessage(content=user_input)],
+            "hypothesis": "",
+            "process_decision": "",
+            "process": "",
+            "visualization_state": "",
+            "searcher_state": "",
+            "code_state": "",
+            "report_section": "",
+            "quality_review": "",
+            "needs_revision": False,
+            "last_sender": "",
+        }
+
+    def stream(
+        self,
+        user_input: str,
+        thread_id: str = "1",
+        interactive: bool = True,
+        stream_mode: str = "values",
+    ) -> Iterator[Any]:
+        """Stream workflow events for a user request.
+
+        Args:
+            user_input: The analysis request.
+            thread_id: Identifier of this run.
+            interactive: Whether human nodes prompt on stdin.
+            stream_mode: LangGraph stream mode ("values" or "updates").
+
+        Returns:
+            Iterator over workflow events.
+        """
         graph = self.workflow_manager.get_graph()
-        events = graph.stream(
+        return graph.stream(
+            self.initial_state(user_input),
             {
-                "messages": [HumanMessage(content=user_input)],
-                "hypothesis": "",
-                "process_decision": "",
-                "process": "",
-                "visualization_state": "",
-                "searcher_state": "",
-                "code_state": "",
-                "report_section": "",
-                "quality_review": "",
-                "needs_revision": False,
-                "last_sender": "",
+                "configurable": {"thread_id": thread_id, "interactive": interactive},
+                "recursion_limit": 3000,
             },
-            {"configurable": {"thread_id": "1"}, "recursion_limit": 3000},
-            stream_mode="values",
+            stream_mode=stream_mode,
             debug=False
         )
+
+    def run(self, user_input: str) -> None:
+        """Run the multi-agent system with user input"""
+        events = self.stream(user_input)
         
         for event in events:
             message = event["messages"][-1]
             if isinstance(message, tuple):
                 print(message, end='', flush=True)
             else:
-                message.pretty_print()
\ No newline at end of file
+                message.pretty_print()
@@ -9,7 +9,7 @@ from ..logger import setup_logger
 from ..config import WORKING_DIRECTORY
 
 # Set up logger
-logger = setup_logger()
+logger = setup_logger(__name__)
 
 # Ensure the working directory exists
 if not os.path.exists(WORKING_DIRECTORY):
@@ -35,29 +35,136 @@ def collect_data(
     data_path: Annotated[str, "Path to the CSV file"] = './data.csv',
     nrows: Annotated[int | None, "Number of rows to read"] = None,
     usecols: Annotated[list[str] | None, "List of column names to read"] = None,
-    skiprows: Annotated[int | None, "Number of rows to skip at the beginning"] = None
-) -> Annotated[pd.DataFrame, "The collected data from the CSV file"]:
+    skiprows: Annotated[int | None, "Number of rows to skip at the beginning"] = None,
+    streaming: Annotated[bool | None, "Return a row sample and column statistics instead of all rows (default: only if the selection does not fit in memory)"] = None,
+    header: Annotated[bool | None, "Whether the first row holds column names (default: detected)"] = None
+) -> Annotated[pd.DataFrame | dict, "The collected data, or a sample with statistics if streamed"]:
     """
     Collect data from a CSV file with selective reading options.
+
+    Encoding, delimiter, quoting and header are detected once from the start
+    of the file (and remembered while the file is unchanged), then the file
+    is parsed in a single pass. Pass header to correct a wrong header guess;
+    the correction is remembered like the detection.
+
+    With the dataset cache, the first full read also stores the file in
+    columnar form; later reads load only the requested columns and rows
+    from it. A partial read of an uncached file starts the conversion in
+    the background.
+
+    Selections estimated to exceed data_collection.max_memory_mb are streamed
+    in bounded chunks; the result is then a dict with the number of rows, a
+    per-column summary and a uniform sample of rows.
     """
+    from .csv_dialect import override_header, read_csv
+    from .data_stream import collect_streaming, estimate_memory_bytes
+    from .dataset_cache import get_dataset_cache
+    from .tool_config import TOOL_CONFIG
+
     data_path = normalize_path(data_path)
     logger.info(f"Attempting to read CSV file: {data_path}")
-    encodings = ['utf-8', 'latin1', 'iso-8859-1', 'cp1252']
-    for encoding in encodings:
-        try:
-            data = pd.read_csv(
+    settings = TOOL_CONFIG.data_collection
+    budget = settings.max_memory_mb * 1024 * 1024
+    try:
+        if header is not None:
+            override_header(data_path, header)
+        if streaming is None:
+            streaming = estimate_memory_bytes(data_path, usecols=usecols, nrows=nrows) > budget
+        if streaming:
+            return collect_streaming(
                 data_path,
-                encoding=encoding,
-                nrows=nrows,
                 usecols=usecols,
-                skiprows=skiprows
+                nrows=nrows,
+                skiprows=skiprows,
+                max_memory_mb=settings.max_memory_mb,
+                sample_rows=settings.sample_rows,
             )
-            logger.info(f"Successfully read CSV file with encoding: {encoding}")
-            return data
-        except Exception as e:
-            logger.warning(f"Error with encoding {encoding}: {e}")
-    logger.error("Unable to read file with provided encodings")
-    raise ValueError("Unable to read file with provided encodings")
+
+        # skiprows shifts the header row, which the columnar copy cannot reproduce
+        cache = get_dataset_cache() if skiprows is None else None
+        if cache is not None:
+            data = cache.read(data_path, usecols=usecols, nrows=nrows)
+            if data is not None:
+                return data
+            if nrows is None and estimate_memory_bytes(data_path) <= budget:
+                data = read_csv(data_path)
+                cache.store(data_path, data)
+                if usecols is not None:
+                    data = data[[column for column in data.columns if column in usecols]]
+                return data
+            cache.convert_in_background(data_path)
+        return read_csv(data_path, nrows=nrows, usecols=usecols, skiprows=skiprows)
+    except (OSError, UnicodeDecodeError) as e:
+        logger.error(f"Unable to read file: {e}")
+        raise ValueError(f"Unable to read file {data_path}: {e}")
+
+@tool
+def dataset_path(
+    data_path: Annotated[str, "Path to the CSV file"],
+) -> Annotated[str, "Path of the columnar copy, or a note that the CSV must be read directly"]:
+    """
+    Get a fast columnar (Arrow IPC) copy of a CSV file for use in scripts.
+
+    Converts the file on first use. In code, read it with
+    pd.read_feather(path, columns=[...]) instead of pd.read_csv: only the
+    requested columns are loaded and no text is parsed.
+    """
+    from .dataset_cache import cached_dataset_path
+
+    data_path = normalize_path(data_path)
+    try:
+        path = cached_dataset_path(data_path)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        logger.error(f"Unable to convert {data_path}: {e}")
+        return f"Unable to read {data_path}: {e}"
+    if path is None:
+        return f"No columnar copy available for {data_path}; read the CSV file directly."
+    return path
+
+@tool
+def profile_data(
+    data_path: Annotated[str, "Path to the CSV file"] = './data.csv',
+    columns: Annotated[list[str] | None, "Columns to summarize (default: all)"] = None
+) -> Annotated[str, "Compact per-column summary of the data"]:
+    """
+    Summarize what a CSV file looks like without loading it into the conversation.
+
+    Reports the row count and, per column, dtype, null rate, approximate
+    distinct count, min/max and quantiles of numeric columns, and the most
+    frequent values. Computed in one streaming pass and reused while the
+    file is unchanged; prefer this over collect_data to explore a dataset.
+    """
+    from .data_profile import profile_file, summarize
+
+    data_path = normalize_path(data_path)
+    try:
+        return summarize(profile_file(data_path), columns)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        logger.error(f"Unable to profile {data_path}: {e}")
+        return f"Unable to profile {data_path}: {e}"
+
+@tool
+def query_data(
+    query: Annotated[str, "A single SQL SELECT statement (DuckDB dialect)"],
+    max_rows: Annotated[int | None, "Maximum rows to return"] = None
+) -> Annotated[str, "Query result as a table"]:
+    """
+    Run a SQL query against the CSV and Parquet files in the working directory.
+
+    Each CSV/Parquet file in the working directory is a table named after the
+    file (sales.csv -> sales); other files can be queried by relative path,
+    e.g. FROM 'data/2024.csv'. Only the columns and rows the query needs are
+    read, so filter and aggregate in SQL rather than fetching raw rows:
+    SELECT date_trunc('month', date) AS month, sum(amount) FROM sales
+    WHERE region = 'EU' GROUP BY 1 ORDER BY 1
+    """
+    from .data_query import QueryError, run_query
+
+    try:
+        return run_query(query, max_rows)
+    except QueryError as e:
+        logger.warning(f"Query rejected or failed: {e}")
+        return f"Error: {e}"
 
 @tool
 def create_document(
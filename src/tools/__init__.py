@@ -1,14 +1,28 @@
-from .basetool import execute_code, execute_command
-from .FileEdit import create_document, read_document, edit_document, collect_data
-from .internet import google_search, scrape_webpages
-
-__all__ = [
-    "execute_code",
-    "execute_command",
-    "create_document",
-    "read_document",
-    "edit_document",
-    "collect_data",
-    "google_search",
-    "scrape_webpages",
-]
\ No newline at end of file
+import importlib
+
+# Tools are resolved lazily so that importing the package does not pull in
+# pandas, selenium or langchain_community loaders until a tool is used.
+_TOOL_MODULES = {
+    "execute_code": ".basetool",
+    "execute_code_batch": ".basetool",
+    "execute_command": ".basetool",
+    "restart_kernel": ".basetool",
+    "create_document": ".FileEdit",
+    "read_document": ".FileEdit",
+    "edit_document": ".FileEdit",
+    "collect_data": ".FileEdit",
+    "dataset_path": ".FileEdit",
+    "profile_data": ".FileEdit",
+    "query_data": ".FileEdit",
+    "google_search": ".internet",
+    "scrape_webpages": ".internet",
+}
+
+__all__ = list(_TOOL_MODULES)
+
+
+def __getattr__(name):
+    module = _TOOL_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
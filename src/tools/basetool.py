@@ -1,14 +1,22 @@
+import asyncio
 import os
 import platform
+import time
 from typing import Annotated
 import subprocess
-from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool, tool
+from pydantic import BaseModel, Field
 
 from ..logger import setup_logger
-from ..config import WORKING_DIRECTORY,CONDA_ENV
+from ..config import WORKING_DIRECTORY,CONDA_ENV,CONDA_DIRECT_EXEC
+from .conda_env import resolve_conda_env
 
 # Initialize logger
-logger = setup_logger()
+logger = setup_logger(__name__)
+
+# Full stdout/stderr of executions whose output was truncated
+EXECUTION_LOG_DIRECTORY = os.path.join(WORKING_DIRECTORY, "execution_logs")
 
 # Ensure the storage directory exists
 if not os.path.exists(WORKING_DIRECTORY):
@@ -29,13 +37,51 @@ def get_platform_specific_command(command: str) -> tuple:
         return (conda_command, True, "/bin/bash")
 
 
-@tool
-def execute_code(
+def get_python_command(script_path: str) -> tuple:
+    """
+    Get the command that runs a Python script in the conda environment.
+
+    Uses the resolved interpreter directly when possible, otherwise falls back
+    to `conda run`.
+    Returns a tuple of (command, shell_type, executable, env)
+    """
+    conda_env = resolve_conda_env(CONDA_ENV) if CONDA_DIRECT_EXEC else None
+    if conda_env is not None:
+        return ([conda_env.python, script_path], False, None, conda_env.environ)
+    return (*get_platform_specific_command(f'python "{script_path}"'), None)
+
+
+def get_shell_command(command: str) -> tuple:
+    """
+    Get the shell command that runs inside the conda environment.
+
+    Uses the resolved activation environment (PATH etc.) when possible,
+    otherwise falls back to `conda run`.
+    Returns a tuple of (command, shell_type, executable, env)
+    """
+    conda_env = resolve_conda_env(CONDA_ENV) if CONDA_DIRECT_EXEC else None
+    if conda_env is not None:
+        executable = None if platform.system().lower() == "windows" else "/bin/bash"
+        return (command, True, executable, conda_env.environ)
+    return (*get_platform_specific_command(command), None)
+
+
+def get_thread_id(config: RunnableConfig | None) -> str:
+    """Get the run's thread_id from a tool's RunnableConfig."""
+    configurable = (config or {}).get("configurable") or {}
+    return str(configurable.get("thread_id", "default"))
+
+
+def _execute_code(
     input_code: Annotated[str, "The Python code to execute."],
     codefile_name: Annotated[str, "The Python code file name or full path."] = 'code.py',
     timeout: Annotated[int | None, "Execution timeout in seconds. None = no limit."] = None,
     memory_mb: Annotated[int | None, "Memory limit in MB (Linux only). None = no limit."] = None,
     progress_timeout: Annotated[int | None, "Timeout only if no output for N seconds. Good for ML/DL."] = None,
+    stateful: Annotated[bool | None, "Keep variables, imports and loaded data between calls. None = config default."] = None,
+    use_cache: Annotated[bool | None, "Reuse the result of an identical earlier run. None = config default; False forces execution."] = None,
+    incremental: Annotated[bool | None, "Split into cells (# %%) and rerun only from the first changed cell. None = config default."] = None,
+    config: RunnableConfig = None,
 ) -> Annotated[dict, "Execution result including output and file path"]:
     """
     Execute Python code in a specified conda environment and return the result.
@@ -48,113 +94,621 @@ def execute_code(
     - Optional timeout and memory limits
     - Output is truncated if too large
 
+    In stateful mode the code runs in a persistent kernel owned by the current
+    run, so variables, imports and loaded DataFrames from earlier calls are
+    still available.
+
+    With the execution cache, resubmitting identical code against unchanged
+    input files returns the earlier output and restores the files it produced
+    without running it again (stateless mode only).
+
+    In incremental mode the script is split into cells (`# %%` lines, or
+    blank-line separated top-level statements). Cells unchanged since the
+    previous incremental run of this run's thread are not run again: the
+    interpreter resumes from a checkpoint taken after them and their earlier
+    output is replayed. The result lists the reused and executed cells.
+
     Args:
         input_code: The Python code to execute.
         codefile_name: File name to save the code (default: code.py).
         timeout: Fixed timeout in seconds. None = no limit.
         memory_mb: Memory limit in MB (Linux only). None = no limit.
         progress_timeout: Timeout only if no stdout for N seconds (for long-running ML/DL).
+        stateful: Run in the run's persistent kernel. None = TOOL_CONFIG.kernel.enabled.
+        use_cache: Use the execution cache. None = TOOL_CONFIG.execution_cache.enabled.
+        incremental: Resume from checkpoints of unchanged cells.
+            None = TOOL_CONFIG.incremental_execution.enabled.
+        config: Injected run config; its thread_id selects the kernel.
 
     Returns:
         Dictionary with result status, output/error, and file path.
     """
+    from .execution_cache import track_execution
     from .tool_config import TOOL_CONFIG
-    from .security import SecurityScanner, ResourceLimiter
 
     code_file_path = None
     try:
-        # === SECURITY SCAN ===
-        if TOOL_CONFIG.enable_security_scan:
-            scan_result = SecurityScanner.scan_code(input_code)
-            if not scan_result.is_safe:
-                logger.warning(f"Security scan blocked code: {scan_result.violations}")
+        code_file_path, limiter, error = _prepare_execution(
+            input_code, codefile_name, timeout, memory_mb, progress_timeout
+        )
+        if error is not None:
+            return error
+
+        with track_execution() as tracked:
+            if stateful is None:
+                stateful = TOOL_CONFIG.kernel.enabled
+            if stateful:
+                kernel_result = _execute_in_kernel(limiter, input_code, code_file_path, get_thread_id(config))
+                if kernel_result is not None:
+                    return kernel_result
+
+            if incremental is None:
+                incremental = TOOL_CONFIG.incremental_execution.enabled
+            if incremental:
+                kernel_result = _execute_in_kernel(
+                    limiter, input_code, code_file_path, get_thread_id(config), incremental=True
+                )
+                if kernel_result is not None:
+                    return kernel_result
+
+            if use_cache is None:
+                use_cache = TOOL_CONFIG.execution_cache.enabled
+            if use_cache and tracked.overlapped:
+                logger.info("Not using the execution cache: other executions are running")
+                use_cache = False
+            cache_key = snapshot = None
+            if use_cache:
+                cached, cache_key, snapshot = _lookup_cached_run(input_code, code_file_path)
+                if cached is not None:
+                    return cached
+
+            try:
+                result = _run_script(limiter, os.path.abspath(code_file_path))
+            except TimeoutError as e:
+                logger.error(f"Execution timeout: {e}")
                 return {
-                    "result": "Security violation",
-                    "error": f"Code blocked: {'; '.join(scan_result.violations)}",
-                    "file_path": None
+                    "result": "Timeout",
+                    "error": str(e),
+                    "file_path": code_file_path
                 }
-            if scan_result.warnings:
-                logger.info(f"Security scan warnings: {scan_result.warnings}")
 
-        # Ensure WORKING_DIRECTORY exists
-        os.makedirs(WORKING_DIRECTORY, exist_ok=True)
-        
-        # Handle codefile_name, ensuring it's a valid path
-        if os.path.isabs(codefile_name):
-            code_file_path = codefile_name
-        else:
-            if WORKING_DIRECTORY not in codefile_name:
-                code_file_path = os.path.join(WORKING_DIRECTORY, codefile_name)
-            else:
-                code_file_path = codefile_name
+            if cache_key is not None and result.returncode == 0:
+                _store_cached_run(cache_key, result, snapshot, code_file_path, tracked)
+            return _execution_result(result, code_file_path)
+    except Exception as e:
+        logger.exception("An error occurred while executing code")
+        return {
+            "result": "Error occurred",
+            "error": str(e),
+            "file_path": code_file_path if 'code_file_path' in locals() else "Unknown"
+        }
 
-        # Normalize the path for the current platform
-        code_file_path = os.path.normpath(code_file_path)
 
-        logger.info(f"Code will be written to file: {code_file_path}")
-        
-        # Write the code to the file with UTF-8 encoding
-        with open(code_file_path, 'w', encoding='utf-8') as code_file:
-            code_file.write(input_code)
-        
-        logger.info(f"Code has been written to file: {code_file_path}")
-        
-        # Get platform-specific command
-        python_cmd = f"python {codefile_name}"
-        full_command, shell, executable = get_platform_specific_command(python_cmd)
-        
-        logger.info(f"Executing command: {full_command}")
-        
-        # === EXECUTE WITH RESOURCE LIMITS ===
-        limiter = ResourceLimiter(
-            timeout=timeout,
-            memory_mb=memory_mb,
-            progress_timeout=progress_timeout,
+async def _aexecute_code(
+    input_code: str,
+    codefile_name: str = 'code.py',
+    timeout: int | None = None,
+    memory_mb: int | None = None,
+    progress_timeout: int | None = None,
+    stateful: bool | None = None,
+    use_cache: bool | None = None,
+    incremental: bool | None = None,
+    config: RunnableConfig = None,
+) -> dict:
+    """
+    Async execute_code: same checks, limits and result as the sync version.
+
+    The script runs as an asyncio subprocess on the caller's event loop, so
+    concurrent calls need no thread each. Cancelling the awaiting task kills
+    the script (or interrupts the kernel cell).
+    """
+    from .execution_cache import track_execution
+    from .tool_config import TOOL_CONFIG
+
+    code_file_path = None
+    try:
+        code_file_path, limiter, error = _prepare_execution(
+            input_code, codefile_name, timeout, memory_mb, progress_timeout
         )
-        
-        try:
-            result = limiter.execute(
-                command=full_command,
-                cwd=WORKING_DIRECTORY,
-                shell=shell,
-                executable=executable,
+        if error is not None:
+            return error
+
+        with track_execution() as tracked:
+            if stateful is None:
+                stateful = TOOL_CONFIG.kernel.enabled
+            if stateful:
+                kernel_result = await _aexecute_in_kernel(limiter, input_code, code_file_path, get_thread_id(config))
+                if kernel_result is not None:
+                    return kernel_result
+
+            if incremental is None:
+                incremental = TOOL_CONFIG.incremental_execution.enabled
+            if incremental:
+                kernel_result = await _aexecute_in_kernel(
+                    limiter, input_code, code_file_path, get_thread_id(config), incremental=True
+                )
+                if kernel_result is not None:
+                    return kernel_result
+
+            if use_cache is None:
+                use_cache = TOOL_CONFIG.execution_cache.enabled
+            if use_cache and tracked.overlapped:
+                logger.info("Not using the execution cache: other executions are running")
+                use_cache = False
+            cache_key = snapshot = None
+            if use_cache:
+                cached, cache_key, snapshot = await asyncio.to_thread(_lookup_cached_run, input_code, code_file_path)
+                if cached is not None:
+                    return cached
+
+            try:
+                full_command, shell, executable, env = await asyncio.to_thread(
+                    get_python_command, os.path.abspath(code_file_path)
+                )
+                logger.info(f"Executing command: {full_command}")
+                result = await limiter.aexecute(
+                    full_command,
+                    cwd=WORKING_DIRECTORY,
+                    shell=shell,
+                    executable=executable,
+                    env=env,
+                )
+            except TimeoutError as e:
+                logger.error(f"Execution timeout: {e}")
+                return {
+                    "result": "Timeout",
+                    "error": str(e),
+                    "file_path": code_file_path
+                }
+
+            if cache_key is not None and result.returncode == 0:
+                await asyncio.to_thread(_store_cached_run, cache_key, result, snapshot, code_file_path, tracked)
+            return _execution_result(result, code_file_path)
+    except Exception as e:
+        logger.exception("An error occurred while executing code")
+        return {
+            "result": "Error occurred",
+            "error": str(e),
+            "file_path": code_file_path
+        }
+
+
+execute_code = StructuredTool.from_function(
+    func=_execute_code,
+    coroutine=_aexecute_code,
+    name="execute_code",
+)
+
+
+class BatchScript(BaseModel):
+    """One script of an execute_code_batch call."""
+    code: str = Field(description="The Python code to execute.")
+    codefile_name: str | None = Field(default=None, description="File name or full path. Default: batch_<n>.py.")
+    timeout: int | None = Field(default=None, description="Execution timeout in seconds. None = no limit.")
+    memory_mb: int | None = Field(default=None, description="Memory limit in MB (Linux only). None = no limit.")
+    progress_timeout: int | None = Field(default=None, description="Timeout only if no output for N seconds.")
+
+
+def _execute_code_batch(
+    scripts: Annotated[list[BatchScript], "Independent scripts to run in parallel."],
+) -> Annotated[dict, "Per-script results in input order, with timing"]:
+    """
+    Execute several independent Python scripts in parallel and return all results.
+
+    Use this instead of consecutive execute_code calls when scripts do not depend
+    on each other (e.g. fitting several candidate models, per-segment statistics).
+    Scripts run concurrently, up to the number of available CPUs; each one gets
+    the same security scan, limits and result fields as execute_code. Scripts
+    must not rely on each other's output files. The execution cache is not
+    used: the files each script produces cannot be told apart while they run
+    together.
+
+    Args:
+        scripts: Scripts with optional per-script file name and limits.
+
+    Returns:
+        Dictionary with "results" (one execute_code result per script, in input
+        order, each with "elapsed_seconds"), "elapsed_seconds" and "parallelism".
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    scripts, workers, error = _plan_batch(scripts)
+    if error is not None:
+        return error
+
+    def run(script: BatchScript) -> dict:
+        start = time.monotonic()
+        result = _execute_code(
+            script.code,
+            codefile_name=script.codefile_name,
+            timeout=script.timeout,
+            memory_mb=script.memory_mb,
+            progress_timeout=script.progress_timeout,
+            stateful=False,
+            incremental=False,
+            use_cache=False,
+        )
+        return {**result, "elapsed_seconds": round(time.monotonic() - start, 3)}
+
+    start = time.monotonic()
+    # Threads only wait on the scripts' processes, which do the work
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="execute-batch") as executor:
+        results = list(executor.map(run, scripts))
+    return _batch_result(results, start, workers)
+
+
+async def _aexecute_code_batch(
+    scripts: list[BatchScript],
+) -> dict:
+    """
+    Async execute_code_batch: runs the scripts as asyncio subprocesses.
+
+    Cancelling the awaiting task kills every running script.
+    """
+    scripts, workers, error = _plan_batch(scripts)
+    if error is not None:
+        return error
+
+    semaphore = asyncio.Semaphore(workers)
+
+    async def run(script: BatchScript) -> dict:
+        async with semaphore:
+            start = time.monotonic()
+            result = await _aexecute_code(
+                script.code,
+                codefile_name=script.codefile_name,
+                timeout=script.timeout,
+                memory_mb=script.memory_mb,
+                progress_timeout=script.progress_timeout,
+                stateful=False,
+                incremental=False,
+                use_cache=False,
             )
-        except TimeoutError as e:
-            logger.error(f"Execution timeout: {e}")
-            return {
-                "result": "Timeout",
-                "error": str(e),
-                "file_path": code_file_path
+            return {**result, "elapsed_seconds": round(time.monotonic() - start, 3)}
+
+    start = time.monotonic()
+    results = await asyncio.gather(*(run(script) for script in scripts))
+    return _batch_result(list(results), start, workers)
+
+
+execute_code_batch = StructuredTool.from_function(
+    func=_execute_code_batch,
+    coroutine=_aexecute_code_batch,
+    name="execute_code_batch",
+)
+
+
+def _available_cpus() -> int:
+    """Number of CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _plan_batch(scripts: list) -> tuple:
+    """
+    Validate a batch and size its worker pool.
+
+    Returns a tuple of (scripts with file names assigned, worker count,
+    error result); the error result is None if the batch is valid.
+    """
+    from .tool_config import TOOL_CONFIG
+
+    scripts = [s if isinstance(s, BatchScript) else BatchScript(**s) for s in scripts]
+    if not scripts:
+        return scripts, 0, {"result": "Error occurred", "error": "No scripts given", "results": []}
+
+    seen = set()
+    for index, script in enumerate(scripts, start=1):
+        if not script.codefile_name:
+            script.codefile_name = f"batch_{index}.py"
+        path = os.path.normpath(os.path.join(WORKING_DIRECTORY, script.codefile_name))
+        if path in seen:
+            return scripts, 0, {
+                "result": "Error occurred",
+                "error": f"Scripts must use distinct file names; '{script.codefile_name}' is used twice",
+                "results": [],
             }
-        
-        # Capture standard output and error output
-        output = result.stdout
-        error_output = result.stderr
-        
-        if result.returncode == 0:
-            logger.info("Code executed successfully")
-            return {
-                "result": "Code executed successfully",
-                "output": output + "\n\nIf you have completed all tasks, respond with FINAL ANSWER.",
-                "file_path": code_file_path
+        seen.add(path)
+
+    limit = TOOL_CONFIG.execution.max_parallel_scripts or _available_cpus()
+    workers = max(1, min(limit, len(scripts)))
+    logger.info(f"Running {len(scripts)} scripts with parallelism {workers}")
+    return scripts, workers, None
+
+
+def _batch_result(results: list, start: float, workers: int) -> dict:
+    """Combine per-script results into the execute_code_batch result."""
+    succeeded = sum(1 for r in results if r.get("result") == "Code executed successfully")
+    return {
+        "result": f"{succeeded}/{len(results)} scripts executed successfully",
+        "results": results,
+        "elapsed_seconds": round(time.monotonic() - start, 3),
+        "parallelism": workers,
+    }
+
+
+def _prepare_execution(
+    input_code: str,
+    codefile_name: str,
+    timeout: int | None,
+    memory_mb: int | None,
+    progress_timeout: int | None,
+) -> tuple:
+    """
+    Scan the code, write it to its file and build the resource limiter.
+
+    Returns a tuple of (code_file_path, limiter, error result); the error
+    result is None unless the security scan blocked the code.
+    """
+    from .tool_config import TOOL_CONFIG
+    from .security import SecurityScanner, ResourceLimiter
+
+    # === SECURITY SCAN ===
+    if TOOL_CONFIG.enable_security_scan:
+        scan_result = SecurityScanner.scan_code(input_code)
+        if not scan_result.is_safe:
+            logger.warning(f"Security scan blocked code: {scan_result.violations}")
+            return None, None, {
+                "result": "Security violation",
+                "error": f"Code blocked: {'; '.join(scan_result.violations)}",
+                "file_path": None
             }
+        if scan_result.warnings:
+            logger.info(f"Security scan warnings: {scan_result.warnings}")
+
+    # Ensure WORKING_DIRECTORY exists
+    os.makedirs(WORKING_DIRECTORY, exist_ok=True)
+    
+    # Handle codefile_name, ensuring it's a valid path
+    if os.path.isabs(codefile_name):
+        code_file_path = codefile_name
+    else:
+        if WORKING_DIRECTORY not in codefile_name:
+            code_file_path = os.path.join(WORKING_DIRECTORY, codefile_name)
         else:
-            logger.error(f"Code execution failed: {error_output}")
+            code_file_path = codefile_name
+
+    # Normalize the path for the current platform
+    code_file_path = os.path.normpath(code_file_path)
+
+    logger.info(f"Code will be written to file: {code_file_path}")
+    
+    # Write the code to the file with UTF-8 encoding
+    with open(code_file_path, 'w', encoding='utf-8') as code_file:
+        code_file.write(input_code)
+    
+    logger.info(f"Code has been written to file: {code_file_path}")
+
+    # === EXECUTE WITH RESOURCE LIMITS ===
+    limiter = ResourceLimiter(
+        timeout=timeout,
+        memory_mb=memory_mb,
+        progress_timeout=progress_timeout,
+        log_dir=EXECUTION_LOG_DIRECTORY,
+        label=os.path.splitext(os.path.basename(code_file_path))[0],
+    )
+    return code_file_path, limiter, None
+
+
+def _execution_result(result: subprocess.CompletedProcess, code_file_path: str) -> dict:
+    """
+    Build the execute_code result dict from a finished execution.
+
+    When output was truncated, the dict references the log file holding the
+    full stream. The resources the run used are included and logged.
+    """
+    fields = {}
+    if getattr(result, "stdout_log", None):
+        fields["output_log"] = result.stdout_log
+    if getattr(result, "stderr_log", None):
+        fields["error_log"] = result.stderr_log
+
+    usage = getattr(result, "resource_usage", None)
+    if usage is not None:
+        fields["resource_usage"] = usage.to_dict()
+        logger.info(
+            f"Resource usage of {code_file_path}: returncode={result.returncode} {usage.format_fields()}",
+            extra={"resource_usage": fields["resource_usage"], "file_path": code_file_path},
+        )
+
+    if result.returncode == 0:
+        logger.info("Code executed successfully")
+        return {
+            "result": "Code executed successfully",
+            "output": result.stdout + "\n\nIf you have completed all tasks, respond with FINAL ANSWER.",
+            "file_path": code_file_path,
+            **fields,
+        }
+    logger.error(f"Code execution failed: {result.stderr}")
+    return {
+        "result": "Failed to execute",
+        "error": result.stderr,
+        "file_path": code_file_path,
+        **fields,
+    }
+
+
+def _lookup_cached_run(input_code: str, code_file_path: str) -> tuple:
+    """
+    Look up a run in the execution cache.
+
+    Returns a tuple of (result dict or None, cache key, working-directory
+    snapshot); key and snapshot are None if the cache cannot be used.
+    """
+    from .execution_cache import get_execution_cache
+
+    cache = get_execution_cache()
+    try:
+        key = cache.key_for(input_code)
+        cached = cache.lookup(key)
+        if cached is not None:
             return {
-                "result": "Failed to execute",
-                "error": error_output,
-                "file_path": code_file_path
-            }
-    except Exception as e:
-        logger.exception("An error occurred while executing code")
+                "result": "Code executed successfully",
+                "output": cached.stdout + "\n\nIf you have completed all tasks, respond with FINAL ANSWER.",
+                "file_path": code_file_path,
+                "cached": True,
+                "restored_files": cached.files,
+            }, key, None
+        return None, key, cache.snapshot()
+    except OSError as e:
+        logger.warning(f"Execution cache unavailable: {e}")
+        return None, None, None
+
+
+def _store_cached_run(
+    key: str,
+    result: subprocess.CompletedProcess,
+    snapshot: dict,
+    code_file_path: str,
+    tracked,
+) -> None:
+    """Store a successful run in the execution cache, unless another execution overlapped it."""
+    from .execution_cache import get_execution_cache
+
+    if tracked.overlapped:
+        logger.info(f"Not caching run {key[:12]}: other executions ran at the same time")
+        return
+    cache = get_execution_cache()
+    script = os.path.relpath(os.path.abspath(code_file_path), cache.working_directory)
+    try:
+        cache.store(key, result.stdout, result.stderr, snapshot, exclude=[script])
+    except OSError as e:
+        logger.warning(f"Could not cache run {key[:12]}: {e}")
+
+
+def _run_script(limiter, script_path: str) -> subprocess.CompletedProcess:
+    """
+    Run a Python script under the limiter's limits.
+
+    Forks the script from the sandbox pool when available, otherwise starts
+    a fresh interpreter in the conda environment.
+    """
+    from .sandbox import SandboxError, get_sandbox_pool
+
+    pool = get_sandbox_pool()
+    if pool is not None:
+        try:
+            process = pool.spawn(script_path, WORKING_DIRECTORY, memory_mb=limiter.memory_mb)
+            logger.info(f"Executing {script_path} in sandbox process {process.pid}")
+            return limiter.monitor(process, [script_path])
+        except SandboxError as e:
+            logger.warning(f"{e}; starting a fresh interpreter")
+
+    # Get platform-specific command
+    full_command, shell, executable, env = get_python_command(script_path)
+    
+    logger.info(f"Executing command: {full_command}")
+    
+    return limiter.execute(
+        command=full_command,
+        cwd=WORKING_DIRECTORY,
+        shell=shell,
+        executable=executable,
+        env=env,
+    )
+
+
+def _kernel_manager(incremental: bool):
+    """The KernelManager of persistent kernels, or of checkpoint kernels when incremental."""
+    if incremental:
+        from .incremental import get_checkpoint_kernel_manager
+        return get_checkpoint_kernel_manager()
+    from .kernel import get_kernel_manager
+    return get_kernel_manager()
+
+
+def _execute_in_kernel(
+    limiter,
+    input_code: str,
+    code_file_path: str,
+    thread_id: str,
+    incremental: bool = False,
+) -> dict | None:
+    """
+    Run code in the persistent kernel of a run, under the limiter's limits.
+
+    With incremental, the code runs in the run's checkpoint kernel, which
+    resumes from the first changed cell.
+
+    Returns the execute_code result, or None if no kernel can be started
+    (the caller then runs the code statelessly).
+    """
+    from .kernel import KernelError, KernelUnavailableError
+
+    try:
+        result = _kernel_manager(incremental).execute(
+            thread_id,
+            input_code,
+            os.path.abspath(code_file_path),
+            timeout=limiter.timeout,
+            progress_timeout=limiter.progress_timeout,
+            memory_mb=limiter.memory_mb,
+            capture=limiter.new_capture(),
+        )
+    except TimeoutError as e:
+        logger.error(f"Execution timeout: {e}")
+        return {
+            "result": "Timeout",
+            "error": str(e),
+            "file_path": code_file_path
+        }
+    except KernelUnavailableError as e:
+        logger.warning(f"{e}; running without a persistent kernel")
+        return None
+    except KernelError as e:
+        logger.error(f"Kernel error: {e}")
         return {
             "result": "Error occurred",
             "error": str(e),
-            "file_path": code_file_path if 'code_file_path' in locals() else "Unknown"
+            "file_path": code_file_path
         }
 
+    logger.info(f"Ran cell in kernel {thread_id}")
+    execution_result = _execution_result(result, code_file_path)
+    if getattr(result, "cells", None) is not None:
+        execution_result["cells"] = result.cells
+    return execution_result
+
+
+async def _aexecute_in_kernel(
+    limiter,
+    input_code: str,
+    code_file_path: str,
+    thread_id: str,
+    incremental: bool = False,
+) -> dict | None:
+    """
+    Async _execute_in_kernel; cancelling the awaiting task interrupts the cell.
+
+    The kernel is driven from a worker thread, since one kernel process
+    serves every cell of its run.
+    """
+    try:
+        return await asyncio.to_thread(
+            _execute_in_kernel, limiter, input_code, code_file_path, thread_id, incremental
+        )
+    except asyncio.CancelledError:
+        _kernel_manager(incremental).interrupt(thread_id)
+        raise
+
+
 @tool
-def execute_command(
+def restart_kernel(config: RunnableConfig = None) -> Annotated[str, "Restart status"]:
+    """
+    Restart the persistent Python kernel of the current run.
+
+    Clears all variables, imports and loaded data kept by stateful execute_code
+    calls, and the checkpoints of incremental ones. Use it when the kernel
+    state is broken or memory must be freed.
+    """
+    thread_id = get_thread_id(config)
+    _kernel_manager(False).restart(thread_id)
+    _kernel_manager(True).restart(thread_id)
+    return f"Kernel for run {thread_id} restarted; the next stateful execute_code call starts fresh."
+
+
+def _execute_command(
     command: Annotated[str, "Command to be executed."]
 ) -> Annotated[str, "Output of the command."]:
     """
@@ -165,29 +719,78 @@ def execute_command(
     Please use pip to install the package.
 
     """
+    from .execution_cache import track_execution
+
     try:
         # Get platform-specific command
-        full_command, shell, executable = get_platform_specific_command(command)
+        full_command, shell, executable, env = get_shell_command(command)
         
         logger.info(f"Executing command: {command}")
         
         # Execute the command and capture the output
-        result = subprocess.run(
-            full_command,
-            shell=shell,
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            executable=executable,
-            cwd=WORKING_DIRECTORY
-        )
+        with track_execution():
+            result = subprocess.run(
+                full_command,
+                shell=shell,
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                executable=executable,
+                env=env,
+                cwd=WORKING_DIRECTORY
+            )
         logger.info("Command executed successfully")
         return result.stdout
     except subprocess.CalledProcessError as e:
         logger.error(f"Error executing command: {e.stderr}")
         return f"Error: {e.stderr}"
 
+
+async def _aexecute_command(command: str) -> str:
+    """
+    Async execute_command: runs the command as an asyncio subprocess.
+
+    Cancelling the awaiting task stops the command and its subprocesses.
+    """
+    from . import process_group
+    from .execution_cache import track_execution
+    from .tool_config import TOOL_CONFIG
+
+    full_command, _, executable, env = await asyncio.to_thread(get_shell_command, command)
+
+    logger.info(f"Executing command: {command}")
+
+    with track_execution():
+        process = await asyncio.create_subprocess_shell(
+            full_command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            executable=executable,
+            env=env,
+            cwd=WORKING_DIRECTORY,
+            start_new_session=process_group.SUPPORTED,
+        )
+        try:
+            stdout, stderr = await process.communicate()
+        except asyncio.CancelledError:
+            await process_group.terminate_async(process, TOOL_CONFIG.execution.terminate_grace_seconds)
+            raise
+
+    if process.returncode != 0:
+        error = stderr.decode("utf-8", errors="replace")
+        logger.error(f"Error executing command: {error}")
+        return f"Error: {error}"
+    logger.info("Command executed successfully")
+    return stdout.decode("utf-8", errors="replace")
+
+
+execute_command = StructuredTool.from_function(
+    func=_execute_command,
+    coroutine=_aexecute_command,
+    name="execute_command",
+)
+
 logger.info("Module initialized successfully")
 
 @tool
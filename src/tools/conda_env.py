@@ -0,0 +1,124 @@
+"""Resolve the conda environment used for code execution once per process.
+
+Running every command through ``conda run -n <env>`` starts the conda CLI
+(itself a Python program) before the user's script, which costs seconds
+per call. Instead, the environment's interpreter path and its activated
+environment variables are captured with a single ``conda run`` probe, cached,
+and used to exec the interpreter directly afterwards.
+
+If the probe fails (conda missing, unknown environment, ...), callers fall
+back to ``conda run`` for every call, as before.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from ..logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Seconds allowed for the one-off conda probe
+PROBE_TIMEOUT_SECONDS = 120
+
+# Prefix marking the probe's JSON line among any activation script output
+_PROBE_MARKER = "__DATAGEN_CONDA_ENV__"
+_PROBE_CODE = (
+    "import json, os, sys; "
+    f"print('{_PROBE_MARKER}' + json.dumps({{'python': sys.executable, 'environ': dict(os.environ)}}))"
+)
+
+_cache: Dict[str, Optional["CondaEnvironment"]] = {}
+_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CondaEnvironment:
+    """An activated conda environment.
+
+    Attributes:
+        name: Conda environment name.
+        python: Absolute path of the environment's Python interpreter.
+        environ: Environment variables as set by `conda activate`.
+    """
+    name: str
+    python: str
+    environ: Dict[str, str] = field(default_factory=dict)
+
+    def is_valid(self) -> bool:
+        """Whether the interpreter still exists (the env may have been removed)."""
+        return os.path.isfile(self.python)
+
+
+def _from_current_process(name: str) -> Optional[CondaEnvironment]:
+    """Use this process's interpreter when it already runs in the target env."""
+    if os.environ.get("CONDA_DEFAULT_ENV") != name or not os.environ.get("CONDA_PREFIX"):
+        return None
+    prefix = os.path.realpath(os.environ["CONDA_PREFIX"])
+    if os.path.realpath(sys.prefix) != prefix:
+        return None
+    return CondaEnvironment(name=name, python=sys.executable, environ=dict(os.environ))
+
+
+def _probe(name: str) -> Optional[CondaEnvironment]:
+    """Capture the interpreter and activated environment with one conda run."""
+    command = f'conda run -n {name} python -c "{_PROBE_CODE}"'
+    executable = None if platform.system().lower() == "windows" else "/bin/bash"
+    try:
+        result = subprocess.run(
+            command,
+            shell=True,
+            executable=executable,
+            capture_output=True,
+            text=True,
+            timeout=PROBE_TIMEOUT_SECONDS,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"Conda probe for '{name}' failed: {e}")
+        return None
+
+    if result.returncode != 0:
+        logger.warning(f"Conda probe for '{name}' failed: {result.stderr.strip()}")
+        return None
+
+    for line in result.stdout.splitlines():
+        if line.startswith(_PROBE_MARKER):
+            data = json.loads(line[len(_PROBE_MARKER):])
+            return CondaEnvironment(name=name, python=data["python"], environ=data["environ"])
+
+    logger.warning(f"Conda probe for '{name}' returned no environment")
+    return None
+
+
+def resolve_conda_env(name: str) -> Optional[CondaEnvironment]:
+    """Get the activated conda environment, resolving it on first use.
+
+    Args:
+        name: Conda environment name.
+
+    Returns:
+        The cached CondaEnvironment, or None if it cannot be resolved
+        (callers should then fall back to `conda run`).
+    """
+    with _cache_lock:
+        if name in _cache:
+            env = _cache[name]
+            if env is None or env.is_valid():
+                return env
+
+        env = _from_current_process(name) or _probe(name)
+        _cache[name] = env
+        if env is not None:
+            logger.info(f"Resolved conda env '{name}' to {env.python}")
+        return env
+
+
+def reset_conda_env_cache() -> None:
+    """Forget resolved environments, e.g. after recreating a conda env."""
+    with _cache_lock:
+        _cache.clear()
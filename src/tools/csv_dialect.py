@@ -0,0 +1,284 @@
+"""Encoding and dialect detection for CSV files.
+
+collect_data used to try one encoding after another, each attempt being a
+full pd.read_csv, so a large latin-1 file was parsed completely before the
+utf-8 attempt failed. Here encoding, delimiter, quoting and header are
+detected once from a bounded prefix of the file, and the file is then
+parsed in a single pass with the detected settings.
+
+Detections are cached per file fingerprint (path, size, modification time),
+so later reads of an unchanged file skip the sniffing. A wrong header guess
+can be corrected with override_header; the correction is cached the same way.
+"""
+
+import codecs
+import csv
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Optional, Tuple
+
+from ..logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Bytes read from the start of a file to detect its encoding
+SAMPLE_BYTES = 1024 * 1024
+
+# Characters (whole lines) given to csv.Sniffer, whose cost grows with the sample
+SNIFF_CHARS = 64 * 1024
+
+# Delimiters considered by the sniffer
+DELIMITERS = ",;\t|"
+
+# Encoding of files whose sample is not valid utf-8; it decodes any byte sequence
+FALLBACK_ENCODING = "latin1"
+
+# Rows after the first one compared with it to decide whether it is a header
+HEADER_CHECK_ROWS = 20
+
+# Number of files whose detected dialect is remembered
+CACHE_ENTRIES = 256
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+@dataclass(frozen=True)
+class CsvDialect:
+    """How to parse a CSV file.
+
+    Attributes:
+        encoding: Text encoding of the file.
+        delimiter: Field separator.
+        quotechar: Character quoting fields.
+        doublequote: Whether a doubled quotechar inside a quoted field is a literal quote.
+        escapechar: Escape character, if any.
+        has_header: Whether the first row holds column names.
+    """
+    encoding: str = "utf-8"
+    delimiter: str = ","
+    quotechar: str = '"'
+    doublequote: bool = True
+    escapechar: Optional[str] = None
+    has_header: bool = True
+
+    def read_csv_kwargs(self) -> dict:
+        """Keyword arguments for pd.read_csv."""
+        kwargs = {
+            "encoding": self.encoding,
+            "sep": self.delimiter,
+            "quotechar": self.quotechar,
+            "doublequote": self.doublequote,
+        }
+        if self.escapechar:
+            kwargs["escapechar"] = self.escapechar
+        if not self.has_header:
+            kwargs["header"] = None
+        return kwargs
+
+
+def fingerprint(path: str) -> Tuple[str, int, int]:
+    """Identity of a file's current content: (absolute path, size, mtime_ns)."""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def detect_encoding(sample: bytes) -> str:
+    """Encoding of a file from a prefix sample: BOM, else utf-8 if it decodes, else latin1."""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        # final=False: a character cut off at the end of the sample is not an error
+        decoder.decode(sample, final=False)
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    return "utf-8"
+
+
+def sniff_dialect(path: str, sample_bytes: int = SAMPLE_BYTES) -> CsvDialect:
+    """Detect encoding, delimiter, quoting and header from the start of a file.
+
+    Args:
+        path: CSV file.
+        sample_bytes: Bytes read from the start of the file.
+
+    Returns:
+        The detected CsvDialect; defaults (comma, double quotes, header) for
+        whatever cannot be detected.
+    """
+    with open(path, "rb") as f:
+        sample = f.read(sample_bytes)
+    encoding = detect_encoding(sample)
+    text = sample.decode(encoding, errors="ignore")
+
+    # Sniff whole lines only; the last one may be cut off by the sample
+    lines = text[:SNIFF_CHARS].splitlines(keepends=True)
+    if len(lines) > 1 and (len(sample) == sample_bytes or len(text) > SNIFF_CHARS):
+        lines = lines[:-1]
+    sniff_text = "".join(lines)
+    if not sniff_text.strip():
+        return CsvDialect(encoding=encoding)
+
+    sniffer = csv.Sniffer()
+    try:
+        sniffed = sniffer.sniff(sniff_text, delimiters=DELIMITERS)
+    except csv.Error:
+        return CsvDialect(encoding=encoding)
+
+    escapechar = sniffed.escapechar or None
+    dialect = CsvDialect(
+        encoding=encoding,
+        delimiter=sniffed.delimiter,
+        quotechar=sniffed.quotechar or '"',
+        # The sniffer reports doublequote=False whenever the sample has no
+        # doubled quotes; only an escape character rules them out
+        doublequote=sniffed.doublequote or escapechar is None,
+        escapechar=escapechar,
+    )
+    return replace(dialect, has_header=_has_header(sniffer, sniff_text, dialect))
+
+
+def _has_header(sniffer: csv.Sniffer, text: str, dialect: CsvDialect) -> bool:
+    """Whether the first row is a header.
+
+    The first row is a header, as for pd.read_csv, unless it looks like the
+    rows after it: the sniffer calls the file headerless, every field of the
+    first row is a number, and the rows below have as many fields, numbers
+    in the same columns and lengths that include the first row's. A header
+    of years (2020,2021,...) over other numbers thus stays a header.
+    """
+    try:
+        if sniffer.has_header(text):
+            return True
+    except csv.Error:
+        return True
+    reader = csv.reader(text.splitlines(), delimiter=dialect.delimiter, quotechar=dialect.quotechar)
+    rows = list(itertools.islice(reader, HEADER_CHECK_ROWS + 1))
+    if len(rows) < 2 or not rows[0] or not all(_is_number(field) for field in rows[0]):
+        return True
+    first_row, others = rows[0], rows[1:]
+    if any(len(row) != len(first_row) for row in others):
+        return True
+    for column, field in enumerate(first_row):
+        values = [row[column] for row in others]
+        if not all(_is_number(value) for value in values):
+            return True
+        lengths = [len(value) for value in values]
+        if not min(lengths) <= len(field) <= max(lengths):
+            return True
+    return False
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+_cache: "OrderedDict[Tuple[str, int, int], CsvDialect]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_dialect(path: str) -> CsvDialect:
+    """Detected dialect of a file, sniffed once per file fingerprint.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    key = fingerprint(path)
+    with _cache_lock:
+        dialect = _cache.get(key)
+        if dialect is not None:
+            _cache.move_to_end(key)
+            return dialect
+
+    dialect = sniff_dialect(path)
+    logger.info(
+        f"Detected CSV dialect of {path}: encoding={dialect.encoding} delimiter={dialect.delimiter!r} "
+        f"quotechar={dialect.quotechar!r} header={dialect.has_header}"
+    )
+    remember_dialect(path, dialect, key)
+    return dialect
+
+
+def remember_dialect(path: str, dialect: CsvDialect, key: Optional[Tuple[str, int, int]] = None) -> None:
+    """Cache a dialect for a file, e.g. after correcting a detection."""
+    key = key or fingerprint(path)
+    with _cache_lock:
+        _cache[key] = dialect
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def override_header(path: str, has_header: bool) -> CsvDialect:
+    """Record whether a file's first row is a header, correcting the detection.
+
+    Returns:
+        The file's dialect with the given header setting.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    dialect = get_dialect(path)
+    if dialect.has_header != has_header:
+        logger.info(f"Header of {path} set to {has_header} (detected {dialect.has_header})")
+        dialect = replace(dialect, has_header=has_header)
+        remember_dialect(path, dialect)
+    return dialect
+
+
+def use_fallback_encoding(path: str, error: UnicodeDecodeError) -> CsvDialect:
+    """Record that a file must be read as latin1 after a decoding error.
+
+    Returns:
+        The corrected dialect.
+
+    Raises:
+        UnicodeDecodeError: If the file was already read as latin1.
+    """
+    dialect = get_dialect(path)
+    if dialect.encoding == FALLBACK_ENCODING:
+        raise error
+    logger.warning(f"Error with encoding {dialect.encoding}: {error}; retrying with {FALLBACK_ENCODING}")
+    dialect = replace(dialect, encoding=FALLBACK_ENCODING)
+    remember_dialect(path, dialect)
+    return dialect
+
+
+def read_csv(path: str, **read_options):
+    """pd.read_csv in a single pass with the file's detected dialect.
+
+    If the sampled prefix decoded as utf-8 but a later part of the file does
+    not, the file is read again as latin1 once and the correction is cached.
+
+    Args:
+        path: CSV file.
+        **read_options: Further pd.read_csv arguments (nrows, usecols, ...).
+
+    Raises:
+        OSError: If the file cannot be read.
+        UnicodeDecodeError: If the file cannot be decoded.
+    """
+    import pandas as pd
+
+    dialect = get_dialect(path)
+    try:
+        data = pd.read_csv(path, **read_options, **dialect.read_csv_kwargs())
+    except UnicodeDecodeError as e:
+        dialect = use_fallback_encoding(path, e)
+        data = pd.read_csv(path, **read_options, **dialect.read_csv_kwargs())
+    logger.info(f"Successfully read CSV file with encoding: {dialect.encoding}")
+    return data
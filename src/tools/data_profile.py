@@ -0,0 +1,332 @@
+"""Streaming profiles of CSV datasets.
+
+Agents that only need to know what a dataset looks like used to call
+collect_data and get the whole DataFrame stringified into the conversation.
+A profile holds, per column, the dtype, null rate, min/max, approximate
+quantiles, top values and an approximate distinct count. It is computed in
+one pass over fixed-size chunks, so memory stays bounded however large the
+file is:
+
+- quantiles come from a uniform sample (bottom-k of random keys),
+- top values from counters pruned to the most frequent entries,
+- distinct counts from a HyperLogLog sketch of the values' hashes.
+
+Profiles are stored as JSON sidecars in the dataset cache directory, keyed
+by the content hash of the source file (see dataset_cache.content_key). A
+sidecar is used only if the key and size it records match the current file.
+A file not hashed yet is hashed during the profiling pass rather than read
+twice.
+"""
+
+import json
+import os
+import uuid
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..config import WORKING_DIRECTORY
+from ..logger import setup_logger
+from .dataset_cache import CACHE_DIRECTORY_NAME, content_key, get_dataset_cache, known_content_key, open_hashing
+
+logger = setup_logger(__name__)
+
+# Bumped when the stored profile or its key changes, so old sidecars are recomputed
+PROFILE_VERSION = 2
+
+PROFILE_SUFFIX = ".profile.json"
+
+# Rows parsed per chunk
+CHUNK_ROWS = 100_000
+
+# Values kept per column for quantile estimates
+SAMPLE_SIZE = 10_000
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Most frequent values reported per column, and counters kept while streaming
+TOP_K = 5
+TOP_K_CAPACITY = 1_000
+
+# HyperLogLog registers are 2**HLL_PRECISION (about 0.8% standard error)
+HLL_PRECISION = 14
+
+# Characters of a value shown in summaries
+MAX_VALUE_CHARS = 40
+
+
+class _ColumnProfile:
+    """Streaming statistics of one column."""
+
+    def __init__(self, name: str, rng: np.random.Generator):
+        self.name = name
+        self.rng = rng
+        self.count = 0
+        self.nulls = 0
+        self.dtypes: List[str] = []
+        self.minimum = None
+        self.maximum = None
+        self.sample = np.empty(0, dtype=np.float64)
+        self.sample_keys = np.empty(0, dtype=np.float64)
+        self.top: Counter = Counter()
+        self.top_exact = True
+        self.registers = np.zeros(1 << HLL_PRECISION, dtype=np.uint8)
+
+    def update(self, series: pd.Series) -> None:
+        dtype = str(series.dtype)
+        if dtype not in self.dtypes:
+            self.dtypes.append(dtype)
+        self.count += len(series)
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        if values.empty:
+            return
+
+        if _is_numeric(values):
+            self._update_numeric(values)
+        self._update_top(values)
+        self._update_distinct(values)
+
+    def _update_numeric(self, values: pd.Series) -> None:
+        low, high = values.min(), values.max()
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+
+        # Bottom-k sampling: every value gets a random key and the smallest keys are kept
+        keys = np.concatenate([self.sample_keys, self.rng.random(len(values))])
+        sample = np.concatenate([self.sample, values.to_numpy(dtype=np.float64)])
+        if len(keys) > SAMPLE_SIZE:
+            kept = np.argpartition(keys, SAMPLE_SIZE)[:SAMPLE_SIZE]
+            keys, sample = keys[kept], sample[kept]
+        self.sample_keys, self.sample = keys, sample
+
+    def _update_top(self, values: pd.Series) -> None:
+        counts = values.value_counts(sort=False)
+        if len(counts) > TOP_K_CAPACITY:
+            # Values outside a chunk's most frequent ones are rarely frequent overall
+            counts = counts.nlargest(TOP_K_CAPACITY)
+            self.top_exact = False
+        self.top.update(counts.to_dict())
+        if len(self.top) > 2 * TOP_K_CAPACITY:
+            self.top = Counter(dict(self.top.most_common(TOP_K_CAPACITY)))
+            self.top_exact = False
+
+    def _update_distinct(self, values: pd.Series) -> None:
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        suffix_bits = 64 - HLL_PRECISION
+        index = (hashes >> np.uint64(suffix_bits)).astype(np.intp)
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+        # Position of the first set bit; suffixes are below 2**53, so float64 holds them exactly
+        bit_length = np.frexp(suffix.astype(np.float64))[1]
+        rank = (suffix_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def distinct(self) -> int:
+        """HyperLogLog estimate of the number of distinct values."""
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * np.log(m / zeros)
+        return min(int(round(estimate)), self.count - self.nulls)
+
+    def dtype(self) -> str:
+        """Dtype of the whole column; chunks may infer different ones."""
+        if len(self.dtypes) == 1:
+            return self.dtypes[0]
+        if all(name.startswith(("int", "uint", "float")) for name in self.dtypes):
+            return "float64"
+        return "object"
+
+    def result(self) -> dict:
+        dtype = self.dtype()
+        profile = {
+            "name": self.name,
+            "dtype": dtype,
+            "count": self.count,
+            "nulls": self.nulls,
+            "null_rate": round(self.nulls / self.count, 4) if self.count else 0.0,
+            "distinct": self.distinct(),
+        }
+        if self.minimum is not None and dtype != "object":
+            profile["min"] = _json_value(self.minimum)
+            profile["max"] = _json_value(self.maximum)
+            if len(self.sample):
+                values = np.quantile(self.sample, QUANTILES)
+                profile["quantiles"] = {f"{q:g}": _json_value(v) for q, v in zip(QUANTILES, values)}
+        profile["top"] = [[_json_value(value), count] for value, count in self.top.most_common(TOP_K)]
+        profile["top_exact"] = self.top_exact
+        return profile
+
+
+def _is_numeric(values: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+
+
+def _json_value(value):
+    """A JSON-serializable form of a value."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return None if np.isnan(value) else round(value, 6)
+    if isinstance(value, (bool, int, str)) or value is None:
+        return value
+    return str(value)
+
+
+def profile_frames(frames: Iterable[pd.DataFrame], seed: int = 0) -> dict:
+    """Profile a dataset given as a sequence of DataFrame chunks.
+
+    Args:
+        frames: Chunks with the same columns.
+        seed: Seed of the sampling used for quantiles.
+
+    Returns:
+        {"rows": int, "columns": [per-column profile, ...]}
+    """
+    rng = np.random.default_rng(seed)
+    columns: Dict[str, _ColumnProfile] = {}
+    rows = 0
+    for frame in frames:
+        rows += len(frame)
+        for name in frame.columns:
+            column = columns.get(str(name))
+            if column is None:
+                column = columns[str(name)] = _ColumnProfile(str(name), rng)
+            column.update(frame[name])
+    return {"rows": rows, "columns": [column.result() for column in columns.values()]}
+
+
+def _sidecar_path(key: str) -> str:
+    return os.path.join(os.path.abspath(WORKING_DIRECTORY), CACHE_DIRECTORY_NAME, key + PROFILE_SUFFIX)
+
+
+def _load_sidecar(sidecar: str, key: str, size: int) -> Optional[dict]:
+    """A stored profile, or None if it is missing, outdated or of other content."""
+    try:
+        with open(sidecar, encoding="utf-8") as f:
+            profile = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable profile {sidecar}: {e}")
+        return None
+    if profile.get("version") != PROFILE_VERSION:
+        return None
+    if profile.get("key") != key or profile.get("size") != size:
+        logger.info(f"Ignoring profile {sidecar}: it describes other content")
+        return None
+    return profile
+
+
+def _store_sidecar(sidecar: str, profile: dict) -> None:
+    staging = f"{sidecar}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+        with open(staging, "w", encoding="utf-8") as f:
+            json.dump(profile, f)
+        os.replace(staging, sidecar)
+    except OSError as e:
+        logger.warning(f"Could not store profile {sidecar}: {e}")
+    finally:
+        if os.path.exists(staging):
+            os.remove(staging)
+
+
+def _csv_frames(path: str):
+    from .csv_dialect import get_dialect
+
+    dialect = get_dialect(path)
+    with open_hashing(path) as source, pd.read_csv(source, chunksize=CHUNK_ROWS, **dialect.read_csv_kwargs()) as reader:
+        yield from reader
+
+
+def profile_file(path: str) -> dict:
+    """Profile of a CSV file, computed in one streaming pass or loaded from its sidecar.
+
+    Reads the columnar copy from the dataset cache when there is one.
+
+    Raises:
+        OSError: If the file cannot be read.
+        UnicodeDecodeError: If the file cannot be decoded.
+    """
+    from .csv_dialect import use_fallback_encoding
+
+    key = known_content_key(path)
+    size = os.path.getsize(path)
+    if key is not None:
+        sidecar = _sidecar_path(key)
+        profile = _load_sidecar(sidecar, key, size)
+        if profile is not None:
+            logger.info(f"Loaded profile of {path} from {sidecar}")
+            return profile
+
+    cache = get_dataset_cache()
+    frames = cache.iter_frames(path, CHUNK_ROWS) if cache is not None else None
+    if frames is not None:
+        profile = profile_frames(frames)
+    else:
+        try:
+            profile = profile_frames(_csv_frames(path))
+        except UnicodeDecodeError as e:
+            # The sampled prefix decoded as utf-8 but a later chunk did not
+            use_fallback_encoding(path, e)
+            profile = profile_frames(_csv_frames(path))
+
+    # Hashed by now, unless the file changed while it was read
+    key = content_key(path)
+    sidecar = _sidecar_path(key)
+    profile = {"version": PROFILE_VERSION, "source": os.path.abspath(path), "key": key, "size": size, **profile}
+    _store_sidecar(sidecar, profile)
+    logger.info(f"Profiled {path}: {profile['rows']} rows, {len(profile['columns'])} columns")
+    return profile
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    text = str(value)
+    if len(text) > MAX_VALUE_CHARS:
+        text = text[:MAX_VALUE_CHARS - 3] + "..."
+    return repr(text) if isinstance(value, str) else text
+
+
+def summarize(profile: dict, columns: Optional[List[str]] = None) -> str:
+    """Compact text summary of a profile, one line per column.
+
+    Raises:
+        ValueError: If columns names columns the profile does not have.
+    """
+    selected = profile["columns"]
+    if columns is not None:
+        known = {column["name"] for column in selected}
+        missing = [name for name in columns if name not in known]
+        if missing:
+            raise ValueError(f"Columns not found: {missing}")
+        selected = [column for column in selected if column["name"] in columns]
+
+    name = os.path.basename(profile["source"])
+    lines = [f"{name}: {profile['rows']} rows, {len(profile['columns'])} columns"]
+    for column in selected:
+        parts = [
+            column["dtype"],
+            f"nulls {column['null_rate']:.1%}",
+            f"~{column['distinct']} distinct",
+        ]
+        if "min" in column:
+            parts.append(f"min {_format_value(column['min'])}, max {_format_value(column['max'])}")
+        if "quantiles" in column:
+            values = "/".join(_format_value(value) for value in column["quantiles"].values())
+            labels = "/".join(f"{float(q) * 100:g}" for q in column["quantiles"])
+            parts.append(f"p{labels} {values}")
+        top = column["top"]
+        if top and top[0][1] > 1:
+            prefix = "top" if column["top_exact"] else "top~"
+            parts.append(f"{prefix} " + ", ".join(f"{_format_value(value)} ({count})" for value, count in top))
+        elif top:
+            parts.append("e.g. " + ", ".join(_format_value(value) for value, _ in top[:3]))
+        lines.append(f"- {column['name']}: " + "; ".join(parts))
+    return "\n".join(lines)
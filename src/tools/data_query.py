@@ -0,0 +1,232 @@
+"""SQL queries over the datasets in the working directory.
+
+Questions like "rows where region = X, grouped by month" used to take a
+generated script, an execute_code subprocess and parsing its stdout. Here
+they are one DuckDB query, run in process:
+
+- every CSV and Parquet file at the top of the working directory is a view
+  named after the file, and other files can be queried by path relative
+  to the working directory;
+- CSV files with a dataset cache copy are scanned from the memory-mapped
+  Arrow table instead of parsing the text; only files the query names are
+  looked up in the cache, since a lookup may hash the whole file;
+- DuckDB reads only the columns a query uses, and for Parquet and Arrow
+  pushes filters into the scan;
+- results are capped at max_rows, applied as a LIMIT on the query plan.
+
+Queries are read-only: a single SELECT statement, file access limited to
+the working directory and configuration locked. Memory is limited to
+data_collection.max_memory_mb (DuckDB spills to disk beyond it).
+
+Needs duckdb; without it query_data reports that it is unavailable.
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+from ..config import WORKING_DIRECTORY
+from ..logger import setup_logger
+from .dataset_cache import CACHE_DIRECTORY_NAME, get_dataset_cache
+from .tool_config import TOOL_CONFIG
+
+logger = setup_logger(__name__)
+
+CSV_EXTENSIONS = (".csv", ".tsv", ".txt")
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+
+# Characters of a value shown in results
+MAX_VALUE_CHARS = 60
+
+# Encodings DuckDB's CSV reader accepts, by csv_dialect name
+_DUCKDB_ENCODINGS = {"latin1": "latin-1", "utf-16": "utf-16"}
+
+# Places a query names files: FROM 'exports/2024.csv', read_parquet('parts/*.parquet'),
+# read_csv(['a.csv', 'b.csv'])
+_FILE_ARGUMENT = re.compile(r"(\b(?:FROM|JOIN)\s+|\bread_\w+\(\s*)('(?:[^']|'')*'|\[[^\]]*\])", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'((?:[^']|'')*)'")
+
+
+class QueryError(ValueError):
+    """Raised for queries that are not allowed or fail."""
+
+
+def _import_duckdb():
+    """duckdb, or None if it is not installed."""
+    try:
+        import duckdb
+    except ImportError:
+        return None
+    return duckdb
+
+
+def _view_name(file_name: str) -> str:
+    stem = os.path.splitext(file_name)[0]
+    name = re.sub(r"\W", "_", stem)
+    return name if not name[:1].isdigit() else f"_{name}"
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _absolute_paths(query: str, directory: str) -> str:
+    """Resolve relative file paths in a query against the working directory.
+
+    DuckDB resolves them against the process's current directory, which is
+    outside the directories queries may access.
+    """
+    def resolve_literal(match):
+        path = match.group(1).replace("''", "'")
+        if not path or os.path.isabs(path) or "://" in path:
+            return match.group(0)
+        return _quote(os.path.join(directory, path))
+
+    def resolve(match):
+        prefix, argument = match.groups()
+        return prefix + _STRING_LITERAL.sub(resolve_literal, argument)
+
+    return _FILE_ARGUMENT.sub(resolve, query)
+
+
+def _csv_source(path: str) -> str:
+    """read_csv call for a CSV file, with the dialect collect_data detects."""
+    from .csv_dialect import get_dialect
+
+    dialect = get_dialect(path)
+    options = [
+        f"delim={_quote(dialect.delimiter)}",
+        f"quote={_quote(dialect.quotechar)}",
+        f"header={'true' if dialect.has_header else 'false'}",
+    ]
+    if dialect.escapechar:
+        options.append(f"escape={_quote(dialect.escapechar)}")
+    encoding = _DUCKDB_ENCODINGS.get(dialect.encoding)
+    if encoding:
+        options.append(f"encoding={_quote(encoding)}")
+    return f"read_csv({_quote(path)}, {', '.join(options)})"
+
+
+def _mentions(query: str, name: str) -> bool:
+    """Whether a query may refer to a view; errs towards yes."""
+    return re.search(rf"(?<!\w){re.escape(name)}(?!\w)", query, re.IGNORECASE) is not None
+
+
+def _register_datasets(connection, directory: str, query: str) -> Dict[str, str]:
+    """Create a view per CSV/Parquet file in a directory.
+
+    Views the query mentions use the file's dataset cache copy if it has one.
+
+    Returns:
+        View name -> file name.
+    """
+    cache = get_dataset_cache()
+    views: Dict[str, str] = {}
+    for file_name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, file_name)
+        extension = os.path.splitext(file_name)[1].lower()
+        if not os.path.isfile(path) or extension not in CSV_EXTENSIONS + PARQUET_EXTENSIONS:
+            continue
+        name = _view_name(file_name)
+        if name in views:
+            logger.debug(f"Skipping {file_name}: table {name} is already {views[name]}")
+            continue
+        try:
+            if extension in PARQUET_EXTENSIONS:
+                source = f"read_parquet({_quote(path)})"
+            else:
+                table = _cached_table(cache, path) if cache is not None and _mentions(query, name) else None
+                if table is not None:
+                    connection.register(name, table)
+                    views[name] = file_name
+                    continue
+                source = _csv_source(path)
+            connection.execute(f'CREATE VIEW "{name}" AS SELECT * FROM {source}')
+        except Exception as e:
+            logger.warning(f"Could not register {file_name} for queries: {e}")
+            continue
+        views[name] = file_name
+    return views
+
+
+def _cached_table(cache, path: str):
+    """Memory-mapped Arrow table of a cached CSV file, or None."""
+    import pyarrow as pa
+
+    entry = cache.cached_path(path)
+    if entry is None:
+        return None
+    return pa.ipc.open_file(pa.memory_map(entry, "r")).read_all()
+
+
+def _format(data, truncated: bool, max_rows: int) -> str:
+    if truncated:
+        header = f"First {max_rows} rows (more exist; aggregate or add LIMIT/WHERE to narrow the result)"
+    else:
+        header = f"{len(data)} rows"
+    if data.empty:
+        return f"{header}\ncolumns: {', '.join(map(str, data.columns))}"
+    table = data.to_string(index=False, max_colwidth=MAX_VALUE_CHARS)
+    return f"{header}\n{table}"
+
+
+def run_query(query: str, max_rows: Optional[int] = None, working_directory: str = WORKING_DIRECTORY) -> str:
+    """Run a read-only SQL query over the datasets in a directory.
+
+    Args:
+        query: A single DuckDB SELECT statement.
+        max_rows: Rows returned at most; defaults to data_collection.query_max_rows.
+        working_directory: Directory whose files are queryable.
+
+    Returns:
+        The result as a text table.
+
+    Raises:
+        QueryError: If duckdb is missing, or the query is not a single
+            SELECT statement, fails or times out.
+    """
+    duckdb = _import_duckdb()
+    if duckdb is None:
+        raise QueryError("query_data needs the duckdb package (pip install duckdb)")
+
+    settings = TOOL_CONFIG.data_collection
+    max_rows = max_rows or settings.query_max_rows
+    directory = os.path.abspath(working_directory)
+
+    try:
+        statements = duckdb.extract_statements(query)
+    except duckdb.Error as e:
+        raise QueryError(f"Invalid query: {e}")
+    if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+        raise QueryError("Only a single SELECT statement is allowed")
+
+    spill_directory = os.path.join(directory, CACHE_DIRECTORY_NAME, "query_spill")
+    connection = duckdb.connect(":memory:")
+    timer = None
+    try:
+        connection.execute(f"SET memory_limit='{settings.max_memory_mb}MB'")
+        connection.execute(f"SET temp_directory={_quote(spill_directory)}")
+        views = _register_datasets(connection, directory, statements[0].query)
+        connection.execute(f"SET allowed_directories=[{_quote(directory)}]")
+        connection.execute("SET enable_external_access=false")
+        connection.execute("SET lock_configuration=true")
+        logger.info(f"Running query over {len(views)} datasets: {query}")
+
+        timeout = TOOL_CONFIG.execution.timeout_seconds
+        if timeout:
+            timer = threading.Timer(timeout, connection.interrupt)
+            timer.daemon = True
+            timer.start()
+        data = connection.sql(_absolute_paths(statements[0].query, directory)).limit(max_rows + 1).df()
+    except duckdb.InterruptException:
+        raise QueryError(f"Query timed out after {TOOL_CONFIG.execution.timeout_seconds} seconds")
+    except duckdb.Error as e:
+        raise QueryError(f"Query failed: {e}")
+    finally:
+        if timer is not None:
+            timer.cancel()
+        connection.close()
+
+    truncated = len(data) > max_rows
+    return _format(data.head(max_rows), truncated, max_rows)
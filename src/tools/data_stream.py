@@ -0,0 +1,277 @@
+"""Out-of-core reading of CSV datasets.
+
+collect_data runs in the orchestrator process, so materializing a selection
+larger than memory takes the whole run down. The size of a selection is
+estimated before reading it, from the memory a small probe of rows takes and
+the number of rows the file holds. Selections above the memory budget are
+streamed instead: the file is read in chunks sized to the budget, and only a
+uniform sample of rows plus streaming column statistics (see data_profile)
+are kept.
+
+Memory held at once is about one chunk (a quarter of the budget, parsing
+needs about as much again), the sample (another quarter) and the fixed-size
+column statistics. Every chunk's actual memory is measured: the first chunk
+is probe-sized, later ones grow at most twofold per chunk towards what fits
+the quarter, and shrink as soon as a chunk exceeds it, e.g. when later rows
+hold longer text. The sample is measured the same way and shrinks to fit its
+quarter. A chunk whose rows are suddenly much larger than the previous ones
+can still overshoot before it is measured, so the budget bounds steady-state
+memory rather than every allocation.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..logger import setup_logger
+from .csv_dialect import CsvDialect, fingerprint, get_dialect, read_csv, use_fallback_encoding
+
+logger = setup_logger(__name__)
+
+# Rows parsed to measure the memory a row takes
+PROBE_ROWS = 1_000
+
+# Bytes read from the start of a file to measure the size of a line
+PROBE_BYTES = 1024 * 1024
+
+# Number of files whose probe is remembered
+PROBE_ENTRIES = 256
+
+
+class _Probe:
+    """Memory per row of each column, and the estimated number of rows of a file."""
+
+    def __init__(self, column_bytes: Dict[str, float], rows: int):
+        self.column_bytes = column_bytes
+        self.rows = rows
+
+    def row_bytes(self, usecols: Optional[List[str]] = None) -> float:
+        if usecols is None:
+            return sum(self.column_bytes.values())
+        return sum(size for column, size in self.column_bytes.items() if column in usecols)
+
+
+_probes: "OrderedDict[Tuple[Tuple[str, int, int], CsvDialect], _Probe]" = OrderedDict()
+_probes_lock = threading.Lock()
+
+
+def _probe(path: str) -> _Probe:
+    key = (fingerprint(path), get_dialect(path))
+    with _probes_lock:
+        probe = _probes.get(key)
+        if probe is not None:
+            _probes.move_to_end(key)
+            return probe
+
+    sample = read_csv(path, nrows=PROBE_ROWS)
+    usage = sample.memory_usage(index=False, deep=True)
+    column_bytes = {str(column): usage[column] / max(len(sample), 1) for column in sample.columns}
+
+    with open(path, "rb") as f:
+        head = f.read(PROBE_BYTES)
+    lines = max(head.count(b"\n"), 1)
+    size = os.path.getsize(path)
+    # Rows past the header, scaled from the average line length of the head
+    rows = lines - 1 if len(head) == size else int(size / (len(head) / lines))
+
+    probe = _Probe(column_bytes, max(rows, len(sample)))
+    with _probes_lock:
+        _probes[key] = probe
+        while len(_probes) > PROBE_ENTRIES:
+            _probes.popitem(last=False)
+    return probe
+
+
+def estimate_memory_bytes(
+    path: str,
+    usecols: Optional[List[str]] = None,
+    nrows: Optional[int] = None,
+) -> int:
+    """Estimated memory of pd.read_csv(path, usecols=..., nrows=...) as a DataFrame.
+
+    Raises:
+        OSError: If the file cannot be read.
+        UnicodeDecodeError: If the file cannot be decoded.
+    """
+    probe = _probe(path)
+    rows = probe.rows if nrows is None else min(probe.rows, nrows)
+    return int(rows * probe.row_bytes(usecols))
+
+
+class _ChunkSize:
+    """Rows per chunk, fitted to the measured memory of the previous chunk.
+
+    Grows at most twofold per chunk, so a misleading probe costs a few small
+    chunks rather than one oversized chunk; shrinks at once.
+    """
+
+    def __init__(self, rows: int, max_bytes: float):
+        self.rows = max(rows, 1)
+        self.max_bytes = max_bytes
+
+    def __call__(self) -> int:
+        return self.rows
+
+    def observe(self, frame: pd.DataFrame) -> None:
+        if frame.empty:
+            return
+        used = frame.memory_usage(index=False, deep=True).sum()
+        rows = max(int(self.max_bytes / (max(used, 1) / len(frame))), 1)
+        if used > self.max_bytes:
+            logger.info(f"Chunk of {len(frame)} rows took {used} bytes; shrinking chunks to {rows} rows")
+            self.rows = rows
+        else:
+            self.rows = max(self.rows, min(rows, 2 * len(frame)))
+
+
+class _RowSample:
+    """Uniform sample of rows: every row gets a random key and the smallest keys are kept.
+
+    If the sampled rows exceed max_bytes, the sample keeps fewer of the
+    smallest keys, so it stays uniform.
+    """
+
+    def __init__(self, size: int, rng: np.random.Generator, max_bytes: float = float("inf")):
+        self.size = size
+        self.max_bytes = max_bytes
+        self.rng = rng
+        self.frame: Optional[pd.DataFrame] = None
+        self.keys = np.empty(0, dtype=np.float64)
+
+    def add(self, frame: pd.DataFrame) -> None:
+        keys = self.rng.random(len(frame))
+        if len(self.keys) >= self.size:
+            # Rows above the current largest key cannot enter the sample
+            candidates = keys < self.keys.max()
+            frame, keys = frame[candidates], keys[candidates]
+        if self.frame is None:
+            combined = frame
+        elif frame.empty:
+            return
+        else:
+            combined = pd.concat([self.frame, frame])
+        keys = np.concatenate([self.keys, keys])
+        if len(keys) > self.size:
+            combined, keys = self._smallest(combined, keys, self.size)
+        used = combined.memory_usage(index=False, deep=True).sum() if len(combined) else 0
+        if used > self.max_bytes:
+            self.size = max(int(len(combined) * self.max_bytes / used), 1)
+            logger.debug(f"Sampled rows took {used} bytes; keeping {self.size} rows")
+            combined, keys = self._smallest(combined, keys, self.size)
+        self.frame, self.keys = combined, keys
+
+    @staticmethod
+    def _smallest(frame: pd.DataFrame, keys: np.ndarray, size: int):
+        if len(keys) <= size:
+            return frame, keys
+        kept = np.argpartition(keys, size)[:size]
+        return frame.iloc[kept], keys[kept]
+
+    def result(self) -> pd.DataFrame:
+        return pd.DataFrame() if self.frame is None else self.frame.sort_index()
+
+
+def _csv_chunks(path: str, chunk_rows: Callable[[], int], **read_options) -> Iterator[pd.DataFrame]:
+    """Chunks of a CSV file, asking chunk_rows for the size of each."""
+    with pd.read_csv(path, chunksize=chunk_rows(), **read_options, **get_dialect(path).read_csv_kwargs()) as reader:
+        while True:
+            try:
+                yield reader.get_chunk(chunk_rows())
+            except StopIteration:
+                return
+
+
+def _chunks(
+    path: str,
+    chunk_rows: Callable[[], int],
+    usecols: Optional[List[str]],
+    nrows: Optional[int],
+    skiprows: Optional[int],
+) -> Iterator[pd.DataFrame]:
+    """Chunks of the selection, indexed by row number, from the dataset cache or the CSV file."""
+    from .dataset_cache import get_dataset_cache
+
+    cache = get_dataset_cache() if skiprows is None else None
+    frames = cache.iter_frames(path, chunk_rows, usecols) if cache is not None else None
+    if frames is None:
+        frames = _csv_chunks(path, chunk_rows, usecols=usecols, nrows=nrows, skiprows=skiprows)
+
+    position = 0
+    for frame in frames:
+        if nrows is not None and position + len(frame) > nrows:
+            frame = frame.iloc[:nrows - position]
+        frame.index = pd.RangeIndex(position, position + len(frame))
+        position += len(frame)
+        yield frame
+        if nrows is not None and position >= nrows:
+            return
+
+
+def collect_streaming(
+    path: str,
+    usecols: Optional[List[str]] = None,
+    nrows: Optional[int] = None,
+    skiprows: Optional[int] = None,
+    max_memory_mb: int = 1024,
+    sample_rows: int = 10_000,
+) -> dict:
+    """Stream a CSV selection within a memory budget.
+
+    Args:
+        path: CSV file.
+        usecols: Columns to read.
+        nrows: Rows to read.
+        skiprows: Rows to skip at the beginning.
+        max_memory_mb: Memory budget for the data held at once.
+        sample_rows: Rows kept in the sample, lowered if they would not fit
+            a quarter of the budget.
+
+    Returns:
+        {"streamed": True, "rows": rows read, "summary": column statistics
+        (see data_profile.summarize), "sample": DataFrame of sampled rows
+        indexed by row number}
+
+    Raises:
+        OSError: If the file cannot be read.
+        UnicodeDecodeError: If the file cannot be decoded.
+        ValueError: If usecols names columns the file does not have.
+    """
+    from .data_profile import profile_frames, summarize
+
+    quarter = max_memory_mb * 1024 * 1024 / 4
+    row_bytes = max(_probe(path).row_bytes(usecols), 1.0)
+    first_chunk_rows = min(int(quarter / row_bytes), PROBE_ROWS)
+    sample_rows = max(min(sample_rows, int(quarter / row_bytes)), 1)
+    logger.info(f"Streaming {path} in chunks of {first_chunk_rows} rows, keeping {sample_rows} sampled rows")
+
+    def run():
+        chunk_rows = _ChunkSize(first_chunk_rows, quarter)
+        sample = _RowSample(sample_rows, np.random.default_rng(0), max_bytes=quarter)
+
+        def sampled():
+            for frame in _chunks(path, chunk_rows, usecols, nrows, skiprows):
+                chunk_rows.observe(frame)
+                sample.add(frame)
+                yield frame
+
+        return profile_frames(sampled()), sample.result()
+
+    try:
+        profile, sample = run()
+    except UnicodeDecodeError as e:
+        # The sampled prefix decoded as utf-8 but a later chunk did not
+        use_fallback_encoding(path, e)
+        profile, sample = run()
+
+    profile["source"] = os.path.abspath(path)
+    logger.info(f"Streamed {profile['rows']} rows of {path}")
+    return {
+        "streamed": True,
+        "rows": profile["rows"],
+        "summary": summarize(profile),
+        "sample": sample,
+    }
@@ -0,0 +1,490 @@
+"""Columnar cache of CSV datasets.
+
+Parsing CSV text is the largest CPU cost of a run, and every collect_data
+call and every generated script parses the same raw files again. The first
+full read of a CSV file stores it as an uncompressed Arrow IPC file under
+WORKING_DIRECTORY/.dataset_cache/; later reads memory-map that file and
+materialize only the requested columns and rows.
+
+Entries are keyed by a hash of the source file's whole content, computed
+once per (path, size, modification time), and of the dialect it is parsed
+with, so any edit or header correction gives a new entry and copies of a
+file share one. Least recently used entries are
+evicted once the cache exceeds its size limit.
+
+Content hashes are remembered in the cache directory across runs, and a
+file whose estimated size rules out an entry is never hashed for a lookup.
+
+Needs pyarrow; without it the cache is disabled and files are parsed as
+before.
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+from ..config import WORKING_DIRECTORY
+from ..logger import setup_logger
+from .tool_config import TOOL_CONFIG
+
+logger = setup_logger(__name__)
+
+CACHE_DIRECTORY_NAME = ".dataset_cache"
+
+# Bumped when the stored layout or the key changes, so old entries are not read
+FORMAT_VERSION = 2
+
+# Bytes read at a time while hashing a source file
+HASH_BLOCK_BYTES = 1024 * 1024
+
+ENTRY_SUFFIX = ".arrow"
+
+# Source path -> (size, mtime_ns, content hash), kept across runs
+CONTENT_HASHES_FILE = "content_hashes.json"
+
+# Leading rows of a new entry read back and compared with the parsed DataFrame
+ROUND_TRIP_CHECK_ROWS = 100
+
+
+_content_hashes: Optional[Dict[str, Tuple[int, int, str]]] = None
+_content_hashes_lock = threading.Lock()
+
+
+def content_key(path: str) -> str:
+    """Content fingerprint of a source file: a hash of its whole content and its CSV dialect.
+
+    Hashing reads the file once; the content hash is remembered while the
+    file's size and modification time are unchanged. The dialect is part of
+    the key so that a corrected header guess does not serve data parsed
+    with the old one.
+    """
+    path = os.path.abspath(path)
+    content = _known_content_hash(path)
+    if content is None:
+        with open_hashing(path) as f:
+            while f.read(HASH_BLOCK_BYTES):
+                pass
+        content = _known_content_hash(path)
+    return _dialect_key(path, content)
+
+
+def known_content_key(path: str) -> Optional[str]:
+    """content_key of a source file if its content is already hashed, else None."""
+    path = os.path.abspath(path)
+    content = _known_content_hash(path)
+    return _dialect_key(path, content) if content is not None else None
+
+
+def _dialect_key(path: str, content: str) -> str:
+    from .csv_dialect import get_dialect
+
+    return hashlib.sha256(f"{content}:{get_dialect(path)!r}".encode("utf-8")).hexdigest()
+
+
+class _HashingFile(io.RawIOBase):
+    """Source file read once from start to end, hashing what is read.
+
+    Reaching the end remembers the hash, unless the file changed meanwhile.
+    """
+
+    def __init__(self, path: str):
+        self._path = os.path.abspath(path)
+        self._file = open(self._path, "rb")
+        stat = os.fstat(self._file.fileno())
+        self._identity = (stat.st_size, stat.st_mtime_ns)
+        self._digest = hashlib.sha256(f"v{FORMAT_VERSION}:{stat.st_size}".encode("ascii"))
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self._file.readinto(buffer)
+        if count:
+            self._digest.update(memoryview(buffer)[:count])
+        elif self._digest is not None:
+            stat = os.stat(self._path)
+            if (stat.st_size, stat.st_mtime_ns) == self._identity:
+                _remember_content_hash(self._path, *self._identity, self._digest.hexdigest())
+            self._digest = None
+        return count
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+def open_hashing(path: str) -> io.BufferedReader:
+    """Open a source file for one sequential binary read that also computes its content hash.
+
+    Reading it to the end makes content_key of the file free, so a full
+    parse can stand in for the separate hashing pass.
+    """
+    return io.BufferedReader(_HashingFile(path), HASH_BLOCK_BYTES)
+
+
+def _hashes_path() -> str:
+    return os.path.join(os.path.abspath(WORKING_DIRECTORY), CACHE_DIRECTORY_NAME, CONTENT_HASHES_FILE)
+
+
+def _load_content_hashes() -> Dict[str, Tuple[int, int, str]]:
+    """Remembered content hashes, read from the cache directory on first use; hold _content_hashes_lock."""
+    global _content_hashes
+    if _content_hashes is None:
+        _content_hashes = {}
+        try:
+            with open(_hashes_path(), encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("version") == FORMAT_VERSION:
+                _content_hashes = {
+                    path: (size, mtime_ns, digest) for path, (size, mtime_ns, digest) in stored["files"].items()
+                }
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable content hashes {_hashes_path()}: {e}")
+    return _content_hashes
+
+
+def _known_content_hash(path: str) -> Optional[str]:
+    stat = os.stat(path)
+    with _content_hashes_lock:
+        known = _load_content_hashes().get(path)
+    if known is None or known[:2] != (stat.st_size, stat.st_mtime_ns):
+        return None
+    return known[2]
+
+
+def _remember_content_hash(path: str, size: int, mtime_ns: int, digest: str) -> None:
+    """Remember a file's content hash, also in the cache directory; files that are gone are dropped."""
+    with _content_hashes_lock:
+        hashes = _load_content_hashes()
+        hashes[path] = (size, mtime_ns, digest)
+        for stale in [known for known in hashes if not os.path.exists(known)]:
+            del hashes[stale]
+        target = _hashes_path()
+        staging = f"{target}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(staging, "w", encoding="utf-8") as f:
+                json.dump({"version": FORMAT_VERSION, "files": hashes}, f)
+            os.replace(staging, target)
+        except OSError as e:
+            logger.warning(f"Could not store content hashes {target}: {e}")
+        finally:
+            if os.path.exists(staging):
+                os.remove(staging)
+
+
+def _import_pyarrow():
+    """pyarrow and pyarrow.ipc, or None if pyarrow is not installed."""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _select(table, usecols: Optional[List[str]]):
+    """Columns of an Arrow table like pd.read_csv(usecols=...), which keeps the file's column order."""
+    if usecols is None:
+        return table
+    missing = [column for column in usecols if column not in table.column_names]
+    if missing:
+        raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing}")
+    return table.select([column for column in table.column_names if column in usecols])
+
+
+class DatasetCache:
+    """Arrow IPC copies of CSV files, keyed by content fingerprint."""
+
+    def __init__(self, working_directory: str, max_size_mb: int):
+        """Initialize the cache.
+
+        Args:
+            working_directory: Directory holding the cache directory.
+            max_size_mb: Total size of stored datasets before eviction.
+        """
+        self.cache_directory = os.path.join(os.path.abspath(working_directory), CACHE_DIRECTORY_NAME)
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        # Keys being converted in the background, or that could not be converted
+        self._converting: Set[str] = set()
+        self._unconvertible: Set[str] = set()
+
+    # === Keys ===
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_directory, key + ENTRY_SUFFIX)
+
+    def cached_path(self, path: str) -> Optional[str]:
+        """Path of the columnar copy of a source file, if it is cached.
+
+        Files too large to be stored are not hashed to look them up.
+        """
+        if not self._may_hold(path):
+            return None
+        entry = self._entry_path(content_key(path))
+        return entry if os.path.exists(entry) else None
+
+    def _may_hold(self, path: str) -> bool:
+        """Whether a source file is small enough to be stored, by its estimated memory.
+
+        The estimate depends only on the file and its dialect, so a file
+        ruled out here never has an entry.
+        """
+        from .data_stream import estimate_memory_bytes
+
+        limit = min(TOOL_CONFIG.data_collection.max_memory_mb * 1024 * 1024, self.max_size_bytes)
+        return estimate_memory_bytes(path) <= limit
+
+    # === Reading ===
+
+    def read(self, path: str, usecols: Optional[List[str]] = None, nrows: Optional[int] = None):
+        """Read a cached dataset like pd.read_csv(path, usecols=..., nrows=...).
+
+        Returns:
+            The DataFrame, or None if the file is not cached.
+
+        Raises:
+            ValueError: If usecols names columns the file does not have.
+        """
+        pa = _import_pyarrow()
+        entry = self.cached_path(path)
+        if pa is None or entry is None:
+            return None
+        try:
+            with pa.memory_map(entry, "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+                if nrows is not None:
+                    table = table.slice(0, nrows)
+                data = _select(table, usecols).to_pandas()
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.warning(f"Discarding unreadable dataset cache entry {entry}: {e}")
+            self._remove(entry)
+            return None
+        self._touch(entry)
+        logger.info(f"Read {path} from dataset cache ({len(data)} rows, {len(data.columns)} columns)")
+        return data
+
+    def iter_frames(
+        self,
+        path: str,
+        batch_rows: Union[int, Callable[[], int]],
+        usecols: Optional[List[str]] = None,
+    ):
+        """DataFrames of batch_rows rows each from a cached dataset, or None if it is not cached.
+
+        batch_rows may be a callable, asked before each batch, so the caller
+        can change the batch size while iterating.
+
+        Raises:
+            ValueError: While iterating, if usecols names columns the file does not have.
+        """
+        pa = _import_pyarrow()
+        entry = self.cached_path(path)
+        if pa is None or entry is None:
+            return None
+        self._touch(entry)
+
+        def frames():
+            with pa.memory_map(entry, "r") as source:
+                table = _select(pa.ipc.open_file(source).read_all(), usecols)
+                offset = 0
+                while True:
+                    rows = batch_rows() if callable(batch_rows) else batch_rows
+                    yield table.slice(offset, rows).to_pandas()
+                    offset += rows
+                    if offset >= table.num_rows:
+                        return
+
+        return frames()
+
+    # === Storing ===
+
+    def store(self, path: str, data) -> Optional[str]:
+        """Store a fully read DataFrame of a source file.
+
+        Returns:
+            Path of the stored entry, or None if it cannot be stored.
+        """
+        pa = _import_pyarrow()
+        if pa is None:
+            return None
+        if not self._may_hold(path):
+            logger.info(f"Not caching {path}: too large for the dataset cache or data_collection.max_memory_mb")
+            return None
+        key = content_key(path)
+        if key in self._unconvertible:
+            return None
+        if not all(isinstance(column, str) for column in data.columns):
+            # Arrow stores column names as strings, e.g. 0, 1, 2 of a headerless file
+            logger.info(f"Not caching {path}: column names are not all strings")
+            self._unconvertible.add(key)
+            return None
+        try:
+            table = pa.Table.from_pandas(data, preserve_index=False)
+            round_trip = table.slice(0, ROUND_TRIP_CHECK_ROWS).to_pandas()
+        except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError, TypeError) as e:
+            # e.g. object columns mixing numbers and strings
+            logger.info(f"Not caching {path} as Arrow: {e}")
+            self._unconvertible.add(key)
+            return None
+        if not round_trip.equals(data.head(ROUND_TRIP_CHECK_ROWS)):
+            logger.info(f"Not caching {path}: the Arrow copy does not read back as the parsed data")
+            self._unconvertible.add(key)
+            return None
+
+        size = table.nbytes
+        if size > self.max_size_bytes:
+            logger.info(f"Not caching {path}: {size} bytes exceeds the dataset cache size")
+            self._unconvertible.add(key)
+            return None
+
+        os.makedirs(self.cache_directory, exist_ok=True)
+        entry = self._entry_path(key)
+        staging = f"{entry}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with pa.OSFile(staging, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(staging, entry)
+        except OSError as e:
+            logger.warning(f"Could not cache {path}: {e}")
+            return None
+        finally:
+            if os.path.exists(staging):
+                os.remove(staging)
+
+        self._evict(keep=entry)
+        logger.info(f"Cached {path} as {entry} ({os.path.getsize(entry)} bytes)")
+        return entry
+
+    def convert(self, path: str) -> Optional[str]:
+        """Parse a source file completely and store it; returns the entry path or None.
+
+        Files too large to load within the data collection memory budget, or
+        to fit in the cache, are not converted.
+        """
+        from .csv_dialect import read_csv
+
+        entry = self.cached_path(path)
+        if entry is not None:
+            return entry
+        if not self._may_hold(path):
+            logger.info(f"Not caching {path}: too large for the dataset cache or data_collection.max_memory_mb")
+            return None
+        return self.store(path, read_csv(path))
+
+    def convert_in_background(self, path: str) -> None:
+        """Start converting a source file in a daemon thread, unless already cached or converting."""
+        if not self._may_hold(path):
+            return
+        key = content_key(path)
+        with self._lock:
+            if key in self._converting or key in self._unconvertible or os.path.exists(self._entry_path(key)):
+                return
+            self._converting.add(key)
+
+        def run():
+            try:
+                self.convert(path)
+            except Exception as e:
+                logger.warning(f"Background conversion of {path} failed: {e}")
+                self._unconvertible.add(key)
+            finally:
+                with self._lock:
+                    self._converting.discard(key)
+
+        threading.Thread(target=run, name="dataset-cache-convert", daemon=True).start()
+
+    # === Eviction ===
+
+    def _entries(self) -> List[Tuple[str, int, float]]:
+        """(path, size, last used) of every stored entry."""
+        entries = []
+        try:
+            names = os.listdir(self.cache_directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            entry = os.path.join(self.cache_directory, name)
+            try:
+                stat = os.stat(entry)
+            except OSError:
+                continue
+            entries.append((entry, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self, keep: str) -> None:
+        """Remove least recently used entries until under the size limit."""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            for entry, size, _ in sorted(entries, key=lambda item: item[2]):
+                if total <= self.max_size_bytes:
+                    break
+                if entry == keep:
+                    continue
+                self._remove(entry)
+                total -= size
+                logger.debug(f"Evicted dataset cache entry {entry}")
+
+    @staticmethod
+    def _touch(entry: str) -> None:
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(entry: str) -> None:
+        try:
+            os.remove(entry)
+        except OSError:
+            pass
+
+
+_default_cache: Optional[DatasetCache] = None
+_default_cache_lock = threading.Lock()
+_pyarrow_missing = False
+
+
+def get_dataset_cache() -> Optional[DatasetCache]:
+    """Get the default DatasetCache singleton.
+
+    Returns:
+        DatasetCache configured from TOOL_CONFIG.dataset_cache, or None if it
+        is disabled or pyarrow is not installed.
+    """
+    global _default_cache, _pyarrow_missing
+    if not TOOL_CONFIG.dataset_cache.enabled or _pyarrow_missing:
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                if _import_pyarrow() is None:
+                    logger.info("pyarrow is not installed; dataset cache disabled")
+                    _pyarrow_missing = True
+                    return None
+                _default_cache = DatasetCache(WORKING_DIRECTORY, TOOL_CONFIG.dataset_cache.max_size_mb)
+    return _default_cache
+
+
+def cached_dataset_path(path: str) -> Optional[str]:
+    """Path of the Arrow IPC copy of a CSV file, converting it first if needed.
+
+    Scripts can read the returned file with pd.read_feather(path, columns=[...])
+    or pyarrow. Returns None if the dataset cache is unavailable or the file
+    cannot be stored as Arrow.
+    """
+    cache = get_dataset_cache()
+    if cache is None:
+        return None
+    return cache.convert(path)
@@ -0,0 +1,355 @@
+"""Content-addressed cache of successful execute_code runs.
+
+When an agent resubmits byte-identical code against unchanged inputs (e.g.
+after a review that only asked for wording changes), the stored output is
+returned and the files the run produced are restored instead of running the
+script again.
+
+A run is identified by:
+- the code,
+- the interpreter identity (conda env, interpreter path, and modification
+  times of its site-packages / conda-meta directories, which change when
+  packages are installed),
+- fingerprints (size, modification time) of the files and directories the
+  code names in string literals, found by parsing the code.
+
+Files the code locates in other ways (computed paths, globbing) are not
+fingerprinted, which is why the cache is opt-in.
+
+Produced files are found by diffing working-directory snapshots taken before
+and after the run, which cannot tell apart files written by other
+executions running at the same time. Executions in this process are
+therefore tracked (track_execution), and a run that overlaps another one
+neither uses nor stores an entry.
+
+Layout (under WORKING_DIRECTORY/.execution_cache):
+    <key>/meta.json    output, produced files, size
+    <key>/files/...    copies of the produced files
+
+Entries are evicted least recently used first once the cache exceeds its
+size limit.
+"""
+
+import ast
+import glob
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from ..config import CONDA_DIRECT_EXEC, CONDA_ENV, WORKING_DIRECTORY
+from ..logger import setup_logger
+from .conda_env import resolve_conda_env
+from .tool_config import TOOL_CONFIG
+
+logger = setup_logger(__name__)
+
+CACHE_DIRECTORY_NAME = ".execution_cache"
+
+# Working-directory entries never treated as produced files
+_SNAPSHOT_EXCLUDED_DIRS = {CACHE_DIRECTORY_NAME, "execution_logs", "__pycache__"}
+
+# Longest string literal considered as a possible path
+_MAX_PATH_LITERAL_CHARS = 4096
+
+# (size, mtime_ns) of every file under the working directory, by relative path
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def literal_paths(code: str, working_directory: str) -> set:
+    """Existing files and directories named by string literals in the code.
+
+    Relative literals are resolved against the working directory, which
+    itself is never included (the script is rewritten there on every run).
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return set()
+    working_directory = os.path.abspath(working_directory)
+    paths = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Constant) or not isinstance(node.value, str):
+            continue
+        value = node.value.strip()
+        if not value or len(value) > _MAX_PATH_LITERAL_CHARS or "\n" in value or "\0" in value:
+            continue
+        path = os.path.normpath(os.path.join(working_directory, os.path.expanduser(value)))
+        if path != working_directory and os.path.exists(path):
+            paths.add(path)
+    return paths
+
+
+@dataclass(eq=False)
+class TrackedExecution:
+    """An execution running in the working directory.
+
+    Attributes:
+        overlapped: Whether another execution ran at the same time.
+    """
+    overlapped: bool = False
+
+
+_in_flight: Set[TrackedExecution] = set()
+_in_flight_lock = threading.Lock()
+
+
+@contextmanager
+def track_execution() -> Iterator[TrackedExecution]:
+    """Count an execution as in flight for the duration of the block.
+
+    Executions running at the same time mark each other as overlapped: the
+    files they produce cannot be told apart by a snapshot diff.
+    """
+    execution = TrackedExecution()
+    with _in_flight_lock:
+        if _in_flight:
+            execution.overlapped = True
+            for other in _in_flight:
+                other.overlapped = True
+        _in_flight.add(execution)
+    try:
+        yield execution
+    finally:
+        with _in_flight_lock:
+            _in_flight.discard(execution)
+
+
+@dataclass
+class CachedExecution:
+    """A stored run.
+
+    Attributes:
+        stdout: Captured stdout of the original run.
+        stderr: Captured stderr of the original run.
+        files: Produced files, relative to the working directory.
+    """
+    stdout: str
+    stderr: str
+    files: List[str] = field(default_factory=list)
+
+
+class ExecutionCache:
+    """Disk cache of successful runs, keyed by code, interpreter and inputs."""
+
+    def __init__(self, working_directory: str, max_size_mb: int):
+        """Initialize the cache.
+
+        Args:
+            working_directory: Directory scripts run in; produced files are
+                looked for and restored here.
+            max_size_mb: Total size of stored entries before eviction.
+        """
+        self.working_directory = os.path.abspath(working_directory)
+        self.cache_directory = os.path.join(self.working_directory, CACHE_DIRECTORY_NAME)
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        # key -> (size in bytes, last used)
+        self._index: Optional[Dict[str, Tuple[int, float]]] = None
+
+    # === Keys ===
+
+    def key_for(self, code: str) -> str:
+        """Cache key of running `code` with the current interpreter and inputs."""
+        digest = hashlib.sha256()
+        digest.update(code.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(json.dumps(self._interpreter_identity()).encode("utf-8"))
+        for path in sorted(self._input_paths(code)):
+            digest.update(b"\0")
+            digest.update(json.dumps(self._fingerprint(path)).encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _interpreter_identity() -> list:
+        conda_env = resolve_conda_env(CONDA_ENV) if CONDA_DIRECT_EXEC else None
+        if conda_env is None:
+            return [CONDA_ENV, "conda run"]
+
+        prefix = conda_env.environ.get("CONDA_PREFIX") or os.path.dirname(os.path.dirname(conda_env.python))
+        watched = [conda_env.python, os.path.join(prefix, "conda-meta")]
+        watched += glob.glob(os.path.join(prefix, "lib", "python*", "site-packages"))
+        watched += glob.glob(os.path.join(prefix, "Lib", "site-packages"))
+        identity = [CONDA_ENV, conda_env.python]
+        for path in watched:
+            try:
+                identity.append([path, os.stat(path).st_mtime_ns])
+            except OSError:
+                pass
+        return identity
+
+    def _input_paths(self, code: str) -> set:
+        """Existing files and directories named by string literals in the code."""
+        return {path for path in literal_paths(code, self.working_directory) if not self._is_cache_path(path)}
+
+    @staticmethod
+    def _fingerprint(path: str) -> list:
+        """Size and modification time of a file, or of a directory's files."""
+        if os.path.isdir(path):
+            entries = []
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        entries.append([entry.name, stat.st_size, stat.st_mtime_ns])
+            return [path, sorted(entries)]
+        stat = os.stat(path)
+        return [path, stat.st_size, stat.st_mtime_ns]
+
+    def _is_cache_path(self, path: str) -> bool:
+        return path == self.cache_directory or path.startswith(self.cache_directory + os.sep)
+
+    # === Produced files ===
+
+    def snapshot(self) -> Snapshot:
+        """Record the files in the working directory, to diff after a run."""
+        snapshot: Snapshot = {}
+        for root, dirs, files in os.walk(self.working_directory):
+            dirs[:] = [d for d in dirs if d not in _SNAPSHOT_EXCLUDED_DIRS and not d.startswith(".")]
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[os.path.relpath(path, self.working_directory)] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def _produced_files(self, before: Snapshot, exclude: List[str]) -> List[str]:
+        after = self.snapshot()
+        return sorted(
+            path for path, state in after.items()
+            if before.get(path) != state and path not in exclude
+        )
+
+    # === Lookup and store ===
+
+    def lookup(self, key: str) -> Optional[CachedExecution]:
+        """Return a stored run and restore its produced files, or None."""
+        entry = os.path.join(self.cache_directory, key)
+        try:
+            with open(os.path.join(entry, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            for rel_path in meta["files"]:
+                target = os.path.join(self.working_directory, rel_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(os.path.join(entry, "files", rel_path), target)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable execution cache entry {key}: {e}")
+            self._remove(key)
+            return None
+
+        with self._lock:
+            index = self._load_index()
+            if key in index:
+                index[key] = (index[key][0], time.time())
+        try:
+            os.utime(os.path.join(entry, "meta.json"))
+        except OSError:
+            pass
+        logger.info(f"Execution cache hit {key[:12]}; restored {len(meta['files'])} file(s)")
+        return CachedExecution(stdout=meta["stdout"], stderr=meta["stderr"], files=meta["files"])
+
+    def store(self, key: str, stdout: str, stderr: str, before: Snapshot, exclude: List[str]) -> None:
+        """Store a successful run and the files it produced.
+
+        Args:
+            key: Key from key_for().
+            stdout: Captured stdout.
+            stderr: Captured stderr.
+            before: Snapshot taken before the run.
+            exclude: Paths (relative to the working directory) not to store,
+                e.g. the script itself.
+        """
+        files = self._produced_files(before, exclude)
+        size = len(stdout) + len(stderr)
+        for rel_path in files:
+            size += os.path.getsize(os.path.join(self.working_directory, rel_path))
+        if size > self.max_size_bytes:
+            logger.info(f"Not caching run {key[:12]}: {size} bytes exceeds the cache size")
+            return
+
+        os.makedirs(self.cache_directory, exist_ok=True)
+        staging = os.path.join(self.cache_directory, f".{key}.{uuid.uuid4().hex[:8]}")
+        try:
+            for rel_path in files:
+                target = os.path.join(staging, "files", rel_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(os.path.join(self.working_directory, rel_path), target)
+            os.makedirs(staging, exist_ok=True)
+            with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"stdout": stdout, "stderr": stderr, "files": files, "size": size}, f)
+            entry = os.path.join(self.cache_directory, key)
+            if os.path.exists(entry):
+                self._remove(key)
+            os.rename(staging, entry)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        with self._lock:
+            self._load_index()[key] = (size, time.time())
+            self._evict()
+        logger.info(f"Cached run {key[:12]} ({size} bytes, {len(files)} file(s))")
+
+    # === Eviction ===
+
+    def _load_index(self) -> Dict[str, Tuple[int, float]]:
+        """Sizes and last-use times of stored entries (call with the lock held)."""
+        if self._index is None:
+            self._index = {}
+            try:
+                names = os.listdir(self.cache_directory)
+            except FileNotFoundError:
+                names = []
+            for name in names:
+                meta_path = os.path.join(self.cache_directory, name, "meta.json")
+                try:
+                    with open(meta_path, encoding="utf-8") as f:
+                        size = json.load(f)["size"]
+                    self._index[name] = (size, os.path.getmtime(meta_path))
+                except (OSError, ValueError, KeyError):
+                    continue
+        return self._index
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until under the size limit (lock held)."""
+        index = self._load_index()
+        total = sum(size for size, _ in index.values())
+        for key, (size, _) in sorted(index.items(), key=lambda item: item[1][1]):
+            if total <= self.max_size_bytes:
+                break
+            self._remove(key)
+            index.pop(key, None)
+            total -= size
+            logger.debug(f"Evicted execution cache entry {key[:12]}")
+
+    def _remove(self, key: str) -> None:
+        shutil.rmtree(os.path.join(self.cache_directory, key), ignore_errors=True)
+
+    def clear(self) -> None:
+        """Remove every stored run."""
+        with self._lock:
+            shutil.rmtree(self.cache_directory, ignore_errors=True)
+            self._index = None
+
+
+_default_cache: Optional[ExecutionCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_execution_cache() -> ExecutionCache:
+    """Get the default ExecutionCache singleton (configured from TOOL_CONFIG.execution_cache)."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ExecutionCache(WORKING_DIRECTORY, TOOL_CONFIG.execution_cache.max_size_mb)
+    return _default_cache
@@ -1,49 +1,111 @@
-from typing import Any, Dict, List, Optional
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Optional
 from langchain.tools import BaseTool
 
-from .basetool import execute_code, execute_command, list_directory
-from .FileEdit import create_document, read_document, edit_document, collect_data
-from .internet import google_search, scrape_webpages
 from ..logger import setup_logger
 
-from langchain_community.tools import WikipediaQueryRun
-from langchain_community.utilities import WikipediaAPIWrapper
-from langchain_community.agent_toolkits.load_tools import load_tools
+logger = setup_logger(__name__)
 
-logger = setup_logger()
+ToolBuilder = Callable[[], Optional[BaseTool]]
+
+
+def _module_tool(module: str, attr: str) -> ToolBuilder:
+    """Create a builder that imports a tool object from a sibling module.
+
+    Args:
+        module: Module name relative to this package (e.g. ".basetool").
+        attr: Name of the tool object in that module.
+
+    Returns:
+        Zero-argument callable returning the tool instance.
+    """
+    def build() -> BaseTool:
+        return getattr(importlib.import_module(module, __package__), attr)
+    return build
+
+
+def _build_wikipedia() -> BaseTool:
+    """Build the Wikipedia query tool."""
+    from langchain_community.tools import WikipediaQueryRun
+    from langchain_community.utilities import WikipediaAPIWrapper
 
-# Initialize complex tools
-try:
     api_wrapper = WikipediaAPIWrapper(wiki_client=None)
-    wikipedia = WikipediaQueryRun(api_wrapper=api_wrapper)
-except Exception as e:
-    logger.warning(f"Failed to initialize Wikipedia tool: {e}")
-    wikipedia = None
+    return WikipediaQueryRun(api_wrapper=api_wrapper)
+
+
+def _build_arxiv() -> Optional[BaseTool]:
+    """Build the Arxiv query tool."""
+    from langchain_community.agent_toolkits.load_tools import load_tools
 
-try:
     arxiv_tools = load_tools(["arxiv"])
-    arxiv = arxiv_tools[0] if arxiv_tools else None
-except Exception as e:
-    logger.warning(f"Failed to initialize Arxiv tool: {e}")
-    arxiv = None
+    return arxiv_tools[0] if arxiv_tools else None
 
 class ToolFactory:
-    """Factory for creating and retrieving tool instances by name."""
-
-    _registry = {
-        "execute_code": execute_code,
-        "execute_command": execute_command,
-        "list_directory": list_directory,
-        "create_document": create_document,
-        "read_document": read_document,
-        "edit_document": edit_document,
-        "collect_data": collect_data,
-        "google_search": google_search,
-        "scrape_webpages": scrape_webpages,
-        "wikipedia": wikipedia,
-        "arxiv": arxiv,
+    """Factory for creating and retrieving tool instances by name.
+
+    The registry maps tool names to builders rather than instances. A tool
+    (and the modules it depends on) is only imported and constructed the
+    first time it is requested, then memoized for later lookups.
+    """
+
+    _registry: Dict[str, ToolBuilder] = {
+        "execute_code": _module_tool(".basetool", "execute_code"),
+        "execute_code_batch": _module_tool(".basetool", "execute_code_batch"),
+        "execute_command": _module_tool(".basetool", "execute_command"),
+        "list_directory": _module_tool(".basetool", "list_directory"),
+        "restart_kernel": _module_tool(".basetool", "restart_kernel"),
+        "create_document": _module_tool(".FileEdit", "create_document"),
+        "read_document": _module_tool(".FileEdit", "read_document"),
+        "edit_document": _module_tool(".FileEdit", "edit_document"),
+        "collect_data": _module_tool(".FileEdit", "collect_data"),
+        "dataset_path": _module_tool(".FileEdit", "dataset_path"),
+        "profile_data": _module_tool(".FileEdit", "profile_data"),
+        "query_data": _module_tool(".FileEdit", "query_data"),
+        "google_search": _module_tool(".internet", "google_search"),
+        "scrape_webpages": _module_tool(".internet", "scrape_webpages"),
+        "wikipedia": _build_wikipedia,
+        "arxiv": _build_arxiv,
     }
 
+    # Memoized tool instances (None records a failed build)
+    _instances: Dict[str, Optional[BaseTool]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def register_tool(cls, tool_name: str, builder: ToolBuilder) -> None:
+        """Register a tool builder under the given name.
+
+        Args:
+            tool_name: The name agents use to reference the tool.
+            builder: Zero-argument callable returning the tool instance.
+        """
+        with cls._lock:
+            cls._registry[tool_name] = builder
+            cls._instances.pop(tool_name, None)
+
+    @classmethod
+    def _build_tool(cls, tool_name: str) -> Optional[BaseTool]:
+        """Build and memoize a registered tool.
+
+        Args:
+            tool_name: The name of the tool to build.
+
+        Returns:
+            The tool instance, or None if the builder failed.
+        """
+        with cls._lock:
+            if tool_name in cls._instances:
+                return cls._instances[tool_name]
+            try:
+                tool = cls._registry[tool_name]()
+                logger.debug(f"Initialized tool: {tool_name}")
+            except Exception as e:
+                logger.warning(f"Failed to initialize {tool_name} tool: {e}")
+                tool = None
+            cls._instances[tool_name] = tool
+            return tool
+
     @classmethod
     def get_tool(cls, tool_name: str) -> Optional[BaseTool]:
         """Get a tool instance by name.
@@ -54,10 +116,16 @@ class ToolFactory:
         Returns:
             The tool instance or None if not found.
         """
-        tool = cls._registry.get(tool_name)
-        if not tool:
+        if tool_name not in cls._registry:
             logger.warning(f"Tool not found in registry: {tool_name}")
             return None
+
+        tool = cls._instances.get(tool_name)
+        if tool is None:
+            tool = cls._build_tool(tool_name)
+        if not tool:
+            logger.warning(f"Tool not available: {tool_name}")
+            return None
         return tool
 
     @classmethod
@@ -0,0 +1,425 @@
+"""Incremental re-execution of scripts from forked checkpoints.
+
+Coder iterations usually change only the end of a script and keep the same
+loading and preprocessing at the top. In incremental mode execute_code splits
+the script into cells and runs them in a CheckpointKernel, which keeps a
+paused, forked copy of the interpreter after each cell (copy-on-write, so
+unchanged memory is shared). The next script resumes from the deepest
+checkpoint whose cells are unchanged and only runs the rest; the recorded
+output of the reused cells is replayed so the result reads like a full run.
+
+Cells are delimited by `# %%` lines. Scripts without markers are split into
+groups of top-level statements separated by blank lines.
+
+A cell counts as unchanged if its code, the code of every cell before it and
+the size and modification time of the files its string literals name are
+unchanged. The last cell always runs again, so the script produces its
+output. Like the persistent kernel, a checkpoint keeps the interpreter state
+only: files written by later cells stay as they are.
+
+Checkpoints are POSIX only (fork). Forking a process that runs threads (e.g.
+GPU runtimes) may leave the copy unusable; use stateless execution for such
+scripts.
+"""
+
+import ast
+import atexit
+import hashlib
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from ..config import WORKING_DIRECTORY
+from ..logger import setup_logger
+from .execution_cache import literal_paths
+from .kernel import Kernel, KernelError, KernelManager, KernelUnavailableError, WORKER_SCRIPT
+from .output_capture import OutputCapture, StreamCapture
+from .tool_config import TOOL_CONFIG
+
+logger = setup_logger(__name__)
+
+# Only markers at the start of a line count, so that indented or quoted
+# text cannot split a statement
+CELL_MARKER = re.compile(r"^#\s*%%")
+
+
+@dataclass
+class Cell:
+    """One cell of a script.
+
+    Attributes:
+        code: Source of the cell.
+        line: Line of the script the cell starts at (1-based).
+    """
+    code: str
+    line: int
+
+
+def split_cells(code: str) -> List[Cell]:
+    """Split a script into cells at `# %%` lines, or else at blank-line separated statement groups.
+
+    Scripts that do not parse are returned as a single cell, so the syntax
+    error is reported as usual.
+    """
+    lines = code.splitlines(keepends=True)
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return [Cell(code, 1)]
+
+    markers = [index for index, line in enumerate(lines) if CELL_MARKER.match(line)]
+    if markers:
+        cells = _cells_at(lines, [0] + markers)
+        if all(_parses(cell.code) for cell in cells):
+            return cells
+    return _cells_at(lines, _statement_group_starts(tree, lines))
+
+
+def _parses(code: str) -> bool:
+    try:
+        ast.parse(code)
+    except SyntaxError:
+        return False
+    return True
+
+
+def _cells_at(lines: List[str], starts: List[int]) -> List[Cell]:
+    """Cells beginning at the given line indexes, without blank ones."""
+    starts = sorted(set(starts))
+    cells = []
+    for start, end in zip(starts, starts[1:] + [len(lines)]):
+        code = "".join(lines[start:end])
+        if code.strip():
+            cells.append(Cell(code, start + 1))
+    return cells or [Cell("".join(lines), 1)]
+
+
+def _statement_group_starts(tree: ast.Module, lines: List[str]) -> List[int]:
+    """Line indexes where a blank line separates top-level statements.
+
+    Comment lines directly above a statement start the group with it.
+    """
+    starts = [0]
+    previous_end = 0
+    for node in tree.body:
+        first = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])]) - 1
+        start = first
+        while start > previous_end and lines[start - 1].lstrip().startswith("#"):
+            start -= 1
+        if previous_end and any(not line.strip() for line in lines[previous_end:start]):
+            starts.append(start)
+        previous_end = node.end_lineno
+    return starts
+
+
+def cell_hashes(cells: List[Cell], working_directory: str) -> List[str]:
+    """Chained hash of each cell: its code, its input files and every cell before it."""
+    hashes = []
+    previous = ""
+    for cell in cells:
+        digest = hashlib.sha256()
+        digest.update(previous.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(cell.code.encode("utf-8"))
+        for path in sorted(literal_paths(cell.code, working_directory)):
+            # Directories are left out: scripts typically write into the ones they name
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                digest.update(b"\0")
+                digest.update(json.dumps([path, stat.st_size, stat.st_mtime_ns]).encode("utf-8"))
+        previous = digest.hexdigest()
+        hashes.append(previous)
+    return hashes
+
+
+class CheckpointKernel(Kernel):
+    """A kernel that runs scripts cell by cell and resumes them from forked checkpoints.
+
+    The worker process itself is the checkpoint of the empty state (depth 0);
+    the checkpoint at depth N holds the state after the first N cells.
+    """
+
+    def __init__(self, kernel_id: str, cwd: str, interrupt_grace_seconds: int = 5, max_checkpoints: int = 8):
+        """Initialize the kernel; the process starts on first use.
+
+        Args:
+            kernel_id: Identifier of the owning run.
+            cwd: Working directory of the worker.
+            interrupt_grace_seconds: Seconds a cell gets to stop after SIGINT.
+            max_checkpoints: Checkpoints kept besides the empty state; the
+                deepest ones are kept.
+        """
+        super().__init__(kernel_id, cwd, interrupt_grace_seconds)
+        self.max_checkpoints = max(max_checkpoints, 1)
+        self._directory: Optional[str] = None
+        # depth -> (cell hash, pid of the paused process)
+        self._checkpoints: Dict[int, Tuple[str, int]] = {}
+        # depth -> (cell hash, stdout, stderr) of the cell's last run, for replay;
+        # kept within the output limits like any run's output
+        self._cell_output: Dict[int, Tuple[str, str, str]] = {}
+        self._recording: Dict[int, Tuple[StreamCapture, StreamCapture]] = {}
+        self._running_pid: Optional[int] = None
+        self._done: Optional[dict] = None
+
+    def start(self) -> None:
+        """Start the worker in checkpoint mode. See Kernel.start.
+
+        Raises:
+            KernelUnavailableError: Without fork() and FIFOs (Windows) or conda env.
+            KernelError: If the worker fails to start.
+        """
+        if not hasattr(os, "fork") or not hasattr(os, "mkfifo"):
+            raise KernelUnavailableError("Incremental execution needs fork() and FIFOs (POSIX only)")
+        self._remove_directory()
+        self._directory = tempfile.mkdtemp(prefix="kernel-checkpoints-")
+        self._checkpoints = {}
+        self._cell_output = {}
+        self._running_pid = None
+        super().start()
+        self._checkpoints[0] = ("", self._process.pid)
+
+    def _worker_command(self, python: str) -> List[str]:
+        return [python, "-u", WORKER_SCRIPT, "--checkpoints", self._directory]
+
+    def _execute(
+        self,
+        code: str,
+        filename: str,
+        timeout: Optional[int],
+        progress_timeout: Optional[int],
+        memory_mb: Optional[int],
+        capture: OutputCapture,
+    ) -> subprocess.CompletedProcess:
+        cells = split_cells(code)
+        hashes = cell_hashes(cells, self.cwd)
+        self._discard_events()
+        self._cell_counter += 1
+        cell_id = self._cell_counter
+
+        while True:
+            reused = self._resume_depth(hashes)
+            request = {
+                "id": cell_id,
+                "filename": filename,
+                "memory_mb": memory_mb,
+                "cells": self._cell_requests(cells, hashes, reused),
+            }
+            try:
+                self._send_to_checkpoint(reused, request)
+                break
+            except OSError as e:
+                if reused == 0:
+                    self.kill()
+                    raise KernelError(f"Kernel {self.kernel_id} is not accepting input: {e}")
+                logger.warning(f"Checkpoint {reused} of kernel {self.kernel_id} is gone: {e}")
+                self._drop_checkpoint(reused)
+
+        self._replay_output(reused, hashes, capture)
+        self._recording = {}
+        self._done = None
+        try:
+            result = self._wait_for_cell(cell_id, filename, timeout, progress_timeout, capture)
+        finally:
+            self._running_pid = None
+            self._store_output(hashes)
+
+        executed = (self._done or {}).get("executed", len(cells) - reused)
+        result.cells = {
+            "cells": len(cells),
+            "reused": list(range(1, reused + 1)),
+            "executed": list(range(reused + 1, reused + executed + 1)),
+        }
+        logger.info(f"Kernel {self.kernel_id}: reused {reused} of {len(cells)} cells, ran {executed}")
+        return result
+
+    def _resume_depth(self, hashes: List[str]) -> int:
+        """Pick the deepest matching checkpoint and discard those that cannot be reused.
+
+        The last cell always runs again, so the deepest usable depth is
+        len(hashes) - 1.
+        """
+        reused = max(
+            depth for depth, (digest, _) in self._checkpoints.items()
+            if depth < len(hashes) and (depth == 0 or digest == hashes[depth - 1])
+        )
+        # Deeper checkpoints belong to changed cells (or are about to be replaced)
+        for depth in [depth for depth in self._checkpoints if depth > reused]:
+            self._drop_checkpoint(depth)
+        for depth in [depth for depth in self._cell_output if depth > reused]:
+            del self._cell_output[depth]
+
+        # Room for the new checkpoints: the deepest ones win
+        new = min(len(hashes) - reused, self.max_checkpoints)
+        kept = sorted(depth for depth in self._checkpoints if depth > 0)
+        for depth in kept[:max(len(kept) - (self.max_checkpoints - new), 0)]:
+            self._drop_checkpoint(depth)
+        return reused
+
+    def _cell_requests(self, cells: List[Cell], hashes: List[str], reused: int) -> List[dict]:
+        """The cells to run after the reused ones, marking which ones get a checkpoint."""
+        first_checkpoint = len(cells) - self.max_checkpoints + 1
+        return [
+            {
+                "code": cells[index].code,
+                "line": cells[index].line,
+                "depth": index + 1,
+                "hash": hashes[index],
+                "checkpoint": index + 1 >= first_checkpoint,
+            }
+            for index in range(reused, len(cells))
+        ]
+
+    def _send_to_checkpoint(self, depth: int, request: dict) -> None:
+        """Write a request to the FIFO of a checkpoint.
+
+        Raises:
+            OSError: If the checkpoint process is gone.
+        """
+        _, pid = self._checkpoints[depth]
+        # Non-blocking open fails at once (ENXIO) if nobody is reading
+        fd = os.open(self._fifo_path(pid), os.O_WRONLY | os.O_NONBLOCK)
+        try:
+            os.set_blocking(fd, True)
+            data = (json.dumps(request) + "\n").encode("utf-8")
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+
+    def _fifo_path(self, pid: int) -> str:
+        return os.path.join(self._directory, f"{pid}.fifo")
+
+    def _drop_checkpoint(self, depth: int) -> None:
+        """Kill a checkpoint process and forget it."""
+        _, pid = self._checkpoints.pop(depth)
+        if depth == 0:
+            return
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        try:
+            os.unlink(self._fifo_path(pid))
+        except OSError:
+            pass
+
+    def _replay_output(self, reused: int, hashes: List[str], capture: OutputCapture) -> None:
+        """Write the recorded output of the reused cells, as a full run would show it."""
+        for depth in range(1, reused + 1):
+            digest, stdout, stderr = self._cell_output.get(depth, (None, "", ""))
+            if digest == hashes[depth - 1]:
+                capture.stdout.write(stdout)
+                capture.stderr.write(stderr)
+
+    def _store_output(self, hashes: List[str]) -> None:
+        """Keep the output of the cells that just ran, for replay."""
+        for depth, (stdout, stderr) in self._recording.items():
+            self._cell_output[depth] = (hashes[depth - 1], stdout.getvalue(), stderr.getvalue())
+        self._recording = {}
+
+    def _on_message(self, payload: dict) -> None:
+        msg_type = payload.get("type")
+        if msg_type == "stream" and payload.get("cell") is not None:
+            streams = self._recording.get(payload["cell"])
+            if streams is None:
+                streams = self._recording[payload["cell"]] = (
+                    StreamCapture(TOOL_CONFIG.execution.max_output_chars, None, ""),
+                    StreamCapture(TOOL_CONFIG.execution.max_error_chars, None, ""),
+                )
+            streams[payload.get("name") == "stderr"].write(payload.get("text", ""))
+        elif msg_type == "running":
+            self._running_pid = payload.get("pid")
+        elif msg_type == "checkpoint":
+            self._checkpoints[payload["depth"]] = (payload["hash"], payload["pid"])
+        elif msg_type == "done":
+            self._done = payload
+        elif msg_type == "exit":
+            pid = payload.get("pid")
+            for depth, (_, checkpoint_pid) in list(self._checkpoints.items()):
+                if checkpoint_pid == pid and depth > 0:
+                    del self._checkpoints[depth]
+            if pid is not None and pid == self._running_pid:
+                self._running_pid = None
+                raise KernelError(
+                    f"The process running the cells died (exit code {payload.get('returncode')}); "
+                    "checkpoints of the cells before it were kept."
+                )
+
+    def interrupt(self) -> None:
+        """Interrupt the running cell (KeyboardInterrupt in the process running it)."""
+        pid = self._running_pid
+        if pid is None or not self.is_alive():
+            return
+        try:
+            os.kill(pid, signal.SIGINT)
+        except ProcessLookupError:
+            pass
+
+    def _abandon_cell(self) -> str:
+        pid = self._running_pid
+        if pid is not None:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        return "The cell was killed; checkpoints of the cells before it were kept."
+
+    def kill(self) -> None:
+        """Terminate the worker and every checkpoint immediately."""
+        super().kill()
+        self._checkpoints = {}
+        self._cell_output = {}
+        self._running_pid = None
+        self._remove_directory()
+
+    def _remove_directory(self) -> None:
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+
+_default_manager: Optional[KernelManager] = None
+_default_manager_lock = threading.Lock()
+
+
+def get_checkpoint_kernel_manager() -> KernelManager:
+    """Get the KernelManager singleton of incremental execution.
+
+    Returns:
+        KernelManager of CheckpointKernels, configured from TOOL_CONFIG.kernel
+        and TOOL_CONFIG.incremental_execution.
+    """
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                grace = TOOL_CONFIG.kernel.interrupt_grace_seconds
+                _default_manager = KernelManager(
+                    cwd=WORKING_DIRECTORY,
+                    idle_timeout_seconds=TOOL_CONFIG.kernel.idle_timeout_seconds,
+                    interrupt_grace_seconds=grace,
+                    kernel_factory=lambda kernel_id: CheckpointKernel(
+                        kernel_id,
+                        WORKING_DIRECTORY,
+                        grace,
+                        TOOL_CONFIG.incremental_execution.max_checkpoints,
+                    ),
+                )
+    return _default_manager
+
+
+@atexit.register
+def reset_checkpoint_kernel_manager() -> None:
+    """Shut down every checkpoint kernel and reset the singleton."""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is not None:
+            _default_manager.shutdown_all()
+        _default_manager = None
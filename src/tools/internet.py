@@ -1,15 +1,10 @@
 from langchain_core.tools import tool
-from langchain_community.document_loaders import WebBaseLoader, FireCrawlLoader
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from typing import Annotated, List
-from bs4 import BeautifulSoup
 
 from ..logger import setup_logger
 from ..config import FIRECRAWL_API_KEY,CHROMEDRIVER_PATH
 # Set up logger
-logger = setup_logger()
+logger = setup_logger(__name__)
 
 @tool
 def google_search(query: Annotated[str, "The search query to use"]) -> Annotated[str, "The top 5 Google search results."]:
@@ -20,6 +15,12 @@ def google_search(query: Annotated[str, "The search query to use"]) -> Annotated
 
     """
     try:
+        # Deferred: selenium and bs4 are only needed once a search actually runs
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        from bs4 import BeautifulSoup
+
         logger.info(f"Performing Google search for query: {query}")
         chrome_options = Options()
         chrome_options.add_argument("--headless")
@@ -57,6 +58,8 @@ def _scrape_webpages(urls: Annotated[List[str], "List of URLs to scrape"]) -> An
 
     This function uses the WebBaseLoader to load and scrape the content of the provided URLs.
     """
+    from langchain_community.document_loaders import WebBaseLoader
+
     try:
         logger.info(f"Scraping webpages: {urls}")
         loader = WebBaseLoader(urls)
@@ -78,6 +81,8 @@ def _firecrawl_scrape_webpages(urls: Annotated[List[str], "List of URLs to scrap
     if not FIRECRAWL_API_KEY:
         raise ValueError("FireCrawl API key is not set")
 
+    from langchain_community.document_loaders import FireCrawlLoader
+
     try:
         logger.info(f"Scraping webpages using FireCrawl: {urls}")
         results = []
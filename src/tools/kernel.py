@@ -0,0 +1,499 @@
+"""Persistent Python kernels for stateful code execution.
+
+Each run (thread_id) can own a long-lived worker process that keeps
+globals, imported modules and loaded DataFrames between execute_code calls,
+so consecutive cells do not re-import pandas or re-parse the dataset.
+
+The worker runs with the interpreter of CONDA_ENV (see conda_env). Timeout,
+progress timeout and memory limits of ResourceLimiter apply per cell:
+on timeout the cell is interrupted (SIGINT) and the kernel's state is kept;
+if the cell does not stop within the grace period the kernel is killed and
+restarted on the next call. Kernels idle longer than the configured idle
+timeout are shut down.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from queue import Empty, Queue
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config import CONDA_ENV, WORKING_DIRECTORY
+from ..logger import setup_logger
+from .conda_env import resolve_conda_env
+from . import process_group
+from .output_capture import OutputCapture
+from .resource_usage import ResourceUsage
+from .tool_config import TOOL_CONFIG
+
+logger = setup_logger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kernel_worker.py")
+
+# Seconds to wait for a new worker to report ready
+STARTUP_TIMEOUT_SECONDS = 60
+
+# Seconds between idle-kernel checks
+REAPER_INTERVAL_SECONDS = 30
+
+
+class KernelError(RuntimeError):
+    """Raised when a kernel cannot be started or dies unexpectedly."""
+
+
+class KernelUnavailableError(KernelError):
+    """Raised when no interpreter is available to start a kernel."""
+
+
+def _read_messages(pipe, events: Queue) -> None:
+    """Forward protocol messages from the worker's stdout (runs in thread)."""
+    try:
+        for line in iter(pipe.readline, ''):
+            try:
+                events.put(("message", json.loads(line)))
+            except ValueError:
+                events.put(("stdout", line))
+        pipe.close()
+    except (ValueError, OSError):
+        pass
+    events.put(("exit", None))
+
+
+def _read_stderr(pipe, events: Queue) -> None:
+    """Forward raw stderr of the worker (runs in thread)."""
+    try:
+        for line in iter(pipe.readline, ''):
+            events.put(("stderr", line))
+        pipe.close()
+    except (ValueError, OSError):
+        pass
+
+
+class Kernel:
+    """A single persistent worker process.
+
+    Attributes:
+        kernel_id: Identifier of the owning run (thread_id).
+        last_used: time.monotonic() of the last finished cell.
+    """
+
+    def __init__(self, kernel_id: str, cwd: str, interrupt_grace_seconds: int = 5):
+        """Initialize the kernel; the process starts on first use.
+
+        Args:
+            kernel_id: Identifier of the owning run.
+            cwd: Working directory of the worker.
+            interrupt_grace_seconds: Seconds a cell gets to stop after SIGINT.
+        """
+        self.kernel_id = kernel_id
+        self.cwd = cwd
+        self.interrupt_grace_seconds = interrupt_grace_seconds
+        self.last_used = time.monotonic()
+        self._process: Optional[subprocess.Popen] = None
+        self._events: Queue = Queue()
+        self._cell_counter = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pid(self) -> Optional[int]:
+        """Process id of the worker, if running."""
+        return self._process.pid if self.is_alive() else None
+
+    def is_alive(self) -> bool:
+        """Whether the worker process is running."""
+        return self._process is not None and self._process.poll() is None
+
+    def is_busy(self) -> bool:
+        """Whether a cell is currently running."""
+        return self._lock.locked()
+
+    def start(self) -> None:
+        """Start the worker process and wait until it is ready.
+
+        Raises:
+            KernelUnavailableError: If the conda env cannot be resolved.
+            KernelError: If the worker fails to start.
+        """
+        conda_env = resolve_conda_env(CONDA_ENV)
+        if conda_env is None:
+            raise KernelUnavailableError(f"Conda env '{CONDA_ENV}' could not be resolved")
+
+        env = dict(conda_env.environ)
+        env.setdefault("MPLBACKEND", "Agg")
+        env["PYTHONUNBUFFERED"] = "1"
+
+        self._events = Queue()
+        self._process = subprocess.Popen(
+            self._worker_command(conda_env.python),
+            cwd=self.cwd,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            start_new_session=process_group.SUPPORTED,
+        )
+        process_group.track(self._process.pid)
+        threading.Thread(target=_read_messages, args=(self._process.stdout, self._events),
+                         daemon=True).start()
+        threading.Thread(target=_read_stderr, args=(self._process.stderr, self._events),
+                         daemon=True).start()
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+        stderr_lines = []
+        while True:
+            try:
+                kind, payload = self._events.get(timeout=max(deadline - time.monotonic(), 0))
+            except Empty:
+                self.kill()
+                raise KernelError(f"Kernel {self.kernel_id} did not start in {STARTUP_TIMEOUT_SECONDS}s")
+            if kind == "message" and payload.get("type") == "ready":
+                break
+            if kind == "stderr":
+                stderr_lines.append(payload)
+            elif kind == "exit":
+                raise KernelError(f"Kernel {self.kernel_id} exited on startup: {''.join(stderr_lines)}")
+
+        self.last_used = time.monotonic()
+        logger.info(f"Started kernel {self.kernel_id} (pid {self._process.pid})")
+
+    def execute(
+        self,
+        code: str,
+        filename: str,
+        timeout: Optional[int] = None,
+        progress_timeout: Optional[int] = None,
+        memory_mb: Optional[int] = None,
+        capture: Optional[OutputCapture] = None,
+    ) -> subprocess.CompletedProcess:
+        """Run one cell in the kernel.
+
+        Args:
+            code: Python source of the cell.
+            filename: File name used in tracebacks.
+            timeout: Fixed timeout in seconds. None = no limit.
+            progress_timeout: Timeout only if no stdout for N seconds.
+            memory_mb: Address-space limit of the worker while the cell runs.
+            capture: Bounded stdout/stderr capture. None = keep all output.
+
+        Returns:
+            CompletedProcess with the cell's stdout/stderr (returncode 0 on success).
+
+        Raises:
+            TimeoutError: If the cell exceeds its timeout.
+            KernelError: If the worker dies while running the cell.
+        """
+        capture = capture or OutputCapture(None, None)
+        with self._lock:
+            if not self.is_alive():
+                self.start()
+            try:
+                return self._execute(code, filename, timeout, progress_timeout, memory_mb, capture)
+            finally:
+                capture.close()
+                self.last_used = time.monotonic()
+
+    def _worker_command(self, python: str) -> List[str]:
+        """Command line that starts the worker with the given interpreter."""
+        return [python, "-u", WORKER_SCRIPT]
+
+    def _execute(
+        self,
+        code: str,
+        filename: str,
+        timeout: Optional[int],
+        progress_timeout: Optional[int],
+        memory_mb: Optional[int],
+        capture: OutputCapture,
+    ) -> subprocess.CompletedProcess:
+        self._discard_events()
+        self._cell_counter += 1
+        cell_id = self._cell_counter
+        request = {"id": cell_id, "code": code, "filename": filename, "memory_mb": memory_mb}
+        try:
+            self._process.stdin.write(json.dumps(request) + "\n")
+            self._process.stdin.flush()
+        except OSError as e:
+            self.kill()
+            raise KernelError(f"Kernel {self.kernel_id} is not accepting input: {e}")
+        return self._wait_for_cell(cell_id, filename, timeout, progress_timeout, capture)
+
+    def _discard_events(self) -> None:
+        """Drop leftovers of an earlier cell (e.g. late stderr)."""
+        while True:
+            try:
+                kind, payload = self._events.get_nowait()
+            except Empty:
+                break
+            if kind == "message":
+                self._on_message(payload)
+
+    def _on_message(self, payload: dict) -> None:
+        """Hook for every protocol message received; may raise KernelError."""
+
+    def _wait_for_cell(
+        self,
+        cell_id: int,
+        filename: str,
+        timeout: Optional[int],
+        progress_timeout: Optional[int],
+        capture: OutputCapture,
+    ) -> subprocess.CompletedProcess:
+        """Collect a sent cell's output until it is done, enforcing its timeouts."""
+        start_time = time.monotonic()
+        last_output_time = start_time
+
+        while True:
+            wait, reason = self._next_deadline(start_time, last_output_time, timeout, progress_timeout)
+            try:
+                kind, payload = self._events.get(timeout=wait)
+            except Empty:
+                self._handle_timeout(cell_id, reason)
+
+            if kind == "message":
+                self._on_message(payload)
+                msg_type = payload.get("type")
+                if msg_type == "stream":
+                    if payload.get("name") == "stderr":
+                        capture.stderr.write(payload["text"])
+                    else:
+                        capture.stdout.write(payload["text"])
+                        last_output_time = time.monotonic()
+                elif msg_type == "done" and payload.get("id") == cell_id:
+                    status = payload.get("status")
+                    if payload.get("error"):
+                        capture.stderr.write(payload["error"])
+                    usage = ResourceUsage.from_fields(time.monotonic() - start_time, payload.get("usage"))
+                    return capture.to_completed_process(filename, 0 if status == "ok" else 1, usage)
+            elif kind == "stdout":
+                capture.stdout.write(payload)
+                last_output_time = time.monotonic()
+            elif kind == "stderr":
+                capture.stderr.write(payload)
+            elif kind == "exit":
+                self.kill()
+                raise KernelError(
+                    f"Kernel {self.kernel_id} died while running the cell; its state was lost.\n"
+                    + capture.stderr.getvalue()
+                )
+
+    @staticmethod
+    def _next_deadline(
+        start_time: float,
+        last_output_time: float,
+        timeout: Optional[int],
+        progress_timeout: Optional[int],
+    ) -> Tuple[Optional[float], str]:
+        """Seconds until the next deadline and a description of it."""
+        now = time.monotonic()
+        if progress_timeout is not None:
+            return (max(last_output_time + progress_timeout - now, 0),
+                    f"No output for {progress_timeout}s (total elapsed: {now - start_time:.1f}s)")
+        if timeout is not None:
+            return max(start_time + timeout - now, 0), f"Execution exceeded {timeout}s timeout"
+        return None, ""
+
+    def _handle_timeout(self, cell_id: int, reason: str) -> None:
+        """Interrupt the running cell; kill the kernel if it does not stop."""
+        self.interrupt()
+        deadline = time.monotonic() + self.interrupt_grace_seconds
+        while True:
+            try:
+                kind, payload = self._events.get(timeout=max(deadline - time.monotonic(), 0))
+            except Empty:
+                break
+            if kind == "message" and payload.get("type") == "done" and payload.get("id") == cell_id:
+                raise TimeoutError(f"{reason}. The cell was interrupted; kernel state was kept.")
+            if kind == "exit":
+                break
+
+        raise TimeoutError(f"{reason}. {self._abandon_cell()}")
+
+    def _abandon_cell(self) -> str:
+        """Stop a cell that ignored the interrupt; returns what happened to the state."""
+        self.kill()
+        return "The kernel was killed; its state was lost."
+
+    def interrupt(self) -> None:
+        """Interrupt the running cell (KeyboardInterrupt in the worker)."""
+        if not self.is_alive():
+            return
+        if sys.platform == "win32":
+            # No SIGINT delivery to a child without a console; kill instead
+            self.kill()
+            return
+        os.kill(self._process.pid, signal.SIGINT)
+
+    def kill(self) -> None:
+        """Terminate the worker process and its subprocesses immediately."""
+        if self._process is None:
+            return
+        process_group.kill_group(self._process.pid)
+        if self._process.poll() is None:
+            self._process.kill()
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        for pipe in (self._process.stdin, self._process.stdout, self._process.stderr):
+            try:
+                pipe.close()
+            except (OSError, ValueError):
+                pass
+        self._process = None
+
+    def shutdown(self) -> None:
+        """Stop the worker, letting it exit on closed stdin first."""
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+            self._process.wait(timeout=self.interrupt_grace_seconds)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            pass
+        self.kill()
+        logger.info(f"Shut down kernel {self.kernel_id}")
+
+
+class KernelManager:
+    """Owns the persistent kernels, one per run (thread_id)."""
+
+    def __init__(
+        self,
+        cwd: str,
+        idle_timeout_seconds: Optional[int] = None,
+        interrupt_grace_seconds: int = 5,
+        kernel_factory: Optional[Callable[[str], Kernel]] = None,
+    ):
+        """Initialize the manager.
+
+        Args:
+            cwd: Working directory of the kernels.
+            idle_timeout_seconds: Shut down kernels idle this long. None = never.
+            interrupt_grace_seconds: Seconds a cell gets to stop after SIGINT.
+            kernel_factory: Builds the kernel of a run id. None = Kernel.
+        """
+        self.cwd = cwd
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.interrupt_grace_seconds = interrupt_grace_seconds
+        self.kernel_factory = kernel_factory
+        self._kernels: Dict[str, Kernel] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+
+    def get_kernel(self, kernel_id: str) -> Kernel:
+        """Get the kernel of a run, creating it if needed.
+
+        Counts as a use of the kernel, so the idle reaper does not shut it
+        down before the caller runs a cell on it.
+        """
+        with self._lock:
+            kernel = self._kernels.get(kernel_id)
+            if kernel is None:
+                if self.kernel_factory is not None:
+                    kernel = self.kernel_factory(kernel_id)
+                else:
+                    kernel = Kernel(kernel_id, self.cwd, self.interrupt_grace_seconds)
+                self._kernels[kernel_id] = kernel
+            kernel.last_used = time.monotonic()
+            self._ensure_reaper()
+            return kernel
+
+    def execute(self, kernel_id: str, code: str, filename: str, **limits) -> subprocess.CompletedProcess:
+        """Run a cell in the kernel of the given run. See Kernel.execute."""
+        return self.get_kernel(kernel_id).execute(code, filename, **limits)
+
+    def interrupt(self, kernel_id: str) -> bool:
+        """Interrupt the running cell of a run. Returns False if there is no kernel."""
+        with self._lock:
+            kernel = self._kernels.get(kernel_id)
+        if kernel is None:
+            return False
+        kernel.interrupt()
+        return True
+
+    def restart(self, kernel_id: str) -> None:
+        """Discard a run's state; a fresh worker starts on the next cell."""
+        self.shutdown(kernel_id)
+
+    def shutdown(self, kernel_id: str) -> None:
+        """Stop the kernel of a run, if any."""
+        with self._lock:
+            kernel = self._kernels.pop(kernel_id, None)
+        if kernel is not None:
+            kernel.shutdown()
+
+    def shutdown_all(self) -> None:
+        """Stop every kernel and the idle reaper."""
+        self._stop_event.set()
+        with self._lock:
+            kernels = list(self._kernels.values())
+            self._kernels.clear()
+        for kernel in kernels:
+            kernel.shutdown()
+
+    def _ensure_reaper(self) -> None:
+        """Start the idle reaper thread once (caller holds the lock)."""
+        if self.idle_timeout_seconds is None or self._reaper is not None:
+            return
+        self._reaper = threading.Thread(target=self._reap_idle, name="kernel-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap_idle(self) -> None:
+        """Shut down kernels that have been idle too long."""
+        interval = min(REAPER_INTERVAL_SECONDS, self.idle_timeout_seconds)
+        while not self._stop_event.wait(interval):
+            now = time.monotonic()
+            kernels = []
+            with self._lock:
+                for kernel_id, kernel in list(self._kernels.items()):
+                    if now - kernel.last_used <= self.idle_timeout_seconds:
+                        continue
+                    # Holding the kernel's lock skips busy kernels and keeps a
+                    # cell from starting on one while it shuts down
+                    if not kernel._lock.acquire(blocking=False):
+                        continue
+                    kernels.append(self._kernels.pop(kernel_id))
+            for kernel in kernels:
+                logger.info(f"Kernel {kernel.kernel_id} idle for {self.idle_timeout_seconds}s")
+                try:
+                    kernel.shutdown()
+                finally:
+                    kernel._lock.release()
+
+
+_default_manager: Optional[KernelManager] = None
+_default_manager_lock = threading.Lock()
+
+
+def get_kernel_manager() -> KernelManager:
+    """Get the default KernelManager singleton.
+
+    Returns:
+        KernelManager instance configured from TOOL_CONFIG.kernel.
+    """
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                _default_manager = KernelManager(
+                    cwd=WORKING_DIRECTORY,
+                    idle_timeout_seconds=TOOL_CONFIG.kernel.idle_timeout_seconds,
+                    interrupt_grace_seconds=TOOL_CONFIG.kernel.interrupt_grace_seconds,
+                )
+    return _default_manager
+
+
+def reset_kernel_manager() -> None:
+    """Shut down every kernel and reset the KernelManager singleton."""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is not None:
+            _default_manager.shutdown_all()
+        _default_manager = None
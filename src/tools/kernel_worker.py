@@ -0,0 +1,411 @@
+"""Worker process of a persistent Python kernel.
+
+Started by src.tools.kernel with the conda environment's interpreter and run
+as a plain script, so it must only use the standard library. Globals,
+imported modules and loaded data persist between cells.
+
+Protocol (JSON lines):
+    stdin:  {"id": 1, "code": "...", "filename": "/abs/code.py", "memory_mb": null}
+    stdout: {"type": "ready", "pid": 123}
+            {"type": "stream", "id": 1, "name": "stdout", "text": "..."}
+            {"type": "done", "id": 1, "status": "ok" | "error" | "interrupted", "error": "...",
+             "usage": {...}}
+
+Checkpoint mode (`kernel_worker.py --checkpoints <directory>`, POSIX only)
+serves incremental execution: a script arrives split into cells, and the
+interpreter state after each cell is kept as a forked, paused copy of the
+process (a checkpoint). A later script sharing the first cells resumes from
+the deepest matching checkpoint instead of running them again. Every
+checkpoint, including the initial empty one, waits for requests on its own
+FIFO <directory>/<pid>.fifo; stdin is only watched for EOF (shutdown).
+
+    FIFO:   {"id": 2, "filename": "...", "memory_mb": null,
+             "cells": [{"code": "...", "line": 12, "depth": 3, "hash": "...", "checkpoint": true}]}
+    stdout: {"type": "ready", "pid": 123}                       initial checkpoint (depth 0)
+            {"type": "running", "id": 2, "pid": 130}            process running the cells
+            {"type": "stream", "id": 2, "cell": 3, "name": "stdout", "text": "..."}
+            {"type": "checkpoint", "depth": 3, "hash": "...", "pid": 131}
+            {"type": "done", "id": 2, "status": "ok", "error": null, "executed": 2, "usage": {...}}
+            {"type": "exit", "pid": 130, "returncode": -9}      a forked child ended
+
+The running process parks itself as the checkpoint of the last cell once all
+cells succeeded; after a failed cell it exits, since its state is partial.
+
+"usage" holds the cell's CPU time and I/O bytes (including subprocesses it
+waited for) and the worker's peak RSS so far, with the fields of
+src.tools.resource_usage.ResourceUsage (except wall time).
+
+The original stdout is reserved for protocol messages; file descriptor 1 is
+pointed at stderr so that output written below Python (C extensions) cannot
+corrupt the protocol.
+"""
+
+import builtins
+import json
+import os
+import select
+import signal
+import sys
+import threading
+import traceback
+import warnings
+
+_write_lock = threading.Lock()
+
+# Seconds between checks of a parked checkpoint for exited children
+_REAP_INTERVAL_SECONDS = 1.0
+
+
+def _open_protocol_channel():
+    """Move the protocol to a private copy of stdout and free fd 1."""
+    protocol_fd = os.dup(1)
+    os.dup2(2, 1)
+    return os.fdopen(protocol_fd, "w", encoding="utf-8", buffering=1)
+
+
+_protocol = _open_protocol_channel()
+
+
+def _send(message):
+    with _write_lock:
+        _protocol.write(json.dumps(message) + "\n")
+        _protocol.flush()
+
+
+def _reset_write_lock():
+    # A thread of the parent may have held the lock while forking
+    global _write_lock
+    _write_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_write_lock)
+
+
+class _StreamWriter:
+    """File-like object forwarding writes as stream messages."""
+
+    def __init__(self, name):
+        self.name = name
+        self.cell_id = None
+        self.depth = None
+        self.encoding = "utf-8"
+
+    def write(self, text):
+        if text:
+            message = {"type": "stream", "id": self.cell_id, "name": self.name, "text": text}
+            if self.depth is not None:
+                message["cell"] = self.depth
+            _send(message)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+    def writable(self):
+        return True
+
+
+def _set_memory_limit(memory_mb):
+    """Lower the soft address-space limit for one cell; returns the old limits."""
+    if memory_mb is None:
+        return None
+    try:
+        import resource
+    except ImportError:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = memory_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError):
+        return None
+    return soft, hard
+
+
+def _restore_memory_limit(previous):
+    if previous is None:
+        return
+    import resource
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, previous)
+    except (ValueError, OSError):
+        pass
+
+
+def _usage_counters():
+    """Cumulative CPU, peak RSS and I/O counters of this process and its reaped children."""
+    counters = {}
+    try:
+        import resource
+    except ImportError:
+        return counters
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    maxrss_bytes = max(own.ru_maxrss, children.ru_maxrss) * (1 if sys.platform == "darwin" else 1024)
+    counters["user_cpu_seconds"] = own.ru_utime + children.ru_utime
+    counters["system_cpu_seconds"] = own.ru_stime + children.ru_stime
+    counters["peak_rss_mb"] = maxrss_bytes / (1024 * 1024)
+    try:
+        with open("/proc/self/io", encoding="ascii") as f:
+            io = dict(line.split(":", 1) for line in f if ":" in line)
+        counters["read_bytes"] = int(io["rchar"])
+        counters["write_bytes"] = int(io["wchar"])
+    except (OSError, KeyError, ValueError):
+        pass
+    return counters
+
+
+def _usage_since(before):
+    """Usage of one cell: counter deltas, except the peak RSS."""
+    after = _usage_counters()
+    return {
+        key: value if key == "peak_rss_mb" or key not in before else value - before[key]
+        for key, value in after.items()
+    }
+
+
+def _format_error(exc):
+    """Format a traceback without this module's frames."""
+    tb = exc.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename == __file__:
+        tb = tb.tb_next
+    return "".join(traceback.format_exception(type(exc), exc, tb))
+
+
+def _exec_code(source, filename, namespace, memory_mb):
+    """Run source in the namespace; returns (status, error)."""
+    status, error = "ok", None
+    previous_limit = _set_memory_limit(memory_mb)
+    try:
+        code = compile(source, filename, "exec")
+        exec(code, namespace)
+    except KeyboardInterrupt:
+        status, error = "interrupted", "Execution interrupted"
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            status, error = "error", f"SystemExit: {e.code}"
+    except BaseException as e:
+        status, error = "error", _format_error(e)
+    finally:
+        _restore_memory_limit(previous_limit)
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+    return status, error
+
+
+def _run_cell(request, namespace, stdout, stderr):
+    cell_id = request["id"]
+    filename = request.get("filename") or "<cell>"
+    stdout.cell_id = stderr.cell_id = cell_id
+    sys.argv = [filename]
+
+    usage_before = _usage_counters()
+    status, error = _exec_code(request["code"], filename, namespace, request.get("memory_mb"))
+    _send({"type": "done", "id": cell_id, "status": status, "error": error,
+           "usage": _usage_since(usage_before)})
+
+
+# === Checkpoint mode ===
+
+def _fork():
+    # Forking a process that runs threads is what checkpoints are; do not warn about it
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return os.fork()
+
+
+def _become_subreaper():
+    """Adopt orphaned descendants (Linux), so that killed checkpoints get reaped here."""
+    try:
+        import ctypes
+        PR_SET_CHILD_SUBREAPER = 36
+        ctypes.CDLL(None, use_errno=True).prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0)
+    except (OSError, AttributeError):
+        pass
+
+
+def _reap_children():
+    """Reap exited children (finished or killed cell processes and checkpoints)."""
+    while True:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+        _send({"type": "exit", "pid": pid, "returncode": returncode})
+
+
+class _Checkpoint:
+    """The request FIFO of a parked process."""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, f"{os.getpid()}.fifo")
+        os.mkfifo(self.path, 0o600)
+        self.fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        # Our own writer keeps the FIFO from reporting EOF between requests
+        self._keepalive = os.open(self.path, os.O_WRONLY)
+        self._buffer = b""
+
+    def wait(self):
+        """Block until a request arrives; returns None once stdin is closed."""
+        while b"\n" not in self._buffer:
+            readable = select.select([self.fd, 0], [], [], _REAP_INTERVAL_SECONDS)[0]
+            _reap_children()
+            if 0 in readable and not os.read(0, 4096):
+                return None
+            if self.fd in readable:
+                self._buffer += os.read(self.fd, 65536)
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        try:
+            return json.loads(line.decode("utf-8"))
+        except ValueError:
+            return self.wait()
+
+    def close(self):
+        os.close(self.fd)
+        os.close(self._keepalive)
+
+
+def _park(checkpoint):
+    """Keep this process's state until a request arrives, then fork a child to run it.
+
+    Returns the request in the child. The parked process itself never
+    returns; it exits when stdin is closed.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        request = checkpoint.wait()
+        if request is None:
+            checkpoint.close()
+            try:
+                os.unlink(checkpoint.path)
+            except OSError:
+                pass
+            os._exit(0)
+        if _fork() == 0:
+            checkpoint.close()
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            return request
+
+
+def _fork_checkpoint(directory, cell):
+    """Fork a paused copy of this process holding the state after `cell`.
+
+    Returns the copy's _Checkpoint in the copy and None in the caller, once
+    the copy has announced itself.
+    """
+    ready_r, ready_w = os.pipe()
+    if _fork() == 0:
+        os.close(ready_r)
+        checkpoint = _Checkpoint(directory)
+        _send({"type": "checkpoint", "depth": cell["depth"], "hash": cell["hash"], "pid": os.getpid()})
+        os.write(ready_w, b"1")
+        os.close(ready_w)
+        return checkpoint
+    os.close(ready_w)
+    os.read(ready_r, 1)
+    os.close(ready_r)
+    return None
+
+
+def _run_cells(request, namespace, stdout, stderr, directory):
+    """Run the cells of a request; returns the next request this process's copy should run."""
+    request_id = request["id"]
+    filename = request.get("filename") or "<cell>"
+    stdout.cell_id = stderr.cell_id = request_id
+    sys.argv = [filename]
+    _send({"type": "running", "id": request_id, "pid": os.getpid()})
+
+    usage_before = _usage_counters()
+    cells = request["cells"]
+    status, error, executed = "ok", None, 0
+    try:
+        for index, cell in enumerate(cells):
+            stdout.depth = stderr.depth = cell["depth"]
+            # Pad so that tracebacks show the cell's lines in the whole script
+            source = "\n" * (cell["line"] - 1) + cell["code"]
+            status, error = _exec_code(source, filename, namespace, request.get("memory_mb"))
+            executed += 1
+            if status != "ok":
+                break
+            if index == len(cells) - 1:
+                checkpoint = _Checkpoint(directory)
+                _send({"type": "checkpoint", "depth": cell["depth"], "hash": cell["hash"],
+                       "pid": os.getpid()})
+            elif cell.get("checkpoint"):
+                checkpoint = _fork_checkpoint(directory, cell)
+                if checkpoint is not None:
+                    return _park(checkpoint)
+    except KeyboardInterrupt:
+        status, error = "interrupted", "Execution interrupted"
+
+    stdout.depth = stderr.depth = None
+    _send({"type": "done", "id": request_id, "status": status, "error": error, "executed": executed,
+           "usage": _usage_since(usage_before)})
+    if status != "ok":
+        # The state after a failed cell is partial; the checkpoints before it remain
+        os._exit(0)
+    return _park(checkpoint)
+
+
+def _checkpoint_main(directory):
+    stdout = _StreamWriter("stdout")
+    stderr = _StreamWriter("stderr")
+    sys.stdout = stdout
+    sys.stderr = stderr
+
+    if sys.platform.startswith("linux"):
+        _become_subreaper()
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    checkpoint = _Checkpoint(directory)
+    _send({"type": "ready", "pid": os.getpid()})
+    request = _park(checkpoint)
+    while True:
+        request = _run_cells(request, namespace, stdout, stderr, directory)
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--checkpoints":
+        _checkpoint_main(sys.argv[2])
+        return
+
+    stdout = _StreamWriter("stdout")
+    stderr = _StreamWriter("stderr")
+    sys.stdout = stdout
+    sys.stderr = stderr
+
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    _send({"type": "ready", "pid": os.getpid()})
+
+    while True:
+        try:
+            line = sys.stdin.readline()
+        except KeyboardInterrupt:
+            # An interrupt that arrived after the cell finished
+            continue
+        if not line:
+            break
+        try:
+            request = json.loads(line)
+        except ValueError:
+            continue
+        try:
+            _run_cell(request, namespace, stdout, stderr)
+        except KeyboardInterrupt:
+            _send({"type": "done", "id": request.get("id"), "status": "interrupted",
+                   "error": "Execution interrupted"})
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,6 @@ Example:
 
 from __future__ import annotations
 
-import asyncio
 import json
 from typing import Any, Dict, List, Optional, Type
 
@@ -24,7 +23,7 @@ from pydantic import BaseModel, Field, create_model
 from ..logger import setup_logger
 
 
-logger = setup_logger()
+logger = setup_logger(__name__)
 
 
 def _create_args_schema(
@@ -107,19 +106,11 @@ class MCPToolAdapter(BaseTool):
         Returns:
             Tool execution result as string.
         """
+        from ..core.mcp_manager import get_mcp_manager
+
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # Create a new event loop in a thread
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(
-                        asyncio.run, 
-                        self._arun(**kwargs)
-                    )
-                    return future.result(timeout=120)
-            else:
-                return loop.run_until_complete(self._arun(**kwargs))
+            manager = get_mcp_manager()
+            return manager.run_sync(self._call(**kwargs), timeout=120)
         except Exception as e:
             error_msg = f"Error executing MCP tool {self.name}: {e}"
             logger.error(error_msg)
@@ -136,6 +127,19 @@ class MCPToolAdapter(BaseTool):
         """
         from ..core.mcp_manager import get_mcp_manager
 
+        return await get_mcp_manager().run_async(self._call(**kwargs))
+
+    async def _call(self, **kwargs: Any) -> str:
+        """Call the tool on the MCP manager's event loop.
+
+        Args:
+            **kwargs: Tool arguments.
+
+        Returns:
+            Tool execution result as string.
+        """
+        from ..core.mcp_manager import get_mcp_manager
+
         manager = get_mcp_manager()
         result = await manager.call_tool(
             self.mcp_server,
@@ -206,8 +210,8 @@ def create_mcp_tool_adapters(
     return adapters
 
 
-async def get_mcp_tools_async(server_names: List[str]) -> List[MCPToolAdapter]:
-    """Asynchronously get LangChain tools from MCP servers.
+async def _discover_mcp_tools(server_names: List[str]) -> List[MCPToolAdapter]:
+    """Discover tools from MCP servers (runs on the MCP manager's loop).
 
     Args:
         server_names: List of MCP server names to get tools from.
@@ -236,10 +240,25 @@ async def get_mcp_tools_async(server_names: List[str]) -> List[MCPToolAdapter]:
     return all_tools
 
 
+async def get_mcp_tools_async(server_names: List[str]) -> List[MCPToolAdapter]:
+    """Asynchronously get LangChain tools from MCP servers.
+
+    Args:
+        server_names: List of MCP server names to get tools from.
+
+    Returns:
+        List of MCPToolAdapter instances.
+    """
+    from ..core.mcp_manager import get_mcp_manager
+
+    return await get_mcp_manager().run_async(_discover_mcp_tools(server_names))
+
+
 def get_mcp_tools_sync(server_names: List[str]) -> List[MCPToolAdapter]:
     """Synchronously get LangChain tools from MCP servers.
 
-    This is a convenience wrapper for sync contexts.
+    This is a convenience wrapper for sync contexts and is safe to call
+    from worker threads.
 
     Args:
         server_names: List of MCP server names to get tools from.
@@ -247,20 +266,11 @@ def get_mcp_tools_sync(server_names: List[str]) -> List[MCPToolAdapter]:
     Returns:
         List of MCPToolAdapter instances.
     """
+    from ..core.mcp_manager import get_mcp_manager
+
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(
-                    asyncio.run,
-                    get_mcp_tools_async(server_names)
-                )
-                return future.result(timeout=120)
-        else:
-            return loop.run_until_complete(
-                get_mcp_tools_async(server_names)
-            )
+        manager = get_mcp_manager()
+        return manager.run_sync(_discover_mcp_tools(server_names), timeout=120)
     except Exception as e:
         logger.error(f"Failed to get MCP tools: {e}")
         return []
@@ -0,0 +1,243 @@
+"""Memory-bounded capture of process output.
+
+Each stream keeps only its first and last characters in memory. Once a stream
+outgrows that window, everything captured so far and all later output is
+written to a log file, so the full stream stays available on disk while
+capture memory stays proportional to the limit rather than to the output.
+If the log file cannot be created or written (missing or read-only
+directory, full disk), capture goes on with head and tail only and the
+truncation marker says the full log is unavailable.
+"""
+
+import os
+import subprocess
+import time
+import uuid
+from collections import deque
+from typing import Deque, Optional
+
+from ..logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Share of a stream's character limit kept from its beginning; the rest is
+# kept from its end, where errors and final metrics usually are
+HEAD_FRACTION = 0.3
+
+
+class HeadTailBuffer:
+    """Keeps the first `head_chars` and last `tail_chars` characters written."""
+
+    def __init__(self, head_chars: int, tail_chars: int):
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self.total_chars = 0
+        self._head: list = []
+        self._head_len = 0
+        self._tail: Deque[str] = deque()
+        self._tail_len = 0
+
+    @property
+    def truncated(self) -> bool:
+        """Whether characters were dropped between head and tail."""
+        return self.total_chars > self.head_chars + self.tail_chars
+
+    def write(self, text: str) -> None:
+        self.total_chars += len(text)
+        if self._head_len < self.head_chars:
+            take = text[:self.head_chars - self._head_len]
+            self._head.append(take)
+            self._head_len += len(take)
+            text = text[len(take):]
+        if not text or self.tail_chars <= 0:
+            return
+        if len(text) >= self.tail_chars:
+            self._tail.clear()
+            self._tail.append(text[-self.tail_chars:])
+            self._tail_len = self.tail_chars
+            return
+        self._tail.append(text)
+        self._tail_len += len(text)
+        while self._tail_len > self.tail_chars:
+            excess = self._tail_len - self.tail_chars
+            first = self._tail[0]
+            if len(first) <= excess:
+                self._tail.popleft()
+                self._tail_len -= len(first)
+            else:
+                self._tail[0] = first[excess:]
+                self._tail_len -= excess
+
+    def getvalue(self, marker: str = "") -> str:
+        """Head and tail text, joined by marker if anything was dropped."""
+        head = "".join(self._head)
+        tail = "".join(self._tail)
+        if self.truncated:
+            return head + marker + tail
+        return head + tail
+
+
+class StreamCapture:
+    """Head/tail buffer for one stream, spilling to a log file when truncated.
+
+    Attributes:
+        log_path: Path of the full-stream log file, once spilled.
+        log_error: Why the log file could not be written, if it failed.
+    """
+
+    def __init__(self, max_chars: int, log_dir: Optional[str], log_name: str):
+        """Initialize the capture.
+
+        Args:
+            max_chars: Characters kept in memory. 0 or None = no limit.
+            log_dir: Directory for the spill file. None = drop without spilling.
+            log_name: File name of the spill file.
+        """
+        self.max_chars = max_chars or 0
+        if self.max_chars:
+            head = int(self.max_chars * HEAD_FRACTION)
+            self._buffer: Optional[HeadTailBuffer] = HeadTailBuffer(head, self.max_chars - head)
+        else:
+            self._buffer = None
+        self._chunks: list = []
+        self._log_dir = log_dir
+        self._log_name = log_name
+        self._log_file = None
+        self.log_path: Optional[str] = None
+        self.log_error: Optional[str] = None
+
+    @property
+    def total_chars(self) -> int:
+        if self._buffer is None:
+            return sum(len(chunk) for chunk in self._chunks)
+        return self._buffer.total_chars
+
+    @property
+    def truncated(self) -> bool:
+        return self._buffer is not None and self._buffer.truncated
+
+    def write(self, text: str) -> None:
+        if not text:
+            return
+        if self._buffer is None:
+            self._chunks.append(text)
+            return
+
+        if self._log_file is not None:
+            self._write_log(text)
+        elif self._log_dir and self._buffer.total_chars + len(text) > self.max_chars:
+            # First overflow: everything so far is still in the buffer
+            self._open_log(self._buffer.getvalue())
+            self._write_log(text)
+        self._buffer.write(text)
+
+    def _open_log(self, captured: str) -> None:
+        path = os.path.join(self._log_dir, self._log_name)
+        try:
+            os.makedirs(self._log_dir, exist_ok=True)
+            self._log_file = open(path, "w", encoding="utf-8")
+        except OSError as e:
+            self._log_failed(path, e)
+            return
+        self.log_path = path
+        self._write_log(captured)
+
+    def _write_log(self, text: str) -> None:
+        if self._log_file is None:
+            return
+        try:
+            self._log_file.write(text)
+        except OSError as e:
+            self._log_failed(self.log_path, e)
+
+    def _log_failed(self, path: str, error: OSError) -> None:
+        """Give up on the spill file; the stream keeps its head and tail only."""
+        logger.warning(f"Could not write full output to {path}: {error}; keeping head and tail only")
+        self.log_error = str(error)
+        self._log_dir = None
+        if self._log_file is not None:
+            try:
+                self._log_file.close()
+            except OSError:
+                pass
+            self._log_file = None
+        if self.log_path is not None:
+            # An incomplete log would pass for the full stream
+            try:
+                os.remove(self.log_path)
+            except OSError:
+                pass
+            self.log_path = None
+
+    def close(self) -> None:
+        """Flush and close the spill file."""
+        if self._log_file is not None:
+            try:
+                self._log_file.close()
+            except OSError as e:
+                self._log_file = None
+                self._log_failed(self.log_path, e)
+            self._log_file = None
+
+    def getvalue(self) -> str:
+        """Captured text, with a marker where the middle was dropped."""
+        if self._buffer is None:
+            return "".join(self._chunks)
+        omitted = self._buffer.total_chars - self._buffer.head_chars - self._buffer.tail_chars
+        if self.log_path:
+            where = f"; full output in {self.log_path}"
+        elif self.log_error:
+            where = f"; full log unavailable: {self.log_error}"
+        else:
+            where = ""
+        marker = f"\n\n... [OUTPUT TRUNCATED: {omitted} chars omitted{where}] ...\n\n"
+        return self._buffer.getvalue(marker)
+
+
+class OutputCapture:
+    """Bounded captures of a process's stdout and stderr."""
+
+    def __init__(
+        self,
+        max_output_chars: Optional[int],
+        max_error_chars: Optional[int],
+        log_dir: Optional[str] = None,
+        label: str = "execution",
+    ):
+        """Initialize the captures.
+
+        Args:
+            max_output_chars: Characters of stdout kept in memory.
+            max_error_chars: Characters of stderr kept in memory.
+            log_dir: Directory for spill files. None = no spill files.
+            label: Prefix of the spill file names (e.g. the script name).
+        """
+        stem = f"{label}_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.stdout = StreamCapture(max_output_chars, log_dir, f"{stem}.stdout.log")
+        self.stderr = StreamCapture(max_error_chars, log_dir, f"{stem}.stderr.log")
+
+    def stream(self, name: str) -> StreamCapture:
+        """Capture for 'stdout' or 'stderr'."""
+        return self.stdout if name == "stdout" else self.stderr
+
+    def close(self) -> None:
+        self.stdout.close()
+        self.stderr.close()
+
+    def to_completed_process(self, args, returncode: int, resource_usage=None) -> subprocess.CompletedProcess:
+        """Build the result of a finished process.
+
+        The spill files, if any, are attached as `stdout_log` / `stderr_log`,
+        and the process's ResourceUsage as `resource_usage`.
+        """
+        self.close()
+        result = subprocess.CompletedProcess(
+            args=args,
+            returncode=returncode,
+            stdout=self.stdout.getvalue(),
+            stderr=self.stderr.getvalue(),
+        )
+        result.stdout_log = self.stdout.log_path
+        result.stderr_log = self.stderr.log_path
+        result.resource_usage = resource_usage
+        return result
@@ -0,0 +1,276 @@
+"""Process-group lifecycle of executed code.
+
+Every execution starts in its own session (start_new_session / setsid), so the
+script, any `bash` or `conda run` wrapper around it, and everything it spawns
+share one process group whose id is the execution's pid. Stopping an
+execution signals the whole group, SIGTERM first and SIGKILL after a grace
+period, instead of only the wrapper process. Descendants that left the group
+(by calling setsid themselves) are found through /proc before signalling and
+are stopped too.
+
+After every execution the group is reaped: members still running once the
+execution finished are stopped the same way and logged. Groups still alive
+when the interpreter exits are killed.
+
+Windows has no process groups here; only the process itself is killed.
+"""
+
+import asyncio
+import atexit
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Set
+
+from ..logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Seconds between checks whether a signalled group has exited
+GROUP_POLL_INTERVAL_SECONDS = 0.05
+
+SUPPORTED = sys.platform != "win32" and hasattr(os, "killpg")
+
+_live_groups: Set[int] = set()
+_live_groups_lock = threading.Lock()
+
+
+def track(pgid: int) -> None:
+    """Remember a started group so it is killed if the interpreter exits."""
+    if SUPPORTED:
+        with _live_groups_lock:
+            _live_groups.add(pgid)
+
+
+def _untrack(pgid: int) -> None:
+    with _live_groups_lock:
+        _live_groups.discard(pgid)
+
+
+def _process_table() -> Dict[int, tuple]:
+    """pid -> (state, parent pid, process group) of every visible process.
+
+    Empty without /proc.
+    """
+    table = {}
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        return table
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", encoding="ascii", errors="replace") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields resume after its ')'
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) > 2:
+            table[int(name)] = (fields[0], int(fields[1]), int(fields[2]))
+    return table
+
+
+def group_alive(pgid: int) -> bool:
+    """Whether any process of the group is still running.
+
+    Zombies count as exited: they hold no resources and, once reparented,
+    only wait for init to reap them.
+    """
+    table = _process_table()
+    if table:
+        return any(state != "Z" and group == pgid for state, _, group in table.values())
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _running(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii", errors="replace") as f:
+            return f.read().rpartition(")")[2].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+    except (OSError, IndexError):
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def descendants(pid: int) -> List[int]:
+    """Pids of the running descendants of a process (Linux only)."""
+    children: Dict[int, List[int]] = {}
+    for child, (_, parent, _) in _process_table().items():
+        children.setdefault(parent, []).append(child)
+    found, stack = [], list(children.get(pid, []))
+    while stack:
+        current = stack.pop()
+        found.append(current)
+        stack.extend(children.get(current, []))
+    return found
+
+
+def _escaped(pgid: int) -> List[int]:
+    """Descendants of a group leader that moved to another group."""
+    escaped = []
+    for pid in descendants(pgid):
+        try:
+            if os.getpgid(pid) != pgid:
+                escaped.append(pid)
+        except ProcessLookupError:
+            continue
+    return escaped
+
+
+def _signal(pgid: int, pids: List[int], signum: int) -> None:
+    try:
+        os.killpg(pgid, signum)
+    except (ProcessLookupError, PermissionError):
+        pass
+    for pid in pids:
+        try:
+            os.kill(pid, signum)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def _all_exited(pgid: int, pids: List[int]) -> bool:
+    return not group_alive(pgid) and not any(_running(pid) for pid in pids)
+
+
+def _wait_exited(pgid: int, pids: List[int], timeout: float, process=None) -> bool:
+    """Wait until the group, the given pids and the process have exited."""
+    deadline = time.monotonic() + timeout
+    while True:
+        leader_done = process is None or process.poll() is not None
+        if leader_done and _all_exited(pgid, pids):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(GROUP_POLL_INTERVAL_SECONDS)
+
+
+def stop_group(pgid: int, grace_seconds: float, escaped: List[int] = (), process=None) -> bool:
+    """SIGTERM a group (and escaped descendants), SIGKILL whatever remains after the grace period.
+
+    Returns:
+        Whether every process exited.
+    """
+    escaped = list(escaped)
+    _signal(pgid, escaped, signal.SIGTERM)
+    if _wait_exited(pgid, escaped, grace_seconds, process):
+        return True
+    _signal(pgid, escaped, signal.SIGKILL)
+    return _wait_exited(pgid, escaped, grace_seconds, process)
+
+
+def terminate(process, grace_seconds: float) -> None:
+    """Stop a timed-out or cancelled execution with everything it started.
+
+    Args:
+        process: A subprocess.Popen-like process started in its own session.
+        grace_seconds: Time the processes get to exit after SIGTERM.
+    """
+    if not SUPPORTED:
+        process.kill()
+        process.wait()
+        return
+
+    pgid = process.pid
+    try:
+        if not stop_group(pgid, grace_seconds, _escaped(pgid), process):
+            logger.error(f"Processes of execution {pgid} survived SIGKILL")
+        process.wait()
+    finally:
+        _untrack(pgid)
+
+
+async def terminate_async(process, grace_seconds: float) -> None:
+    """terminate() for an asyncio subprocess, without blocking the event loop."""
+    if not SUPPORTED:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+        return
+
+    pgid = process.pid
+    escaped = await asyncio.to_thread(_escaped, pgid)
+    _signal(pgid, escaped, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(asyncio.shield(process.wait()), grace_seconds)
+    except asyncio.TimeoutError:
+        _signal(pgid, escaped, signal.SIGKILL)
+        await process.wait()
+    # Members other than the leader get the same grace period
+    await asyncio.to_thread(_terminate_remaining, pgid, grace_seconds, escaped)
+
+
+def _terminate_remaining(pgid: int, grace_seconds: float, escaped: List[int] = ()) -> None:
+    """Wait for the rest of an already signalled group, SIGKILL it if needed, and forget it."""
+    try:
+        if not _wait_exited(pgid, list(escaped), grace_seconds):
+            _signal(pgid, list(escaped), signal.SIGKILL)
+            if not _wait_exited(pgid, list(escaped), grace_seconds):
+                logger.error(f"Processes of execution {pgid} survived SIGKILL")
+    finally:
+        _untrack(pgid)
+
+
+def reap(pgid: int, grace_seconds: float) -> None:
+    """Stop processes an execution left behind and forget its group.
+
+    Args:
+        pgid: Process group of the finished execution.
+        grace_seconds: Time the leftovers get to exit after SIGTERM.
+    """
+    if not SUPPORTED:
+        return
+    try:
+        if not group_alive(pgid):
+            return
+        logger.warning(f"Execution {pgid} left processes running; stopping its process group")
+        if not stop_group(pgid, grace_seconds):
+            logger.error(f"Processes of execution {pgid} survived SIGKILL")
+    finally:
+        _untrack(pgid)
+
+
+async def reap_async(pgid: int, grace_seconds: float) -> None:
+    """reap() without blocking the event loop."""
+    if not SUPPORTED:
+        return
+    if not group_alive(pgid):
+        _untrack(pgid)
+        return
+    await asyncio.to_thread(reap, pgid, grace_seconds)
+
+
+def kill_group(pgid: int) -> None:
+    """SIGKILL a whole group immediately and forget it."""
+    if SUPPORTED:
+        _signal(pgid, [], signal.SIGKILL)
+        _untrack(pgid)
+
+
+@atexit.register
+def _kill_live_groups() -> None:
+    with _live_groups_lock:
+        groups = list(_live_groups)
+        _live_groups.clear()
+    for pgid in groups:
+        _signal(pgid, [], signal.SIGKILL)
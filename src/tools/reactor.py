@@ -0,0 +1,490 @@
+"""Event-driven output capture for executions with deadlines.
+
+One background thread multiplexes stdout, stderr and the exit of every
+running execution with a selector, so concurrent executions do not need two
+reader threads each or a polling loop. Hard and progress timeouts are kept in
+a timer heap, and the selector sleeps exactly until the nearest deadline.
+
+Process exit is detected with a pidfd where the platform provides one
+(Linux 5.3+). Elsewhere, exit is noticed when both pipes reach EOF, plus a
+slow fallback check for processes whose pipes are held open by descendants.
+
+An error while handling one execution's events stops that execution's
+process group and is raised to its caller; the thread keeps serving the
+others. Callers also check that the thread is alive while they wait, and
+get_reactor starts a new reactor if it died.
+
+Selectors cannot wait on pipes on Windows; ResourceLimiter keeps its
+threaded reader there.
+
+Asyncio callers await amonitor(), which waits for the reactor without
+blocking the event loop, so their results carry the same resource usage. On
+Windows, monitor_async follows an execution started with
+asyncio.create_subprocess_exec on the caller's event loop instead.
+"""
+
+import asyncio
+import codecs
+import heapq
+import itertools
+import os
+import selectors
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from ..logger import setup_logger
+from . import process_group
+from .output_capture import OutputCapture
+from .resource_usage import ResourceUsage, poll_with_usage
+
+logger = setup_logger(__name__)
+
+READ_CHUNK_BYTES = 65536
+
+# Seconds to keep reading pipes after the process exited (descendants may
+# still hold them open)
+EXIT_DRAIN_SECONDS = 1.0
+
+# Seconds between exit checks: periodic ones when no pidfd is available, and
+# quick rechecks once exit is expected but not yet reported
+EXIT_CHECK_INTERVALS = {
+    "exit_check": 1.0,
+    "exit_recheck": 0.01,
+}
+
+# Seconds between checks that the reactor thread is still running, while a
+# caller waits for its execution
+LIVENESS_CHECK_SECONDS = 1.0
+
+
+class Execution:
+    """Output and deadlines of one monitored process.
+
+    Attributes:
+        process: A subprocess.Popen-like object (pid, poll, kill, stdout, stderr).
+        capture: Bounded stdout/stderr capture.
+        returncode: Exit code once finished.
+        usage: Resources used, once finished.
+        error: Timeout message if a deadline passed.
+    """
+
+    def __init__(
+        self,
+        process,
+        timeout: Optional[float] = None,
+        progress_timeout: Optional[float] = None,
+        capture: Optional[OutputCapture] = None,
+    ):
+        self.process = process
+        self.capture = capture or OutputCapture(None, None)
+        self.timeout = timeout
+        self.progress_timeout = progress_timeout
+        self.start_time = time.monotonic()
+        self.last_output_time = self.start_time
+        self.returncode: Optional[int] = None
+        self.usage: Optional[ResourceUsage] = None
+        self.error: Optional[str] = None
+
+        self._decoders = {
+            name: codecs.getincrementaldecoder("utf-8")(errors="replace")
+            for name in ("stdout", "stderr")
+        }
+        self._open_streams = 0
+        self._exited = False
+        self._pidfd: Optional[int] = None
+        self._exception: Optional[BaseException] = None
+        self._done = threading.Event()
+        # Called on the reactor thread once the execution finished
+        self._callbacks: List[Callable[[], None]] = []
+
+    def wait(self) -> None:
+        """Block until the execution finished or a deadline passed."""
+        self._done.wait()
+
+    def _append(self, name: str, data: bytes, final: bool = False) -> None:
+        text = self._decoders[name].decode(data, final)
+        if text:
+            self.capture.stream(name).write(text)
+            if name == "stdout":
+                self.last_output_time = time.monotonic()
+
+    def _deadline(self) -> Tuple[Optional[float], str]:
+        """Next deadline and the timeout message used if it passes.
+
+        A progress timeout takes precedence over the hard timeout.
+        """
+        if self.progress_timeout is not None:
+            elapsed = time.monotonic() - self.start_time
+            return (self.last_output_time + self.progress_timeout,
+                    f"No output for {self.progress_timeout}s (total elapsed: {elapsed:.1f}s)")
+        if self.timeout is not None:
+            return self.start_time + self.timeout, f"Execution exceeded {self.timeout}s timeout"
+        return None, ""
+
+
+class ExecutionReactor:
+    """Single-threaded selector loop serving many executions."""
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._timers: List[Tuple[float, int, Execution, str]] = []
+        self._sequence = itertools.count()
+        self._pending: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._thread = threading.Thread(target=self._run, name="execution-reactor", daemon=True)
+        self._thread.start()
+
+    def is_alive(self) -> bool:
+        """Whether the reactor thread is running."""
+        return self._thread.is_alive()
+
+    def monitor(self, execution: Execution) -> Execution:
+        """Start monitoring an execution and wait until it finishes.
+
+        Args:
+            execution: The execution to monitor.
+
+        Returns:
+            The finished execution. If a deadline passed, `error` is set and
+            the process is left for the caller to stop.
+
+        Raises:
+            Exception: The error raised while handling the execution's
+                events (its process group has been killed), or RuntimeError
+                if the reactor thread stopped.
+        """
+        self._call_soon(lambda: self._register(execution))
+        while not execution._done.wait(LIVENESS_CHECK_SECONDS):
+            if not self.is_alive():
+                # Nothing will finish the execution any more
+                execution._exception = RuntimeError("Execution reactor stopped")
+                break
+        if execution._exception is not None:
+            raise execution._exception
+        return execution
+
+    async def amonitor(self, execution: Execution) -> Execution:
+        """monitor() for callers on an event loop, which keeps running while it waits.
+
+        If the awaiting task is cancelled, the execution stays monitored
+        until the caller stops its process.
+        """
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+
+        execution._callbacks.append(wake)
+        self._call_soon(lambda: self._register(execution))
+        while not execution._done.is_set():
+            await asyncio.wait([done], timeout=LIVENESS_CHECK_SECONDS)
+            if not execution._done.is_set() and not self.is_alive():
+                execution._exception = RuntimeError("Execution reactor stopped")
+                break
+        if execution._exception is not None:
+            raise execution._exception
+        return execution
+
+    def _call_soon(self, callback: Callable[[], None]) -> None:
+        """Run a callback on the reactor thread."""
+        with self._lock:
+            self._pending.append(callback)
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass  # Already woken
+
+    def _schedule(self, when: float, execution: Execution, kind: str) -> None:
+        heapq.heappush(self._timers, (when, next(self._sequence), execution, kind))
+
+    def _register(self, execution: Execution) -> None:
+        try:
+            self._watch(execution)
+        except Exception as e:
+            self._fail(execution, e)
+
+    def _watch(self, execution: Execution) -> None:
+        process = execution.process
+        for name in ("stdout", "stderr"):
+            stream = getattr(process, name)
+            fd = stream.fileno()
+            os.set_blocking(fd, False)
+            self._selector.register(fd, selectors.EVENT_READ, (execution, name))
+            execution._open_streams += 1
+
+        if hasattr(os, "pidfd_open"):
+            try:
+                execution._pidfd = os.pidfd_open(process.pid)
+                self._selector.register(execution._pidfd, selectors.EVENT_READ, (execution, "exit"))
+            except OSError:
+                # Already exited, or pidfds not supported by the kernel
+                execution._pidfd = None
+        if execution._pidfd is None:
+            self._schedule_exit_check(execution, "exit_check")
+
+        deadline, _ = execution._deadline()
+        if deadline is not None:
+            self._schedule(deadline, execution, "deadline")
+
+    def _run(self) -> None:
+        while True:
+            timeout = None
+            if self._timers:
+                timeout = max(self._timers[0][0] - time.monotonic(), 0)
+
+            for key, _ in self._selector.select(timeout):
+                if key.data is None:
+                    self._run_pending()
+                    continue
+                execution, kind = key.data
+                if execution._done.is_set():
+                    continue
+                try:
+                    if kind == "exit":
+                        self._close_pidfd(execution)
+                        self._check_exit(execution, "exit_recheck")
+                    else:
+                        self._read(execution, kind, key.fd)
+                except Exception as e:
+                    self._fail(execution, e)
+
+            now = time.monotonic()
+            while self._timers and self._timers[0][0] <= now:
+                _, _, execution, kind = heapq.heappop(self._timers)
+                if execution._done.is_set():
+                    continue
+                try:
+                    if kind == "deadline":
+                        self._check_deadline(execution, now)
+                    elif kind in EXIT_CHECK_INTERVALS:
+                        self._check_exit(execution, kind)
+                    elif kind == "drain":
+                        self._finish(execution)
+                except Exception as e:
+                    self._fail(execution, e)
+
+    def _run_pending(self) -> None:
+        try:
+            while os.read(self._wake_r, 512):
+                pass
+        except BlockingIOError:
+            pass
+        with self._lock:
+            callbacks, self._pending = self._pending, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Execution reactor callback failed")
+
+    def _read(self, execution: Execution, name: str, fd: int) -> None:
+        try:
+            data = os.read(fd, READ_CHUNK_BYTES)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+
+        if data:
+            execution._append(name, data)
+            return
+
+        # EOF
+        execution._append(name, b"", final=True)
+        self._unregister_fd(fd)
+        execution._open_streams -= 1
+        if execution._open_streams == 0:
+            if execution._exited:
+                self._finish(execution)
+            else:
+                # Pipes closed; the exit status should follow shortly
+                self._check_exit(execution, "exit_recheck")
+
+    def _schedule_exit_check(self, execution: Execution, kind: str) -> None:
+        self._schedule(time.monotonic() + EXIT_CHECK_INTERVALS[kind], execution, kind)
+
+    def _check_exit(self, execution: Execution, retry_kind: str) -> None:
+        """Record the exit status, or check again later."""
+        if execution._exited:
+            return
+        returncode, usage = poll_with_usage(execution.process)
+        if returncode is None:
+            self._schedule_exit_check(execution, retry_kind)
+            return
+
+        execution.returncode = returncode
+        execution.usage = ResourceUsage.from_fields(time.monotonic() - execution.start_time, usage)
+        execution._exited = True
+        if execution._open_streams == 0:
+            self._finish(execution)
+        else:
+            self._schedule(time.monotonic() + EXIT_DRAIN_SECONDS, execution, "drain")
+
+    def _check_deadline(self, execution: Execution, now: float) -> None:
+        deadline, message = execution._deadline()
+        if deadline is None:
+            return
+        if deadline > now:
+            # Output arrived since this timer was set (progress timeout)
+            self._schedule(deadline, execution, "deadline")
+            return
+        # The caller stops the process (and its process group)
+        execution.error = message
+        self._finish(execution)
+
+    def _close_pidfd(self, execution: Execution) -> None:
+        if execution._pidfd is not None:
+            self._unregister_fd(execution._pidfd)
+            os.close(execution._pidfd)
+            execution._pidfd = None
+
+    def _unregister_fd(self, fd: Optional[int]) -> None:
+        if fd is None:
+            return
+        try:
+            self._selector.unregister(fd)
+        except (KeyError, ValueError):
+            pass
+
+    def _finish(self, execution: Execution) -> None:
+        """Stop watching an execution and wake its caller."""
+        if execution._done.is_set():
+            return
+        for name in ("stdout", "stderr"):
+            stream = getattr(execution.process, name)
+            try:
+                fd = stream.fileno()
+            except (OSError, ValueError):
+                continue
+            if fd in self._selector.get_map():
+                # Collect whatever is already buffered before closing
+                self._drain_nonblocking(execution, name, fd)
+                self._unregister_fd(fd)
+        self._close_pidfd(execution)
+        for name in ("stdout", "stderr"):
+            try:
+                getattr(execution.process, name).close()
+            except (OSError, ValueError):
+                pass
+        execution.capture.close()
+        self._set_done(execution)
+
+    @staticmethod
+    def _set_done(execution: Execution) -> None:
+        execution._done.set()
+        for callback in execution._callbacks:
+            try:
+                callback()
+            except Exception:
+                # e.g. the waiting event loop was closed
+                logger.exception("Execution done callback failed")
+
+    def _fail(self, execution: Execution, error: Exception) -> None:
+        """Stop an execution whose event handling raised, and hand the error to its caller."""
+        logger.error(f"Monitoring process {execution.process.pid} failed; stopping it: {error!r}")
+        execution._exception = error
+        process_group.kill_group(execution.process.pid)
+        try:
+            execution.process.kill()
+        except OSError:
+            pass
+        try:
+            self._finish(execution)
+        except Exception:
+            logger.exception(f"Could not finish monitoring process {execution.process.pid}")
+        finally:
+            # Whatever _finish left registered must not keep waking the selector
+            for key in list(self._selector.get_map().values()):
+                if key.data is not None and key.data[0] is execution:
+                    self._unregister_fd(key.fd)
+            if execution._pidfd is not None:
+                try:
+                    os.close(execution._pidfd)
+                except OSError:
+                    pass
+                execution._pidfd = None
+            if not execution._done.is_set():
+                self._set_done(execution)
+
+    @staticmethod
+    def _drain_nonblocking(execution: Execution, name: str, fd: int) -> None:
+        while True:
+            try:
+                data = os.read(fd, READ_CHUNK_BYTES)
+            except (BlockingIOError, OSError):
+                break
+            if not data:
+                break
+            execution._append(name, data)
+        execution._append(name, b"", final=True)
+
+
+async def monitor_async(execution: Execution) -> Execution:
+    """Follow an asyncio subprocess until it finishes or a deadline passes.
+
+    If a deadline passes, `error` is set and the process is left running for
+    the caller to stop; the same holds when the awaiting task is cancelled.
+
+    Args:
+        execution: Execution whose process is an asyncio.subprocess.Process.
+
+    Returns:
+        The finished execution.
+    """
+    process = execution.process
+
+    async def pump(name: str) -> None:
+        reader = getattr(process, name)
+        while True:
+            data = await reader.read(READ_CHUNK_BYTES)
+            if not data:
+                break
+            execution._append(name, data)
+        execution._append(name, b"", final=True)
+
+    pumps = [asyncio.ensure_future(pump(name)) for name in ("stdout", "stderr")]
+    waiter = asyncio.ensure_future(process.wait())
+    try:
+        while not waiter.done():
+            deadline, message = execution._deadline()
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            await asyncio.wait([waiter], timeout=timeout)
+            if waiter.done():
+                break
+            deadline, message = execution._deadline()
+            if deadline is not None and deadline <= time.monotonic():
+                execution.error = message
+                break
+        if execution.error is None:
+            execution.returncode = waiter.result()
+            # Descendants may still hold the pipes open
+            await asyncio.wait(pumps, timeout=EXIT_DRAIN_SECONDS)
+    finally:
+        for task in pumps + [waiter]:
+            task.cancel()
+        execution.usage = ResourceUsage(wall_seconds=time.monotonic() - execution.start_time)
+        execution.capture.close()
+        execution._done.set()
+    return execution
+
+
+_default_reactor: Optional[ExecutionReactor] = None
+_default_reactor_lock = threading.Lock()
+
+
+def get_reactor() -> ExecutionReactor:
+    """Get the shared ExecutionReactor, starting its thread on first use (or after it died)."""
+    global _default_reactor
+    if _default_reactor is None or not _default_reactor.is_alive():
+        with _default_reactor_lock:
+            if _default_reactor is None or not _default_reactor.is_alive():
+                if _default_reactor is not None:
+                    logger.error("Execution reactor thread died; starting a new one")
+                _default_reactor = ExecutionReactor()
+    return _default_reactor
@@ -0,0 +1,112 @@
+"""Resource accounting for executed code.
+
+Each finished execution is described by a ResourceUsage: wall time, user and
+system CPU time, peak resident set size, and bytes read and written. CPU and
+memory figures come from the rusage of the reaped process (which includes its
+reaped descendants); I/O figures come from /proc/<pid>/io, read while the
+exited process is still a zombie. Figures a platform cannot provide are None.
+
+Processes that are not direct children (sandbox children, kernel cells) are
+measured on their side and report the same fields as a plain dict.
+"""
+
+import os
+import subprocess
+import sys
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_MAXRSS_BYTES_PER_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+@dataclass
+class ResourceUsage:
+    """Resources used by one execution.
+
+    Attributes:
+        wall_seconds: Elapsed time from start to exit.
+        user_cpu_seconds: CPU time spent in user mode.
+        system_cpu_seconds: CPU time spent in the kernel.
+        peak_rss_mb: Peak resident set size in MB.
+        read_bytes: Bytes read through read-like system calls (files, pipes).
+        write_bytes: Bytes written through write-like system calls.
+    """
+    wall_seconds: float
+    user_cpu_seconds: Optional[float] = None
+    system_cpu_seconds: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    read_bytes: Optional[int] = None
+    write_bytes: Optional[int] = None
+
+    @classmethod
+    def from_fields(cls, wall_seconds: float, fields: Optional[Dict] = None) -> "ResourceUsage":
+        """Build from a usage dict as reported by poll_with_usage or a worker."""
+        known = {k: v for k, v in (fields or {}).items() if k in cls.__dataclass_fields__}
+        known.pop("wall_seconds", None)
+        return cls(wall_seconds=wall_seconds, **known)
+
+    def to_dict(self) -> Dict:
+        """Rounded values, for tool results and log records."""
+        values = asdict(self)
+        for key in ("wall_seconds", "user_cpu_seconds", "system_cpu_seconds"):
+            if values[key] is not None:
+                values[key] = round(values[key], 3)
+        if values["peak_rss_mb"] is not None:
+            values["peak_rss_mb"] = round(values["peak_rss_mb"], 1)
+        return values
+
+    def format_fields(self) -> str:
+        """key=value pairs for log messages."""
+        return " ".join(f"{key}={value}" for key, value in self.to_dict().items() if value is not None)
+
+
+def rusage_fields(rusage) -> Dict:
+    """CPU and memory fields of a resource.struct_rusage."""
+    return {
+        "user_cpu_seconds": rusage.ru_utime,
+        "system_cpu_seconds": rusage.ru_stime,
+        "peak_rss_mb": rusage.ru_maxrss * _MAXRSS_BYTES_PER_UNIT / (1024 * 1024),
+    }
+
+
+def read_process_io(pid) -> Dict:
+    """I/O fields from /proc/<pid>/io ('self' for this process); empty if unavailable."""
+    try:
+        with open(f"/proc/{pid}/io", encoding="ascii") as f:
+            counters = dict(line.split(":", 1) for line in f if ":" in line)
+        return {
+            "read_bytes": int(counters["rchar"]),
+            "write_bytes": int(counters["wchar"]),
+        }
+    except (OSError, KeyError, ValueError):
+        return {}
+
+
+def poll_with_usage(process) -> Tuple[Optional[int], Optional[Dict]]:
+    """Poll a process and, once it has exited, collect its resource usage.
+
+    subprocess.Popen children are reaped with wait4 so their rusage is not
+    lost; Popen-like objects may carry a `usage` dict reported by whoever
+    reaped them.
+
+    Returns:
+        (returncode, usage fields); returncode is None while running.
+    """
+    if not isinstance(process, subprocess.Popen) or not hasattr(os, "wait4"):
+        returncode = process.poll()
+        return returncode, getattr(process, "usage", None) if returncode is not None else None
+    if process.returncode is not None:
+        return process.returncode, None
+
+    # Read /proc before reaping; afterwards the entry is gone
+    io = read_process_io(process.pid)
+    try:
+        pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+    except ChildProcessError:
+        # Reaped elsewhere
+        return process.poll(), None
+    if pid == 0:
+        return None, None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, {**rusage_fields(rusage), **io}
@@ -0,0 +1,405 @@
+"""Pre-forked sandbox pool for stateless code execution.
+
+A few template processes are started with the conda environment's
+interpreter and the scientific stack (numpy, pandas, matplotlib with the Agg
+backend and a warm font cache, scikit-learn) already imported. Each stateless
+execute_code call forks a child from a template and runs the script there,
+skipping interpreter start-up and imports. Memory limits are applied in the
+child; timeouts are enforced by ResourceLimiter as for any other process.
+
+The pool is POSIX-only. When it is disabled (size 0) or unavailable,
+execute_code starts a fresh interpreter as before.
+"""
+
+import json
+import os
+import selectors
+import socket
+import subprocess
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from ..config import CONDA_DIRECT_EXEC, CONDA_ENV
+from ..logger import setup_logger
+from .conda_env import resolve_conda_env
+from .tool_config import TOOL_CONFIG
+
+logger = setup_logger(__name__)
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_server.py")
+
+# Seconds to wait for a template to import its modules
+STARTUP_TIMEOUT_SECONDS = 120
+
+# Seconds to wait for a template to fork a child
+SPAWN_TIMEOUT_SECONDS = 10
+
+MAX_MESSAGE_BYTES = 65536
+
+
+class SandboxError(RuntimeError):
+    """Raised when the pool cannot start a sandboxed process."""
+
+
+class SandboxProcess:
+    """A child forked by a template, with a subprocess.Popen-like interface.
+
+    Attributes:
+        pid: Process id of the child.
+        stdout: Text stream of the child's stdout.
+        stderr: Text stream of the child's stderr.
+        returncode: Exit code once the child has exited, else None.
+        usage: Resource usage fields reported by the template at exit.
+    """
+
+    def __init__(self, args: List[str], stdout_fd: int, stderr_fd: int):
+        self.args = args
+        self.pid: Optional[int] = None
+        self.stdout = os.fdopen(stdout_fd, "r", encoding="utf-8", errors="replace")
+        self.stderr = os.fdopen(stderr_fd, "r", encoding="utf-8", errors="replace")
+        self.returncode: Optional[int] = None
+        self.usage: Optional[dict] = None
+        self._exited = threading.Event()
+
+    def _set_returncode(self, returncode: int, usage: Optional[dict] = None) -> None:
+        self.usage = usage
+        self.returncode = returncode
+        self._exited.set()
+
+    def poll(self) -> Optional[int]:
+        """Return the exit code if the child has exited, else None."""
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """Wait for the child to exit.
+
+        Raises:
+            subprocess.TimeoutExpired: If it is still running after timeout.
+        """
+        if not self._exited.wait(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+
+    def kill(self) -> None:
+        """Kill the child (SIGKILL)."""
+        self.send_signal(9)
+
+    def terminate(self) -> None:
+        """Terminate the child (SIGTERM)."""
+        self.send_signal(15)
+
+    def send_signal(self, signum: int) -> None:
+        """Send a signal to the child if it is still running."""
+        if self.pid is None or self.returncode is not None:
+            return
+        try:
+            os.kill(self.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def communicate(self) -> Tuple[str, str]:
+        """Read stdout and stderr until EOF and wait for exit."""
+        stderr_parts: List[str] = []
+        reader = threading.Thread(target=lambda: stderr_parts.append(self.stderr.read()), daemon=True)
+        reader.start()
+        stdout = self.stdout.read()
+        reader.join()
+        self.stdout.close()
+        self.stderr.close()
+        self.wait()
+        return stdout, "".join(stderr_parts)
+
+
+class SandboxTemplate:
+    """One template process that forks children on request."""
+
+    def __init__(self, index: int, preload_modules: List[str]):
+        """Initialize the template; the process starts on first use.
+
+        Args:
+            index: Position in the pool (used in log messages).
+            preload_modules: Modules imported before forking.
+        """
+        self.index = index
+        self.preload_modules = preload_modules
+        self._process: Optional[subprocess.Popen] = None
+        self._sock: Optional[socket.socket] = None
+        self._pending: Dict[int, list] = {}
+        self._children: Dict[int, SandboxProcess] = {}
+        # Exit messages received before spawn() registered the child
+        self._early_exits: Dict[int, dict] = {}
+        self._request_counter = 0
+        self._lock = threading.Lock()
+
+    def is_alive(self) -> bool:
+        """Whether the template process is running."""
+        return self._process is not None and self._process.poll() is None
+
+    @property
+    def active_children(self) -> int:
+        """Number of children still running."""
+        return len(self._children)
+
+    def start(self) -> None:
+        """Start the template and wait until its modules are imported.
+
+        Raises:
+            SandboxError: If the conda env cannot be resolved or the template fails.
+        """
+        conda_env = resolve_conda_env(CONDA_ENV)
+        if conda_env is None:
+            raise SandboxError(f"Conda env '{CONDA_ENV}' could not be resolved")
+
+        env = dict(conda_env.environ)
+        env.setdefault("MPLBACKEND", "Agg")
+
+        parent_sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            self._process = subprocess.Popen(
+                [conda_env.python, "-u", SERVER_SCRIPT, str(child_sock.fileno()), *self.preload_modules],
+                env=env,
+                stdin=subprocess.PIPE,
+                # The template's own output is never read; stderr is drained
+                # by the dispatcher, so warnings cannot fill the pipe and block forks
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                pass_fds=[child_sock.fileno()],
+            )
+        finally:
+            child_sock.close()
+
+        parent_sock.settimeout(STARTUP_TIMEOUT_SECONDS)
+        try:
+            ready = json.loads(parent_sock.recv(MAX_MESSAGE_BYTES))
+        except (OSError, ValueError) as e:
+            parent_sock.close()
+            self._process.kill()
+            stderr = self._process.communicate()[1].decode("utf-8", errors="replace")
+            raise SandboxError(f"Sandbox template {self.index} failed to start: {e} {stderr}")
+        parent_sock.settimeout(None)
+        self._sock = parent_sock
+
+        if ready.get("failed"):
+            logger.warning(f"Sandbox template {self.index} could not preload: {ready['failed']}")
+        logger.info(
+            f"Started sandbox template {self.index} (pid {self._process.pid}) "
+            f"with {', '.join(ready.get('preloaded', [])) or 'no modules'}"
+        )
+
+        threading.Thread(
+            target=self._dispatch,
+            args=(self._process, parent_sock),
+            name=f"sandbox-template-{self.index}",
+            daemon=True,
+        ).start()
+
+    def ensure_started(self) -> None:
+        """Start the template if it is not running."""
+        with self._lock:
+            if not self.is_alive():
+                self.start()
+
+    def spawn(self, script: str, cwd: str, memory_mb: Optional[int] = None) -> SandboxProcess:
+        """Fork a child that runs the script.
+
+        Args:
+            script: Absolute path of the Python script.
+            cwd: Working directory of the child.
+            memory_mb: Address-space limit of the child. None = no limit.
+
+        Returns:
+            The running SandboxProcess.
+
+        Raises:
+            SandboxError: If the template cannot fork a child.
+        """
+        with self._lock:
+            if not self.is_alive():
+                self.start()
+            self._request_counter += 1
+            request_id = self._request_counter
+            waiter = [threading.Event(), None]
+            self._pending[request_id] = waiter
+            sock = self._sock
+
+        stdout_r, stdout_w = os.pipe()
+        stderr_r, stderr_w = os.pipe()
+        stdin_fd = os.open(os.devnull, os.O_RDONLY)
+        process = SandboxProcess([sys.executable, script], stdout_r, stderr_r)
+        request = {"id": request_id, "script": script, "cwd": cwd, "memory_mb": memory_mb}
+        try:
+            socket.send_fds(sock, [json.dumps(request).encode("utf-8")], [stdin_fd, stdout_w, stderr_w])
+        except OSError as e:
+            self._pending.pop(request_id, None)
+            process.stdout.close()
+            process.stderr.close()
+            raise SandboxError(f"Sandbox template {self.index} is not accepting requests: {e}")
+        finally:
+            for fd in (stdin_fd, stdout_w, stderr_w):
+                os.close(fd)
+
+        event, _ = waiter
+        if not event.wait(SPAWN_TIMEOUT_SECONDS) or waiter[1] is None or "pid" not in waiter[1]:
+            self._pending.pop(request_id, None)
+            process.stdout.close()
+            process.stderr.close()
+            error = (waiter[1] or {}).get("error", "no response")
+            raise SandboxError(f"Sandbox template {self.index} could not fork: {error}")
+
+        process.pid = waiter[1]["pid"]
+        with self._lock:
+            exit_message = self._early_exits.pop(process.pid, None)
+            if exit_message is None:
+                self._children[process.pid] = process
+        if exit_message is not None:
+            process._set_returncode(exit_message["returncode"], exit_message.get("usage"))
+        return process
+
+    def _dispatch(self, template: subprocess.Popen, sock: socket.socket) -> None:
+        """Route template messages to waiting callers (runs in thread)."""
+        selector = selectors.DefaultSelector()
+        selector.register(sock, selectors.EVENT_READ)
+        # stderr is logged; EOF on it means the template died
+        selector.register(template.stderr, selectors.EVENT_READ)
+        try:
+            while True:
+                for key, _ in selector.select():
+                    if key.fileobj is template.stderr:
+                        output = template.stderr.read1(MAX_MESSAGE_BYTES)
+                        if not output:
+                            return
+                        self._log_stderr(output)
+                        continue
+                    self._handle_message(json.loads(sock.recv(MAX_MESSAGE_BYTES)))
+        except (OSError, ValueError) as e:
+            logger.debug(f"Sandbox template {self.index} dispatcher stopped: {e}")
+        finally:
+            selector.close()
+            self._on_template_exit(template)
+
+    def _log_stderr(self, output: bytes) -> None:
+        for line in output.decode("utf-8", errors="replace").splitlines():
+            if line.strip():
+                logger.info(f"Sandbox template {self.index}: {line}")
+
+    def _handle_message(self, message: dict) -> None:
+        msg_type = message.get("type")
+        with self._lock:
+            if msg_type in ("spawned", "error"):
+                waiter = self._pending.pop(message.get("id"), None)
+                if waiter is not None:
+                    waiter[1] = message
+                    waiter[0].set()
+            elif msg_type == "exit":
+                child = self._children.pop(message["pid"], None)
+                if child is None:
+                    self._early_exits[message["pid"]] = message
+                    return
+        if msg_type == "exit":
+            child._set_returncode(message["returncode"], message.get("usage"))
+
+    def _on_template_exit(self, template: subprocess.Popen) -> None:
+        """Fail pending requests and orphaned children of a dead template."""
+        with self._lock:
+            if self._process is not template:
+                return
+            pending = list(self._pending.values())
+            children = list(self._children.values())
+            self._pending.clear()
+            self._children.clear()
+            self._early_exits.clear()
+        for waiter in pending:
+            waiter[0].set()
+        for child in children:
+            # Exit status is lost with the template; report it as killed
+            child.kill()
+            child._set_returncode(-9)
+        if template.poll() is None:
+            template.kill()
+        logger.warning(f"Sandbox template {self.index} exited")
+
+    def shutdown(self) -> None:
+        """Stop the template; running children are left to finish."""
+        with self._lock:
+            process, sock = self._process, self._sock
+            self._process, self._sock = None, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+        if sock is not None:
+            sock.close()
+
+
+class SandboxPool:
+    """Round-robin pool of sandbox templates."""
+
+    def __init__(self, size: int, preload_modules: List[str]):
+        """Initialize the pool; templates start on first use or warm().
+
+        Args:
+            size: Number of template processes.
+            preload_modules: Modules each template imports before forking.
+        """
+        self.templates = [SandboxTemplate(i, preload_modules) for i in range(size)]
+        self._lock = threading.Lock()
+
+    def warm(self) -> None:
+        """Start every template concurrently and wait for them."""
+        def start(template: SandboxTemplate) -> None:
+            try:
+                template.ensure_started()
+            except SandboxError as e:
+                logger.warning(str(e))
+
+        threads = [threading.Thread(target=start, args=(t,), daemon=True) for t in self.templates]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def spawn(self, script: str, cwd: str, memory_mb: Optional[int] = None) -> SandboxProcess:
+        """Fork a child from the least busy template. See SandboxTemplate.spawn."""
+        with self._lock:
+            template = min(self.templates, key=lambda t: (not t.is_alive(), t.active_children))
+        return template.spawn(script, cwd, memory_mb)
+
+    def shutdown(self) -> None:
+        """Stop every template."""
+        for template in self.templates:
+            template.shutdown()
+
+
+_default_pool: Optional[SandboxPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> Optional[SandboxPool]:
+    """Get the default SandboxPool singleton.
+
+    Returns:
+        SandboxPool configured from TOOL_CONFIG.sandbox_pool, or None if the
+        pool is disabled, conda run is forced, or the platform lacks fork.
+    """
+    global _default_pool
+    settings = TOOL_CONFIG.sandbox_pool
+    if settings.size <= 0 or not CONDA_DIRECT_EXEC or not hasattr(os, "fork") or not hasattr(socket, "send_fds"):
+        return None
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = SandboxPool(settings.size, settings.preload_modules)
+    return _default_pool
+
+
+def reset_sandbox_pool() -> None:
+    """Stop every template and reset the SandboxPool singleton."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is not None:
+            _default_pool.shutdown()
+        _default_pool = None
@@ -0,0 +1,252 @@
+"""Template process of the pre-forked sandbox pool.
+
+Started by src.tools.sandbox with the conda environment's interpreter and run
+as a plain script, so it must only use the standard library. It imports the
+scientific stack once, then forks a child per execute_code request; the child
+starts with everything already imported and runs the script.
+
+Usage (internal):
+    python -u sandbox_server.py <socket_fd> <module> [<module> ...]
+
+The template exits when its stdin (held open by the parent) reaches EOF.
+
+Messages are JSON datagrams on the inherited Unix socket:
+    in:  {"id": 1, "script": "/abs/code.py", "cwd": "...", "memory_mb": null}
+         with three file descriptors attached (stdin, stdout, stderr)
+    out: {"type": "ready", "pid": 123, "preloaded": [...], "failed": {...}}
+         {"type": "spawned", "id": 1, "pid": 456}
+         {"type": "error", "id": 1, "error": "..."}
+         {"type": "exit", "pid": 456, "returncode": 0, "usage": {...}}
+
+"usage" holds the child's CPU time, peak RSS and I/O bytes, with the fields
+of src.tools.resource_usage.ResourceUsage (except wall time).
+"""
+
+import array
+import importlib
+import json
+import os
+import random
+import runpy
+import selectors
+import signal
+import socket
+import sys
+import traceback
+
+MAX_MESSAGE_BYTES = 65536
+FDS_PER_REQUEST = 3
+
+
+def _preload(modules):
+    """Import the given modules, returning (imported, failed)."""
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    imported, failed = [], {}
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            imported.append(name)
+        except Exception as e:
+            failed[name] = f"{type(e).__name__}: {e}"
+
+    if "matplotlib" in sys.modules:
+        try:
+            # Build the font cache once instead of in every child
+            from matplotlib import font_manager
+            font_manager.findfont("DejaVu Sans")
+        except Exception:
+            pass
+    return imported, failed
+
+
+def _send(sock, message):
+    sock.send(json.dumps(message).encode("utf-8"))
+
+
+def _recv_request(sock):
+    """Receive one request and its file descriptors."""
+    fds = array.array("i")
+    msg, ancdata, _, _ = sock.recvmsg(
+        MAX_MESSAGE_BYTES, socket.CMSG_SPACE(FDS_PER_REQUEST * fds.itemsize)
+    )
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(data[:len(data) - (len(data) % fds.itemsize)])
+    return msg, list(fds)
+
+
+def _set_memory_limit(memory_mb):
+    if memory_mb is None:
+        return
+    try:
+        import resource
+        memory_bytes = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _reseed():
+    """Forked children share the template's RNG state; reseed them."""
+    random.seed()
+    numpy = sys.modules.get("numpy")
+    if numpy is not None:
+        try:
+            numpy.random.seed()
+        except Exception:
+            pass
+
+
+def _format_error(exc, script):
+    """Format a traceback starting at the user's script."""
+    tb = exc.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename != script:
+        tb = tb.tb_next
+    return "".join(traceback.format_exception(type(exc), exc, tb or exc.__traceback__))
+
+
+def _run_child(request, fds, close_fds):
+    """Body of a forked child; never returns."""
+    code = 1
+    try:
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        # Own session, so the parent can stop everything the script starts
+        os.setsid()
+        for fd in close_fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            if fd > 2:
+                os.close(fd)
+
+        script = request["script"]
+        os.chdir(request.get("cwd") or os.path.dirname(script))
+        _set_memory_limit(request.get("memory_mb"))
+        _reseed()
+        sys.argv = [script]
+        sys.path[0] = os.path.dirname(script)
+
+        try:
+            runpy.run_path(script, run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                sys.stderr.write(f"{e.code}\n")
+                code = 1
+        except BaseException as e:
+            sys.stderr.write(_format_error(e, script))
+            code = 1
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        os._exit(code)
+
+
+def _child_usage(pid):
+    """Usage fields of an exited, not yet reaped child; reaps it."""
+    usage = {}
+    try:
+        # Read /proc before reaping; afterwards the entry is gone
+        with open(f"/proc/{pid}/io", encoding="ascii") as f:
+            counters = dict(line.split(":", 1) for line in f if ":" in line)
+        usage["read_bytes"] = int(counters["rchar"])
+        usage["write_bytes"] = int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        pass
+    _, status, rusage = os.wait4(pid, 0)
+    maxrss_bytes = rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    usage.update({
+        "user_cpu_seconds": rusage.ru_utime,
+        "system_cpu_seconds": rusage.ru_stime,
+        "peak_rss_mb": maxrss_bytes / (1024 * 1024),
+    })
+    return status, usage
+
+
+def _reap(sock):
+    """Report every exited child."""
+    while True:
+        try:
+            # Find an exited child without reaping it yet
+            info = os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+        except ChildProcessError:
+            return
+        if info is None:
+            return
+        status, usage = _child_usage(info.si_pid)
+        if os.WIFSIGNALED(status):
+            returncode = -os.WTERMSIG(status)
+        else:
+            returncode = os.WEXITSTATUS(status)
+        _send(sock, {"type": "exit", "pid": info.si_pid, "returncode": returncode, "usage": usage})
+
+
+def main():
+    sock = socket.socket(fileno=int(sys.argv[1]))
+    imported, failed = _preload(sys.argv[2:])
+
+    # SIGCHLD wakes the selector through a self-pipe; no polling
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+    selector.register(wake_r, selectors.EVENT_READ)
+    selector.register(sys.stdin.fileno(), selectors.EVENT_READ)
+    # Descriptors children must not keep open
+    inherited = [selector.fileno()] if hasattr(selector, "fileno") else []
+
+    _send(sock, {"type": "ready", "pid": os.getpid(), "preloaded": imported, "failed": failed})
+
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj == sys.stdin.fileno():
+                if not os.read(key.fileobj, 512):
+                    # Parent went away
+                    return
+                continue
+            if key.fileobj == wake_r:
+                try:
+                    os.read(wake_r, 512)
+                except BlockingIOError:
+                    pass
+                _reap(sock)
+                continue
+
+            msg, fds = _recv_request(sock)
+            if not msg:
+                return
+            request = json.loads(msg)
+            if len(fds) != FDS_PER_REQUEST:
+                for fd in fds:
+                    os.close(fd)
+                _send(sock, {"type": "error", "id": request.get("id"),
+                             "error": f"Expected {FDS_PER_REQUEST} file descriptors, got {len(fds)}"})
+                continue
+
+            for stream in (sys.stdout, sys.stderr):
+                stream.flush()
+            pid = os.fork()
+            if pid == 0:
+                _run_child(request, fds, [sock.fileno(), wake_r, wake_w, *inherited])
+            for fd in fds:
+                os.close(fd)
+            _send(sock, {"type": "spawned", "id": request.get("id"), "pid": pid})
+
+
+if __name__ == "__main__":
+    main()
@@ -6,18 +6,24 @@ This module provides:
 """
 
 import ast
+import asyncio
 import re
 import subprocess
+import sys
 import threading
 import time
 from dataclasses import dataclass, field
 from queue import Queue, Empty
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from ..logger import setup_logger
+from . import process_group
+from .output_capture import OutputCapture
+from .reactor import Execution, get_reactor, monitor_async
+from .resource_usage import ResourceUsage
 from .tool_config import TOOL_CONFIG
 
-logger = setup_logger()
+logger = setup_logger(__name__)
 
 # Constants
 DEFAULT_POLL_INTERVAL_SECONDS = 0.1
@@ -166,7 +172,15 @@ class ResourceLimiter:
     - Progress-based timeout: Kill only if no stdout for N seconds
     - Memory limit: Set via resource.setrlimit (Linux only)
     
-    Uses threading for cross-platform non-blocking stdout reading.
+    Each process runs in its own session; on timeout its whole process group
+    is stopped (SIGTERM, then SIGKILL), and leftovers are reaped after a
+    normal exit.
+    
+    Output is captured by the shared ExecutionReactor (one selector thread
+    for all executions), which aexecute() awaits without blocking the event
+    loop. On Windows, where pipes cannot be selected, reader threads (or the
+    caller's event loop, for aexecute) are used instead. Each stream keeps only its head and tail in
+    memory; when it overflows, the full stream is spilled to a log file.
     """
 
     def __init__(
@@ -175,19 +189,38 @@ class ResourceLimiter:
         memory_mb: Optional[int] = None,
         max_output_chars: Optional[int] = None,
         progress_timeout: Optional[int] = None,
+        max_error_chars: Optional[int] = None,
+        log_dir: Optional[str] = None,
+        label: str = "execution",
     ):
         """Initialize resource limiter.
         
         Args:
             timeout: Fixed timeout in seconds. None = no limit.
             memory_mb: Memory limit in MB (Linux only). None = no limit.
-            max_output_chars: Truncate output if exceeds. None = use config default.
+            max_output_chars: Truncate stdout if exceeds. None = use config default.
             progress_timeout: Timeout only if no stdout for N seconds.
+            max_error_chars: Truncate stderr if exceeds. None = use config default.
+            log_dir: Directory for full-output spill files. None = no spill files.
+            label: Prefix of spill file names (e.g. the script name).
         """
         self.timeout = timeout
         self.memory_mb = memory_mb
         self.max_output_chars = max_output_chars or TOOL_CONFIG.execution.max_output_chars
+        self.max_error_chars = max_error_chars or TOOL_CONFIG.execution.max_error_chars
         self.progress_timeout = progress_timeout
+        self.terminate_grace_seconds = TOOL_CONFIG.execution.terminate_grace_seconds
+        self.log_dir = log_dir
+        self.label = label
+
+    def new_capture(self) -> OutputCapture:
+        """Create a bounded stdout/stderr capture using this limiter's limits."""
+        return OutputCapture(
+            self.max_output_chars,
+            self.max_error_chars,
+            log_dir=self.log_dir,
+            label=self.label,
+        )
 
     def execute(
         self,
@@ -195,6 +228,7 @@ class ResourceLimiter:
         cwd: str,
         shell: bool = False,
         executable: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
     ) -> subprocess.CompletedProcess:
         """Execute command with resource limits.
         
@@ -203,6 +237,7 @@ class ResourceLimiter:
             cwd: Working directory.
             shell: Whether to use shell execution.
             executable: Shell executable (e.g., /bin/bash).
+            env: Environment variables for the child. None = inherit.
             
         Returns:
             CompletedProcess with stdout/stderr.
@@ -210,36 +245,174 @@ class ResourceLimiter:
         Raises:
             TimeoutError: If execution exceeds timeout limits.
         """
+        # Use Popen and monitor output/deadlines without blocking
+        process = self._spawn(command, cwd, shell, executable, env)
+        return self.monitor(process, command)
+
+    def _spawn(
+        self,
+        command,
+        cwd: str,
+        shell: bool,
+        executable: Optional[str],
+        env: Optional[Dict[str, str]],
+    ) -> subprocess.Popen:
+        """Start a command in its own session, under the memory limit."""
         # Apply memory limit if specified (Linux only)
         preexec_fn = None
         if self.memory_mb is not None:
             preexec_fn = self._create_preexec_fn()
 
-        # No timeout - run directly
-        if self.timeout is None and self.progress_timeout is None:
-            result = subprocess.run(
-                command,
-                cwd=cwd,
-                shell=shell,
-                executable=executable,
-                capture_output=True,
-                text=True,
-                preexec_fn=preexec_fn,
-            )
-            return self._truncate_output(result)
-
-        # Use Popen with threading for cross-platform timeout monitoring
-        process = subprocess.Popen(
+        return subprocess.Popen(
             command,
             cwd=cwd,
             shell=shell,
             executable=executable,
+            env=env,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
             preexec_fn=preexec_fn,
+            start_new_session=process_group.SUPPORTED,
         )
 
+    def monitor(self, process, command) -> subprocess.CompletedProcess:
+        """Collect the output of a started process, enforcing the timeouts.
+        
+        Args:
+            process: A subprocess.Popen-like object with text stdout/stderr pipes.
+            command: Command recorded in the result.
+            
+        Returns:
+            CompletedProcess with stdout/stderr.
+            
+        Raises:
+            TimeoutError: If execution exceeds timeout limits.
+        """
+        capture = self.new_capture()
+        if sys.platform == "win32":
+            return self._monitor_threaded(process, command, capture)
+
+        process_group.track(process.pid)
+        try:
+            execution = get_reactor().monitor(Execution(
+                process,
+                timeout=self.timeout,
+                progress_timeout=self.progress_timeout,
+                capture=capture,
+            ))
+        except Exception:
+            process_group.terminate(process, self.terminate_grace_seconds)
+            capture.close()
+            raise
+        if execution.error is not None:
+            process_group.terminate(process, self.terminate_grace_seconds)
+            raise TimeoutError(execution.error)
+
+        process_group.reap(process.pid, self.terminate_grace_seconds)
+        return capture.to_completed_process(command, execution.returncode, execution.usage)
+
+    async def aexecute(
+        self,
+        command,
+        cwd: str,
+        shell: bool = False,
+        executable: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+    ) -> subprocess.CompletedProcess:
+        """Execute command with resource limits on the running event loop.
+        
+        Same limits and result (including resource usage) as execute();
+        cancelling the awaiting task stops the process group.
+        
+        Args:
+            command: Command to execute (list, or string if shell=True).
+            cwd: Working directory.
+            shell: Whether to use shell execution.
+            executable: Shell executable (e.g., /bin/bash).
+            env: Environment variables for the child. None = inherit.
+            
+        Returns:
+            CompletedProcess with stdout/stderr.
+            
+        Raises:
+            TimeoutError: If execution exceeds timeout limits.
+        """
+        if sys.platform == "win32":
+            return await self._aexecute_on_loop(command, cwd, shell, executable, env)
+
+        process = self._spawn(command, cwd, shell, executable, env)
+        process_group.track(process.pid)
+        capture = self.new_capture()
+        try:
+            execution = await get_reactor().amonitor(Execution(
+                process,
+                timeout=self.timeout,
+                progress_timeout=self.progress_timeout,
+                capture=capture,
+            ))
+        except BaseException:
+            # Cancelled, or monitoring failed
+            await asyncio.to_thread(process_group.terminate, process, self.terminate_grace_seconds)
+            capture.close()
+            raise
+        if execution.error is not None:
+            await asyncio.to_thread(process_group.terminate, process, self.terminate_grace_seconds)
+            raise TimeoutError(execution.error)
+
+        await process_group.reap_async(process.pid, self.terminate_grace_seconds)
+        return capture.to_completed_process(command, execution.returncode, execution.usage)
+
+    async def _aexecute_on_loop(
+        self,
+        command,
+        cwd: str,
+        shell: bool,
+        executable: Optional[str],
+        env: Optional[Dict[str, str]],
+    ) -> subprocess.CompletedProcess:
+        """aexecute() with an asyncio subprocess followed on the event loop (Windows).
+
+        Like the threaded monitor, reports wall time only.
+        """
+        options = dict(
+            cwd=cwd,
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=process_group.SUPPORTED,
+        )
+        if shell:
+            process = await asyncio.create_subprocess_shell(command, executable=executable, **options)
+        else:
+            process = await asyncio.create_subprocess_exec(*command, **options)
+
+        process_group.track(process.pid)
+        capture = self.new_capture()
+        try:
+            execution = await monitor_async(Execution(
+                process,
+                timeout=self.timeout,
+                progress_timeout=self.progress_timeout,
+                capture=capture,
+            ))
+        except asyncio.CancelledError:
+            await process_group.terminate_async(process, self.terminate_grace_seconds)
+            raise
+        if execution.error is not None:
+            await process_group.terminate_async(process, self.terminate_grace_seconds)
+            raise TimeoutError(execution.error)
+
+        await process_group.reap_async(process.pid, self.terminate_grace_seconds)
+        return capture.to_completed_process(command, execution.returncode, execution.usage)
+
+    def _monitor_threaded(
+        self,
+        process,
+        command,
+        capture: OutputCapture,
+    ) -> subprocess.CompletedProcess:
+        """Monitor a process with reader threads (platforms without pipe selection)."""
         # Set up threaded output reading
         stdout_queue: Queue = Queue()
         stderr_queue: Queue = Queue()
@@ -260,8 +433,6 @@ class ResourceLimiter:
 
         start_time = time.time()
         last_output_time = start_time
-        stdout_lines = []
-        stderr_lines = []
 
         try:
             while True:
@@ -278,12 +449,12 @@ class ResourceLimiter:
                     
                     while not stdout_queue.empty():
                         try:
-                            stdout_lines.append(stdout_queue.get_nowait())
+                            capture.stdout.write(stdout_queue.get_nowait())
                         except Empty:
                             break
                     while not stderr_queue.empty():
                         try:
-                            stderr_lines.append(stderr_queue.get_nowait())
+                            capture.stderr.write(stderr_queue.get_nowait())
                         except Empty:
                             break
                     break
@@ -291,7 +462,7 @@ class ResourceLimiter:
                 # Read available output from queue
                 try:
                     line = stdout_queue.get(timeout=DEFAULT_POLL_INTERVAL_SECONDS)
-                    stdout_lines.append(line)
+                    capture.stdout.write(line)
                     last_output_time = time.time()
                 except Empty:
                     pass
@@ -299,7 +470,7 @@ class ResourceLimiter:
                 # Drain stderr without blocking
                 while not stderr_queue.empty():
                     try:
-                        stderr_lines.append(stderr_queue.get_nowait())
+                        capture.stderr.write(stderr_queue.get_nowait())
                     except Empty:
                         break
 
@@ -322,16 +493,12 @@ class ResourceLimiter:
             stop_event.set()
             process.kill()
             process.wait()
+            capture.close()
             raise
 
-        result = subprocess.CompletedProcess(
-            args=command,
-            returncode=return_code,
-            stdout=''.join(stdout_lines),
-            stderr=''.join(stderr_lines),
-        )
-
-        return self._truncate_output(result)
+        # No rusage without wait4; report wall time only
+        usage = ResourceUsage(wall_seconds=time.time() - start_time)
+        return capture.to_completed_process(command, return_code, usage)
 
     def _create_preexec_fn(self):
         """Create preexec function for memory limiting (Linux only)."""
@@ -346,16 +513,3 @@ class ResourceLimiter:
                 pass  # Not available on this platform
         
         return set_limits
-
-    def _truncate_output(
-        self, 
-        result: subprocess.CompletedProcess
-    ) -> subprocess.CompletedProcess:
-        """Truncate output if it exceeds max_output_chars."""
-        if self.max_output_chars and len(result.stdout) > self.max_output_chars:
-            result.stdout = (
-                result.stdout[:self.max_output_chars] +
-                f"\n\n... [OUTPUT TRUNCATED at {self.max_output_chars} chars]"
-            )
-        return result
-
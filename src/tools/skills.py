@@ -6,7 +6,7 @@ from pydantic import BaseModel, Field
 from ..core.agent_config_loader import get_agent_config_loader
 from ..logger import setup_logger
 
-logger = setup_logger()
+logger = setup_logger(__name__)
 
 
 class LookupSkillInput(BaseModel):
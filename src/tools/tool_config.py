@@ -12,10 +12,11 @@ from pathlib import Path
 
 from ..logger import setup_logger
 
-logger = setup_logger()
+logger = setup_logger(__name__)
 
 # Default constants
 DEFAULT_MAX_OUTPUT_CHARS = 50000
+DEFAULT_MAX_ERROR_CHARS = 20000
 DEFAULT_MAX_READ_BYTES = 5 * 1024 * 1024  # 5MB
 DEFAULT_MAX_READ_LINES = 10000
 DEFAULT_MAX_WRITE_BYTES = 10 * 1024 * 1024  # 10MB
@@ -28,14 +29,23 @@ class ExecutionLimits:
     Attributes:
         timeout_seconds: Max execution time. None = no limit.
         max_memory_mb: Max memory usage (Linux only). None = no limit.
-        max_output_chars: Truncate output if exceeds this limit.
+        max_output_chars: Characters of stdout kept (head + tail); the full
+            stream is spilled to a log file when exceeded.
+        max_error_chars: Same limit for stderr.
         progress_timeout_seconds: If set, timeout resets on stdout activity.
+        max_parallel_scripts: Scripts execute_code_batch runs at once.
+            None = number of available CPUs.
+        terminate_grace_seconds: Seconds a stopped execution's process group
+            gets to exit after SIGTERM before SIGKILL.
         blocked_patterns: Code patterns to block (security).
     """
     timeout_seconds: Optional[int] = None
     max_memory_mb: Optional[int] = None
     max_output_chars: int = DEFAULT_MAX_OUTPUT_CHARS
+    max_error_chars: int = DEFAULT_MAX_ERROR_CHARS
     progress_timeout_seconds: Optional[int] = None
+    max_parallel_scripts: Optional[int] = None
+    terminate_grace_seconds: int = 5
     blocked_patterns: List[str] = field(default_factory=lambda: [
         "os.system",
         "subprocess.call",
@@ -71,6 +81,95 @@ class FileOperationLimits:
     ])
 
 
+@dataclass
+class KernelLimits:
+    """Settings for persistent (stateful) execute_code kernels.
+    
+    Attributes:
+        enabled: Run execute_code in a per-run persistent kernel by default.
+        idle_timeout_seconds: Shut down kernels idle this long. None = never.
+        interrupt_grace_seconds: Seconds a timed-out cell gets to stop after
+            an interrupt before the kernel is killed.
+    """
+    enabled: bool = False
+    idle_timeout_seconds: Optional[int] = 1800
+    interrupt_grace_seconds: int = 5
+
+
+@dataclass
+class SandboxPoolSettings:
+    """Settings for the pre-forked sandbox pool used by stateless execute_code.
+    
+    Attributes:
+        size: Number of template processes. 0 disables the pool.
+        preload_modules: Modules each template imports before forking.
+    """
+    size: int = 0
+    preload_modules: List[str] = field(default_factory=lambda: [
+        "numpy",
+        "pandas",
+        "matplotlib",
+        "matplotlib.pyplot",
+        "sklearn",
+        "sklearn.model_selection",
+        "sklearn.preprocessing",
+    ])
+
+
+@dataclass
+class ExecutionCacheSettings:
+    """Settings for the content-addressed execute_code result cache.
+    
+    Attributes:
+        enabled: Reuse results of identical earlier runs by default.
+        max_size_mb: Total size of stored output and files before least
+            recently used entries are evicted.
+    """
+    enabled: bool = False
+    max_size_mb: int = 1024
+
+
+@dataclass
+class IncrementalExecutionSettings:
+    """Settings for cell-level incremental re-execution of execute_code scripts.
+    
+    Attributes:
+        enabled: Split scripts into cells and resume from checkpoints by default.
+        max_checkpoints: Forked interpreter copies kept per run; the deepest
+            cells keep theirs.
+    """
+    enabled: bool = False
+    max_checkpoints: int = 8
+
+
+@dataclass
+class DatasetCacheSettings:
+    """Settings for the columnar (Arrow IPC) cache of CSV datasets.
+    
+    Attributes:
+        enabled: Store fully read CSV files as Arrow and read them back from it.
+        max_size_mb: Total size of stored datasets before least recently
+            used entries are evicted.
+    """
+    enabled: bool = True
+    max_size_mb: int = 10240
+
+
+@dataclass
+class DataCollectionSettings:
+    """Settings for reading datasets into the agent process (collect_data).
+    
+    Attributes:
+        max_memory_mb: Estimated size above which a selection is streamed
+            instead of loaded; also bounds the data held while streaming.
+        sample_rows: Rows sampled uniformly when a selection is streamed.
+        query_max_rows: Rows query_data returns at most.
+    """
+    max_memory_mb: int = 1024
+    sample_rows: int = 10000
+    query_max_rows: int = 200
+
+
 class ToolConfig:
     """Central configuration manager for all tools.
     
@@ -82,6 +181,12 @@ class ToolConfig:
         self,
         execution: Optional[ExecutionLimits] = None,
         file_ops: Optional[FileOperationLimits] = None,
+        kernel: Optional[KernelLimits] = None,
+        sandbox_pool: Optional[SandboxPoolSettings] = None,
+        execution_cache: Optional[ExecutionCacheSettings] = None,
+        incremental_execution: Optional[IncrementalExecutionSettings] = None,
+        dataset_cache: Optional[DatasetCacheSettings] = None,
+        data_collection: Optional[DataCollectionSettings] = None,
         enable_security_scan: bool = True,
         enable_write_validation: bool = True
     ):
@@ -90,11 +195,23 @@ class ToolConfig:
         Args:
             execution: Execution limits configuration.
             file_ops: File operation limits configuration.
+            kernel: Persistent kernel configuration.
+            sandbox_pool: Pre-forked sandbox pool configuration.
+            execution_cache: execute_code result cache configuration.
+            incremental_execution: Cell-level incremental execution configuration.
+            dataset_cache: Columnar CSV dataset cache configuration.
+            data_collection: collect_data memory configuration.
             enable_security_scan: Whether to scan code for dangerous patterns.
             enable_write_validation: Whether to validate content before writing.
         """
         self.execution = execution or ExecutionLimits()
         self.file_ops = file_ops or FileOperationLimits()
+        self.kernel = kernel or KernelLimits()
+        self.sandbox_pool = sandbox_pool or SandboxPoolSettings()
+        self.execution_cache = execution_cache or ExecutionCacheSettings()
+        self.incremental_execution = incremental_execution or IncrementalExecutionSettings()
+        self.dataset_cache = dataset_cache or DatasetCacheSettings()
+        self.data_collection = data_collection or DataCollectionSettings()
         self.enable_security_scan = enable_security_scan
         self.enable_write_validation = enable_write_validation
 
@@ -135,8 +252,11 @@ class ToolConfig:
         exec_limits = ExecutionLimits(
             timeout_seconds=exec_settings.get("timeout_seconds"),
             max_memory_mb=exec_settings.get("max_memory_mb"),
-            max_output_chars=exec_settings.get("max_output_chars", 50000),
+            max_output_chars=exec_settings.get("max_output_chars", DEFAULT_MAX_OUTPUT_CHARS),
+            max_error_chars=exec_settings.get("max_error_chars", DEFAULT_MAX_ERROR_CHARS),
             progress_timeout_seconds=exec_settings.get("progress_timeout_seconds"),
+            max_parallel_scripts=exec_settings.get("max_parallel_scripts"),
+            terminate_grace_seconds=exec_settings.get("terminate_grace_seconds", 5),
             blocked_patterns=exec_settings.get("blocked_patterns", ExecutionLimits().blocked_patterns),
         )
 
@@ -150,9 +270,59 @@ class ToolConfig:
             blocked_paths=file_settings.get("blocked_paths", FileOperationLimits().blocked_paths),
         )
 
+        # Parse persistent kernel settings
+        kernel_settings = settings.get("kernel", {})
+        kernel_limits = KernelLimits(
+            enabled=kernel_settings.get("enabled", False),
+            idle_timeout_seconds=kernel_settings.get("idle_timeout_seconds", 1800),
+            interrupt_grace_seconds=kernel_settings.get("interrupt_grace_seconds", 5),
+        )
+
+        # Parse sandbox pool settings
+        pool_settings = settings.get("sandbox_pool", {})
+        sandbox_pool = SandboxPoolSettings(
+            size=pool_settings.get("size", 0),
+            preload_modules=pool_settings.get("preload_modules", SandboxPoolSettings().preload_modules),
+        )
+
+        # Parse execution cache settings
+        cache_settings = settings.get("execution_cache", {})
+        execution_cache = ExecutionCacheSettings(
+            enabled=cache_settings.get("enabled", False),
+            max_size_mb=cache_settings.get("max_size_mb", 1024),
+        )
+
+        # Parse incremental execution settings
+        incremental_settings = settings.get("incremental_execution", {})
+        incremental_execution = IncrementalExecutionSettings(
+            enabled=incremental_settings.get("enabled", False),
+            max_checkpoints=incremental_settings.get("max_checkpoints", 8),
+        )
+
+        # Parse dataset cache settings
+        dataset_settings = settings.get("dataset_cache", {})
+        dataset_cache = DatasetCacheSettings(
+            enabled=dataset_settings.get("enabled", True),
+            max_size_mb=dataset_settings.get("max_size_mb", 10240),
+        )
+
+        # Parse data collection settings
+        collection_settings = settings.get("data_collection", {})
+        data_collection = DataCollectionSettings(
+            max_memory_mb=collection_settings.get("max_memory_mb", 1024),
+            sample_rows=collection_settings.get("sample_rows", 10000),
+            query_max_rows=collection_settings.get("query_max_rows", 200),
+        )
+
         return cls(
             execution=exec_limits,
             file_ops=file_limits,
+            kernel=kernel_limits,
+            sandbox_pool=sandbox_pool,
+            execution_cache=execution_cache,
+            incremental_execution=incremental_execution,
+            dataset_cache=dataset_cache,
+            data_collection=data_collection,
             enable_security_scan=settings.get("enable_security_scan", True),
             enable_write_validation=settings.get("enable_write_validation", True),
         )
@@ -164,7 +334,10 @@ class ToolConfig:
                 "timeout_seconds": self.execution.timeout_seconds,
                 "max_memory_mb": self.execution.max_memory_mb,
                 "max_output_chars": self.execution.max_output_chars,
+                "max_error_chars": self.execution.max_error_chars,
                 "progress_timeout_seconds": self.execution.progress_timeout_seconds,
+                "max_parallel_scripts": self.execution.max_parallel_scripts,
+                "terminate_grace_seconds": self.execution.terminate_grace_seconds,
                 "blocked_patterns": self.execution.blocked_patterns,
             },
             "file_operations": {
@@ -174,6 +347,32 @@ class ToolConfig:
                 "allowed_extensions": self.file_ops.allowed_extensions,
                 "blocked_paths": self.file_ops.blocked_paths,
             },
+            "kernel": {
+                "enabled": self.kernel.enabled,
+                "idle_timeout_seconds": self.kernel.idle_timeout_seconds,
+                "interrupt_grace_seconds": self.kernel.interrupt_grace_seconds,
+            },
+            "sandbox_pool": {
+                "size": self.sandbox_pool.size,
+                "preload_modules": self.sandbox_pool.preload_modules,
+            },
+            "execution_cache": {
+                "enabled": self.execution_cache.enabled,
+                "max_size_mb": self.execution_cache.max_size_mb,
+            },
+            "incremental_execution": {
+                "enabled": self.incremental_execution.enabled,
+                "max_checkpoints": self.incremental_execution.max_checkpoints,
+            },
+            "dataset_cache": {
+                "enabled": self.dataset_cache.enabled,
+                "max_size_mb": self.dataset_cache.max_size_mb,
+            },
+            "data_collection": {
+                "max_memory_mb": self.data_collection.max_memory_mb,
+                "sample_rows": self.data_collection.sample_rows,
+                "query_max_rows": self.data_collection.query_max_rows,
+            },
             "enable_security_scan": self.enable_security_scan,
             "enable_write_validation": self.enable_write_validation,
         }
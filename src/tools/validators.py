@@ -13,7 +13,7 @@ from typing import List, Tuple
 from ..logger import setup_logger
 from .tool_config import TOOL_CONFIG
 
-logger = setup_logger()
+logger = setup_logger(__name__)
 
 
 class PathValidator: